@@ -1,25 +1,44 @@
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import cv2
-import datetime
-import os
-import sys
-import csv
 import re
-import numpy as np
-from collections import Counter
-from ultralytics import YOLO
-import easyocr
 import threading
+import time
+import math
+import collections
+from lazy_imports import lazy_module, preload
+from detection_store import get_store
+from history_pages import CloudHistoryPager, LocalHistoryPager, source_index
+from virtual_table import VirtualTable, Column, Action
+
+# --- LAZY IMPORTS ---
+# OpenCV and the detection pipeline are only needed once a camera is opened.
+# They are preloaded in the background while the login screen is shown.
+cv2 = lazy_module("cv2")
+camera_stream = lazy_module("camera_stream")
+lpr_pipeline = lazy_module("lpr_pipeline")
+multi_camera = lazy_module("multi_camera")
+model_registry = lazy_module("model_registry")
+frame_renderer = lazy_module("frame_renderer")
+roi = lazy_module("roi")
+metrics = lazy_module("metrics")
 
 # --- FIREBASE IMPORT ---
-# Ensure final_system_segmentation.py is in the same folder
+# Ensure final_system_segmentation.py is in the same folder.
+# The connection itself is made in the background by App (see on_db_connected).
+ref = None
+db_manager = None
 try:
-    from final_system_segmentation import ref, db_manager
+    import final_system_segmentation as cloud
 except ImportError:
     # print("Firebase/Config not found. Cloud features disabled.")
-    ref = None
-    db_manager = None
+    cloud = None
+
+def db_unavailable_message():
+    """Status text while db_manager is not usable, None once it is."""
+    if db_manager is not None:
+        return None
+    if cloud is not None and not cloud.connected.is_set():
+        return "Connecting to database, please wait..."
+    return "Database unavailable, check your connection"
 
 # --- GLOBAL UI CONFIG ---
 ctk.set_appearance_mode("Dark")
@@ -36,99 +55,6 @@ COLOR_WARNING = "#e2983d" # Orange
 COLOR_DANGER = "#c92c2c"  # Red
 COLOR_CARD = "#2b2b2b"    # Card Background
 
-MALAYSIA_PLATE_REGEX = re.compile(r'^([A-Z]{1,3})(\d{1,4})([A-Z]?)$')
-
-VANITY_PREFIXES = [
-    "PUTRAJAYA", "PROTON", "PERODUA", "WAJA", "SUKOM", "LIMO", "RIMAU",
-    "BAMBEE", "IM4U", "1M4U", "PATRIOT", "VIP", "VIPS", "PERFECT", "NAAM",
-    "G1M", "GP", "US", "UP", "A1M", "GOLD", "MALAYSIA", "NBOS", "GTR",
-    "SAM", "K1M", "T1M", "FFF", "GG", "G", "FD", "FE", "FB", "X", "XX",
-    "YY", "UU", "Q", "KRISS", "LOTUS", "MADANI", "NBOS", "PETRA", "PUTRA",
-    "PERSONA", "PERDANA", "SATRIA", "SAS", "TIARA", "UNIMAS", "UNISZA", "UTEM",
-    "UiTM", "IIUM", "WAJA", "WCEC", "XIIINAM", "XOIC", 'XXVIASEAN', "XXXIDB",
-    "UUU"
-]
-
-# ==========================================
-# GLOBAL SETTINGS MANAGER
-# ==========================================
-class SystemConfig:
-    KNOWN_WIDTH = 1.8  # Avg car width in meters
-    FOCAL_LENGTH = 500 # Default calibration
-    TRIGGER_LINE_RATIO = 0.75 # Position of line (0.75 = 75% down)
-    CONFIDENCE_THRESHOLD = 0.50
-    LINE_OPACITY = 0.5
-
-    @classmethod
-    def get_trigger_y(cls, frame_height):
-        return int(frame_height * cls.TRIGGER_LINE_RATIO)
-
-# ==========================================
-# HELPER FUNCTIONS
-# ==========================================
-def estimate_distance_and_size(box_width, box_height):
-    if box_width == 0: return 0.0, 0.0
-    distance_meters = (SystemConfig.KNOWN_WIDTH * SystemConfig.FOCAL_LENGTH) / box_width
-    real_height_meters = (box_height * distance_meters) / SystemConfig.FOCAL_LENGTH
-    return distance_meters, real_height_meters
-
-def preprocess_plate(img):
-    img = cv2.resize(img, None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    kernel = np.array([[0, -1, 0],
-                       [-1, 5, -1],
-                       [0, -1, 0]])
-    sharpened = cv2.filter2D(gray, -1, kernel)
-    return sharpened
-
-def auto_correct_plate(text):
-    for vp in VANITY_PREFIXES:
-        if text.startswith(vp):
-            return text
-    # Prefix corrections: Common letter misreads (add more based on your logs)
-    prefix_corrections = {'O': 'Q', 'C': 'C', 'D': 'D', 'G': 'G', 'N':'W'}  # e.g., 'O' often 'Q' in prefixes
-    # Suffix corrections: Same as before, digit-focused
-    suffix_corrections = {'B': '8', 'O': '0', 'D': '0', 'I': '1', 'S': '5', 'Z': '2', 'Q': '0', 'G': '6', 'J':'3','Z':'7'}
-    
-    text = text.upper().replace(" ", "").replace("-", "")
-    if len(text) < 2: return text
-    
-    if MALAYSIA_PLATE_REGEX.match(text):
-        return text
-
-    # Find numeric start (more robust: look for first sequence of 1+ digits)
-    match = re.search(r'\d+', text)
-    if not match:
-        return text  # Cannot recover
-    prefix = text[:match.start()]
-    rest   = text[match.start():]
-
-    # Prefix: letters only, max 3
-    prefix = ''.join(prefix_corrections.get(c,c) for c in prefix if c.isalpha())[:3]
-
-    # Extract numeric
-    digits = ''.join(suffix_corrections.get(c,c) for c in rest if c.isalnum())
-    number = ''.join(c for c in digits if c.isdigit())[:4]
-
-    # Suffix: 1 letter max
-    suffix_letters = ''.join(c for c in rest if c.isalpha())
-    suffix = suffix_letters[-1] if suffix_letters else ''
-
-    candidate = prefix + number + suffix
-
-    # Final validation
-    if MALAYSIA_PLATE_REGEX.match(candidate):
-        return candidate
-
-    return text  # fallback
-
-def resource_path(relative_path):
-    try:
-        base_path = sys._MEIPASS  # PyInstaller temp folder
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
-
 # ==========================================
 # AUTHENTICATION FRAMES
 # ==========================================
@@ -179,6 +105,11 @@ class RegisterFrame(ctk.CTkFrame):
             self.lbl_status.configure(text="Invalid email format!", text_color=COLOR_DANGER)
             return
 
+        busy = db_unavailable_message()
+        if busy:
+            self.lbl_status.configure(text=busy, text_color=COLOR_WARNING)
+            return
+
         # 4. Attempt Registration
         # We assume db_manager.register_user returns (True, "Success") or (False, "Error Message")
         success, msg = db_manager.register_user(u, p, e)
@@ -230,6 +161,11 @@ class LoginFrame(ctk.CTkFrame):
 
         self.lbl_status.configure(text="")
 
+        busy = db_unavailable_message()
+        if busy:
+            self.lbl_status.configure(text=busy, text_color=COLOR_WARNING)
+            return
+
         if role == "Admin":
             user_data = db_manager.login_admin(u, p) 
             if user_data:
@@ -244,11 +180,13 @@ class LoginFrame(ctk.CTkFrame):
                 self.lbl_status.configure(text="Invalid Username or Password", text_color=COLOR_DANGER)
 
 class CameraSelectionFrame(ctk.CTkFrame):
-    def __init__(self, master, user_data, on_launch, on_logout):
+    def __init__(self, master, user_data, on_launch, on_logout, on_launch_all=None):
         super().__init__(master)
         self.pack(fill="both", expand=True, padx=40, pady=40)
         self.user_id, self.username = user_data
         self.on_launch = on_launch
+        self.on_launch_all = on_launch_all
+        self.camera_sources = []
         self.on_logout = on_logout
 
         # Top Bar
@@ -277,7 +215,12 @@ class CameraSelectionFrame(ctk.CTkFrame):
         self.entry_ip.pack(side="left", fill="x", expand=True, padx=(0, 10))
         ctk.CTkButton(add_frame, text="+ Add Camera", fg_color=COLOR_SUCCESS, height=40, font=FONT_BOLD, command=self.add_cam).pack(side="right")
 
-        ctk.CTkLabel(content, text="Connected Cameras", font=FONT_SUBHEADER, text_color="gray").pack(anchor="w", padx=20, pady=(10, 5))
+        list_header = ctk.CTkFrame(content, fg_color="transparent")
+        list_header.pack(fill="x", padx=20, pady=(10, 5))
+        ctk.CTkLabel(list_header, text="Connected Cameras", font=FONT_SUBHEADER, text_color="gray").pack(side="left")
+        if on_launch_all:
+            ctk.CTkButton(list_header, text="LAUNCH ALL", width=120, height=30, fg_color=COLOR_ACCENT, font=FONT_BOLD,
+                          command=lambda: self.on_launch_all(list(self.camera_sources))).pack(side="right")
 
         # List
         self.scroll = ctk.CTkScrollableFrame(content, fg_color="transparent")
@@ -294,6 +237,7 @@ class CameraSelectionFrame(ctk.CTkFrame):
     def load_cameras(self):
         for w in self.scroll.winfo_children(): w.destroy()
         cams = db_manager.get_user_cameras(self.user_id)
+        self.camera_sources = [ip for _, ip in cams]
 
         if not cams:
             ctk.CTkLabel(self.scroll, text="No cameras found. Add one above.", text_color="gray").pack(pady=40)
@@ -322,14 +266,14 @@ class CameraSelectionFrame(ctk.CTkFrame):
 
     def edit_own_profile(self):
         try:
-            user_data = ref.child('users').child(self.user_id).get()
+            user_data = db_manager.get_user(self.user_id)
             current_email = user_data.get('email', '')
             EditUserWindow(self, self.user_id, self.username, current_email, self.refresh_welcome)
         except Exception as e:
             pass # print(f"Error fetching profile: {e}")
 
     def refresh_welcome(self):
-        u_data = ref.child('users').child(self.user_id).get()
+        u_data = db_manager.get_user(self.user_id)
         self.username = u_data.get('username')
         pass
 
@@ -341,7 +285,7 @@ class SettingsWindow(ctk.CTkToplevel):
         super().__init__(master)
         self.attributes('-topmost', True)
         self.title("System Configuration")
-        self.geometry("600x500")
+        self.geometry("600x580")
         
         container = ctk.CTkFrame(self, fg_color="transparent")
         container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -349,21 +293,25 @@ class SettingsWindow(ctk.CTkToplevel):
         ctk.CTkLabel(container, text="Detection Settings", font=FONT_SUBHEADER).pack(pady=(0, 20))
 
         # --- 1. Trigger Line ---
-        self.create_slider_group(container, "Trigger Line Position", 0.1, 0.9, SystemConfig.TRIGGER_LINE_RATIO, 
+        self.create_slider_group(container, "Trigger Line Position", 0.1, 0.9, lpr_pipeline.SystemConfig.TRIGGER_LINE_RATIO, 
                                  lambda v: self.update_config("TRIGGER_LINE_RATIO", v), "slider_line", "lbl_line")
 
         # --- 2. Opacity ---
-        self.create_slider_group(container, "Line Opacity", 0.0, 1.0, SystemConfig.LINE_OPACITY,
+        self.create_slider_group(container, "Line Opacity", 0.0, 1.0, lpr_pipeline.SystemConfig.LINE_OPACITY,
                                  lambda v: self.update_config("LINE_OPACITY", v), "slider_opacity", "lbl_opacity")
 
         # --- 3. Confidence ---
-        self.create_slider_group(container, "AI Confidence Threshold", 0.3, 0.95, SystemConfig.CONFIDENCE_THRESHOLD,
+        self.create_slider_group(container, "AI Confidence Threshold", 0.3, 0.95, lpr_pipeline.SystemConfig.CONFIDENCE_THRESHOLD,
                                  lambda v: self.update_config("CONFIDENCE_THRESHOLD", v), "slider_conf", "lbl_conf")
+
+        # --- 4. Motion Gate ---
+        self.create_slider_group(container, "Motion Gate Threshold (% of band, 0 = off)", 0.0, 5.0, lpr_pipeline.SystemConfig.MOTION_THRESHOLD,
+                                 lambda v: self.update_config("MOTION_THRESHOLD", v), "slider_motion", "lbl_motion")
         
         # --- Focal Length ---
         ctk.CTkLabel(container, text="Focal Length (Calibration)", font=FONT_BOLD).pack(anchor="w", pady=(15, 5))
         self.entry_focal = ctk.CTkEntry(container)
-        self.entry_focal.insert(0, str(SystemConfig.FOCAL_LENGTH))
+        self.entry_focal.insert(0, str(lpr_pipeline.SystemConfig.FOCAL_LENGTH))
         self.entry_focal.pack(fill="x")
 
         ctk.CTkButton(container, text="Save & Close", fg_color=COLOR_SUCCESS, height=40, font=FONT_BOLD, command=self.save_and_close).pack(pady=30)
@@ -381,12 +329,13 @@ class SettingsWindow(ctk.CTkToplevel):
         setattr(self, slider_attr, slider)
 
     def update_config(self, key, value):
-        setattr(SystemConfig, key, value)
+        setattr(lpr_pipeline.SystemConfig, key, value)
         # Update label
         lbl_map = {
             "TRIGGER_LINE_RATIO": self.lbl_line,
             "LINE_OPACITY": self.lbl_opacity,
-            "CONFIDENCE_THRESHOLD": self.lbl_conf
+            "CONFIDENCE_THRESHOLD": self.lbl_conf,
+            "MOTION_THRESHOLD": self.lbl_motion
         }
         if key in lbl_map:
             lbl_map[key].configure(text=f"{value:.2f}")
@@ -394,10 +343,90 @@ class SettingsWindow(ctk.CTkToplevel):
     def save_and_close(self):
         try:
             val = float(self.entry_focal.get())
-            SystemConfig.FOCAL_LENGTH = val
+            lpr_pipeline.SystemConfig.FOCAL_LENGTH = val
         except ValueError: pass
         self.destroy()
 
+# ==========================================
+# POPUP: DETECTION AREA (ROI) EDITOR
+# ==========================================
+class RoiEditorWindow(ctk.CTkToplevel):
+    """Click points on a snapshot of the camera to draw the polygon the detector is limited to."""
+    def __init__(self, master, camera_source, frame, save_dir):
+        super().__init__(master)
+        self.attributes('-topmost', True)
+        self.title(f"Detection Area: {camera_source}")
+        self.camera_source = str(camera_source)
+        self.save_dir = save_dir
+        self.size = lpr_pipeline.LPRPipeline.FRAME_SIZE
+        self.points = []
+
+        self.grab_set()
+        self.focus_force()
+
+        container = ctk.CTkFrame(self, fg_color="transparent")
+        container.pack(fill="both", expand=True, padx=20, pady=20)
+
+        ctk.CTkLabel(container, text="Click to add polygon points, the detector only sees the area inside.",
+                     font=FONT_BOLD).pack(pady=(0, 10))
+
+        self.canvas = ctk.CTkCanvas(container, width=self.size[0], height=self.size[1], bg="black", highlightthickness=0)
+        self.canvas.pack()
+        self.canvas.bind("<Button-1>", self.add_point)
+        if frame is not None:
+            from PIL import Image, ImageTk
+            img = Image.fromarray(cv2.cvtColor(cv2.resize(frame, self.size), cv2.COLOR_BGR2RGB))
+            self.photo = ImageTk.PhotoImage(image=img)
+            self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+
+        # Existing polygon of this camera
+        spec = lpr_pipeline.SystemConfig.roi_for(self.camera_source)
+        if isinstance(spec, list):
+            self.points = [(px * self.size[0], py * self.size[1]) for px, py in spec]
+        self.lbl_mode = ctk.CTkLabel(container, text="", text_color=COLOR_WARNING, font=FONT_BOLD)
+        self.lbl_mode.pack(pady=(10, 0))
+        self.redraw()
+
+        btns = ctk.CTkFrame(container, fg_color="transparent")
+        btns.pack(fill="x", pady=(10, 0))
+        ctk.CTkButton(btns, text="FULL FRAME", fg_color="#444", font=FONT_BOLD, command=lambda: self.save("full")).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(btns, text="TRIGGER BAND", fg_color="#444", font=FONT_BOLD, command=lambda: self.save("band")).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(btns, text="CLEAR POINTS", fg_color=COLOR_DANGER, font=FONT_BOLD, command=self.clear_points).pack(side="left", expand=True, padx=5)
+        ctk.CTkButton(btns, text="SAVE POLYGON", fg_color=COLOR_SUCCESS, font=FONT_BOLD, command=self.save_polygon).pack(side="left", expand=True, padx=5)
+
+    def add_point(self, event):
+        self.points.append((event.x, event.y))
+        self.redraw()
+
+    def clear_points(self):
+        self.points = []
+        self.redraw()
+
+    def redraw(self):
+        self.canvas.delete("roi")
+        if len(self.points) >= 2:
+            flat = [v for p in self.points + self.points[:1] for v in p]
+            self.canvas.create_line(*flat, fill=COLOR_WARNING, width=2, tags="roi")
+        for x, y in self.points:
+            self.canvas.create_oval(x - 4, y - 4, x + 4, y + 4, fill=COLOR_WARNING, outline="", tags="roi")
+        spec = lpr_pipeline.SystemConfig.roi_for(self.camera_source)
+        mode = "Polygon" if isinstance(spec, list) else spec.title()
+        self.lbl_mode.configure(text=f"Current: {mode}   Points: {len(self.points)}")
+
+    def save_polygon(self):
+        if len(self.points) < 3:
+            self.lbl_mode.configure(text="A polygon needs at least 3 points", text_color=COLOR_DANGER)
+            return
+        self.save([[round(x / self.size[0], 4), round(y / self.size[1], 4)] for x, y in self.points])
+
+    def save(self, spec):
+        lpr_pipeline.SystemConfig.CAMERA_ROIS[self.camera_source] = spec
+        try:
+            roi.save_rois(self.save_dir, lpr_pipeline.SystemConfig.CAMERA_ROIS)
+        except Exception as e:
+            pass # print(f"Saving ROI failed: {e}")
+        self.destroy()
+
 # ==========================================
 # POPUP: EDIT RECORD WINDOW (ADMIN)
 # ==========================================
@@ -477,7 +506,9 @@ class EditRecordWindow(ctk.CTkToplevel):
             'distance_m': float(dist),
             'height_m': float(height),
             'note': note,
-            'confidence': self.record.get('confidence', 1.0)
+            'confidence': self.record.get('confidence', 1.0),
+            'camera_source': self.record.get('camera_source', 'Unknown'),
+            'source_ts': source_index(self.record.get('camera_source'), timestamp)
         }
         try:
             if new_plate != self.old_plate:
@@ -509,69 +540,39 @@ class AdminDashboard(ctk.CTkFrame):
         btn_frame = ctk.CTkFrame(header, fg_color="transparent")
         btn_frame.pack(side="right", padx=20)
         
-        ctk.CTkButton(btn_frame, text="REFRESH", width=120, command=self.load_all_data).pack(side="left", padx=10)
+        ctk.CTkButton(btn_frame, text="REFRESH", width=120,
+                      command=lambda: self.load_all_data(fresh=True)).pack(side="left", padx=10)
         ctk.CTkButton(btn_frame, text="LOGOUT", fg_color=COLOR_DANGER, width=100, command=on_logout).pack(side="left")
 
+        self.lbl_cache = ctk.CTkLabel(header, text="", text_color="gray")
+        self.lbl_cache.pack(side="right", padx=10)
+
         # Content
         content = ctk.CTkFrame(self, fg_color="transparent")
         content.pack(fill="both", expand=True, padx=20, pady=20)
 
-        # Table Header
-        header_frame = ctk.CTkFrame(content, height=50, fg_color="#444", corner_radius=10)
-        header_frame.pack(fill="x", pady=(0, 10), padx=(0, 20))
-        
-        cols = [("Username", 2), ("Email", 3), ("Registered", 2), ("Actions", 3)]
-        for i, (col, w) in enumerate(cols):
-            header_frame.grid_columnconfigure(i, weight=w, uniform="cols")
-            ctk.CTkLabel(header_frame, text=col, font=FONT_BOLD, anchor="w").grid(row=0, column=i, sticky="ew", padx=10, pady=10)
-
-        # Scrollable List
-        self.scroll = ctk.CTkScrollableFrame(content, fg_color="transparent")
-        self.scroll.pack(fill="both", expand=True)
-
-        for i, (_, w) in enumerate(cols):
-            self.scroll.grid_columnconfigure(i, weight=w)
+        # User table, only the visible rows have widgets
+        cols = [
+            Column("Username", 2, lambda u: u['username'], anchor="w"),
+            Column("Email", 3, lambda u: u['email'], anchor="w"),
+            Column("Registered", 2, lambda u: str(u['register_date']).split('.')[0], anchor="w"),
+        ]
+        actions = [
+            Action("DB", lambda u: self.view_user_db(u['uid']), fg_color="#1E88E5", width=40),
+            Action("Edit", self.open_edit_user, fg_color=COLOR_WARNING, text_color="black"),
+            Action("Del", lambda u: self.confirm_delete(u['uid']), fg_color=COLOR_DANGER),
+        ]
+        self.table = VirtualTable(content, cols, actions=actions, action_weight=3,
+                                  empty_text="No registered users found.", header_font=FONT_BOLD)
+        self.table.pack(fill="both", expand=True)
 
         self.load_all_data()
 
-    def load_all_data(self):
-        for w in self.scroll.winfo_children(): w.destroy()
-        users = db_manager.get_all_users()
-        
-        if not users:
-            ctk.CTkLabel(self.scroll, text="No registered users found.", text_color="gray").pack(pady=20)
-            return
-
-        for idx, u in enumerate(users):
-            self.create_row(idx, u)
-
-    def create_row(self, row_idx, user_data):
-        bg_color = COLOR_CARD if row_idx % 2 == 0 else "transparent"
-        row_frame = ctk.CTkFrame(self.scroll, fg_color=bg_color, corner_radius=5)
-        row_frame.grid(row=row_idx, column=0, columnspan=4, sticky="ew", pady=2)
-        
-        # Configure internal grid of the row frame to match parent
-        weights = [2, 3, 2, 3]
-        for i, w in enumerate(weights):
-            row_frame.grid_columnconfigure(i, weight=w, uniform="cols")
-
-        date_str = user_data['register_date'].split('.')[0]
-        
-        ctk.CTkLabel(row_frame, text=user_data['username'], anchor="w").grid(row=0, column=0, sticky="ew", padx=10, pady=10)
-        ctk.CTkLabel(row_frame, text=user_data['email'], anchor="w").grid(row=0, column=1, sticky="ew", padx=10, pady=10)
-        ctk.CTkLabel(row_frame, text=date_str, anchor="w").grid(row=0, column=2, sticky="ew", padx=10, pady=10)
-        
-        action_frame = ctk.CTkFrame(row_frame, fg_color="transparent")
-        action_frame.grid(row=0, column=3, sticky="ew", padx=10, pady=5)
-        
-        ctk.CTkButton(action_frame, text="DB", width=40, height=25, fg_color="#1E88E5", 
-                      command=lambda uid=user_data['uid']: self.view_user_db(uid)).pack(side="left", padx=2)
-        
-        ctk.CTkButton(action_frame, text="Edit", width=50, height=25, fg_color=COLOR_WARNING, text_color="black",
-                      command=lambda: self.open_edit_user(user_data)).pack(side="left", padx=2)
-
-        ctk.CTkButton(action_frame, text="Del", width=50, height=25, fg_color=COLOR_DANGER,
-                      command=lambda uid=user_data['uid']: self.confirm_delete(uid)).pack(side="left", padx=2)
+    def load_all_data(self, fresh=False):
+        # Our own edits invalidate the cached list; REFRESH also picks up other clients' changes
+        self.table.set_rows(db_manager.get_all_users(fresh=fresh) or [])
+        st = db_manager.get_cache_stats()
+        self.lbl_cache.configure(text=f"Cache: {st['hits']} hits / {st['misses']} misses ({st['hit_rate']*100:.0f}%)")
 
     def view_user_db(self, user_id):
         UserHistoryWindow(self, user_id, enable_editing=True)
@@ -623,81 +624,74 @@ class UserHistoryWindow(ctk.CTkToplevel):
         ctk.CTkLabel(top, text=display_title, font=FONT_HEADER).pack(side="left")
         ctk.CTkButton(top, text="Refresh Data", command=self.load_data, fg_color=COLOR_ACCENT).pack(side="right")
 
-        # Header Row
-        headers = ["Plate", "Time", "Source", "Color", "Confidence", "Dist/Height", "Note"]
-        weights = [1, 2, 2, 1, 1, 2, 3]
+        # Local = indexed store on this machine (instant), Cloud = Firebase (needed for admin edits)
+        self.source_var = ctk.StringVar(value="Cloud" if enable_editing else "Local")
+        ctk.CTkSegmentedButton(top, values=["Local", "Cloud"], variable=self.source_var,
+                               command=lambda v: self.load_data()).pack(side="right", padx=10)
+
+        # Bottom Bar (packed first so the table gets the remaining height)
+        bottom = ctk.CTkFrame(self, fg_color="transparent")
+        bottom.pack(side="bottom", fill="x", padx=20, pady=(0, 15))
+        self.lbl_count = ctk.CTkLabel(bottom, text="", text_color="gray")
+        self.lbl_count.pack(side="left")
+        self.more_btn = ctk.CTkButton(bottom, text="LOAD MORE", fg_color=COLOR_ACCENT, command=self.load_more)
+
+        # Table, rows are (plate, record) pairs
+        cols = [
+            Column("Plate", 1, lambda r: r[0], text_color=COLOR_WARNING),
+            Column("Time", 2, lambda r: r[1].get('timestamp', '-')),
+            Column("Source", 2, lambda r: r[1].get('camera_source', '-')),
+            Column("Color", 1, lambda r: r[1].get('color', '-')),
+            Column("Confidence", 1, lambda r: f"{r[1].get('confidence') or 0:.2f}",
+                   sort_key=lambda r: float(r[1].get('confidence') or 0)),
+            Column("Dist/Height", 2, lambda r: f"{r[1].get('distance_m', 0)}m / {r[1].get('height_m', 0)}m",
+                   sort_key=lambda r: float(r[1].get('distance_m') or 0)),
+            Column("Note", 3, lambda r: r[1].get('note') or ''),
+        ]
+        actions = []
         if self.enable_editing:
-            headers.append("Action")
-            weights.append(1)
-
-        header_frame = ctk.CTkFrame(self, fg_color=COLOR_CARD, height=40)
-        header_frame.pack(fill="x", padx=20)
-
-        for i, h in enumerate(headers):
-            header_frame.grid_columnconfigure(i, weight=weights[i])
-            ctk.CTkLabel(header_frame, text=h, font=FONT_BOLD).grid(row=0, column=i, sticky="ew", pady=10)
-
-        # List
-        self.scroll = ctk.CTkScrollableFrame(self, fg_color="transparent")
-        self.scroll.pack(fill="both", expand=True, padx=20, pady=10)
-        
-        for i, w in enumerate(weights):
-            self.scroll.grid_columnconfigure(i, weight=w)
+            actions.append(Action("EDIT", lambda r: self.open_edit(r[0], r[1]), fg_color=COLOR_WARNING,
+                                  text_color="black", width=60))
+        self.table = VirtualTable(self, cols, actions=actions, header_color=COLOR_CARD, header_font=FONT_BOLD)
+        self.table.pack(fill="both", expand=True, padx=20, pady=10)
 
         self.load_data()
 
-    def load_data(self):
-        for w in self.scroll.winfo_children(): w.destroy()
-
-        if not ref: return
+    PAGE_SIZE = 50
 
-        logs = ref.child('detection_logs').child(self.user_id).get()
-        if not logs: 
-            ctk.CTkLabel(self.scroll, text="No records found.").grid(row=0, column=0, columnspan=8, pady=20)
-            return
-
-        sorted_rows = sorted(logs.items(), key=lambda x: x[1].get('timestamp',''), reverse=True)
+    def load_data(self):
+        self.table.set_rows([])
+        self.pager = None
 
-        idx = 0
-        for plate, data in sorted_rows:
-            if self.filter_source:
-                log_source = data.get('camera_source', 'Unknown')
-                if log_source != self.filter_source:
-                    continue
-            self.create_row(idx, plate, data)
-            idx += 1
+        self.rows_editable = self.enable_editing and self.source_var.get() == "Cloud"
+        self.table.set_actions_visible(self.rows_editable)
+        try:
+            if self.source_var.get() == "Local":
+                store = get_store(lpr_pipeline.backup_paths()[4])
+                self.pager = LocalHistoryPager(store, self.user_id, self.filter_source, self.PAGE_SIZE)
+            elif ref:
+                self.pager = CloudHistoryPager(ref, self.user_id, self.filter_source, self.PAGE_SIZE)
+        except Exception as e:
+            pass # print(f"History error: {e}")
 
-    def create_row(self, row, plate, record):
-        # Map logical row index to grid rows (2 rows per record: content + separator)
-        grid_row = row * 2
-        sep_row = grid_row + 1
+        self.load_more()
 
-        bg_color = "#333" if row % 2 == 0 else "transparent"
-        
-        # We need a frame for the background color effect, but grid makes it tricky with columns.
-        # So we just add labels directly but perhaps we can put them in a frame wrapper later.
-        # For simple list, let's just stick to direct grid on scroll frame with separators.
+    def load_more(self):
+        """Fetches the next page and appends it to the table."""
+        rows = []
+        if self.pager is not None:
+            try:
+                rows = self.pager.next_page()
+            except Exception as e:
+                self.pager.has_more = False # print(f"History error: {e}")
 
-        def cell(c, txt, color="white"):
-            lbl = ctk.CTkLabel(self.scroll, text=str(txt), text_color=color, anchor="center")
-            lbl.grid(row=grid_row, column=c, sticky="ew", pady=5)
-            
-        cell(0, plate, COLOR_WARNING)
-        cell(1, record.get('timestamp', '-'))
-        cell(2, record.get('camera_source', '-'))
-        cell(3, record.get('color', '-'))
-        cell(4, f"{record.get('confidence', 0):.2f}")
-        cell(5, f"{record.get('distance_m', 0)}m / {record.get('height_m', 0)}m")
-        cell(6, record.get('note', ''))
+        self.table.append_rows(rows)
+        self.lbl_count.configure(text=f"{len(self.table.rows)} records")
 
-        if self.enable_editing:
-            btn = ctk.CTkButton(self.scroll, text="EDIT", width=60, height=25, fg_color=COLOR_WARNING, text_color="black",
-                                command=lambda p=plate, d=record: self.open_edit(p, d))
-            btn.grid(row=grid_row, column=7, pady=5)
-        
-        # Add a separator line
-        sep = ctk.CTkFrame(self.scroll, height=1, fg_color="#444")
-        sep.grid(row=sep_row, column=0, columnspan=8, sticky="ew")
+        if self.pager is not None and self.pager.has_more:
+            self.more_btn.pack(side="right")
+        else:
+            self.more_btn.pack_forget()
 
     def open_edit(self, plate, record):
         EditRecordWindow(self, self.user_id, plate, record, self.load_data)
@@ -784,61 +778,60 @@ class DashboardFrame(ctk.CTkFrame):
         self.camera_ip = camera_source
         self.user_id = user_id 
         self.is_running = True
-        self.cap = None 
+        self.grabber = None
+
+        # Processing runs on its own thread, the Tk loop only redraws the newest result (capped at DISPLAY_FPS)
+        self.display = frame_renderer.DisplaySlot()
+        self.pending_events = collections.deque()
+        # Operator corrections are applied on the processing thread, which owns the pipeline state
+        self.pending_corrections = collections.deque()
+        self.process_thread = None
+        self.renderer = None
+
+        # All detection / OCR / saving lives in the headless engine, this frame only displays it.
+        # Models come from the shared registry (preloaded after login), never loaded on the Tk thread.
+        self.pipeline = lpr_pipeline.LPRPipeline(camera_source=camera_source, user_id=user_id, cloud_ref=ref)
+        self.pipeline.models = model_registry.registry.peek()
+        self.models_error = None
+        self.last_stats_update = 0.0
 
-        # print("Loading AI Models...")
-        self.detector = YOLO(resource_path("best.pt"))
-        self.color_model = YOLO(resource_path("color.pt"))
-        # ADDED verbose=False to silence EasyOCR
-        self.reader = easyocr.Reader(['en'], gpu=True, verbose=False)
-        self.ALLOW_LIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-                
-        self.init_logic_variables()
         self.create_layout()
-        
-        self.download_path = os.path.join(os.path.expanduser("~"), "Downloads", "SmartLPR_Backup")
-        self.img_folder = os.path.join(self.download_path, "captured_images")
-        os.makedirs(self.img_folder, exist_ok=True)
-        self.csv_filename = os.path.join(self.download_path, 'car_plate_records.csv')
-        # print(f"📂 Backup Folder: {self.download_path}")
-
-        threading.Thread(target=self.connect_camera, daemon=True).start()
-        
-        self.csv_headers = [
-            "Timestamp", 
-            "Plate Number", 
-            "Confidence", 
-            "Color", 
-            "Distance (m)", 
-            "Height (m)", 
-            "Note"
-        ]
-        
-        if not os.path.isfile(self.csv_filename):
+        # print(f"📂 Backup Folder: {self.pipeline.download_path}")
+        if lpr_pipeline.SystemConfig.METRICS_PORT:
             try:
-                with open(self.csv_filename, 'w', newline='') as f:
-                    csv.writer(f).writerow(self.csv_headers)
+                metrics.start_metrics_server(lpr_pipeline.SystemConfig.METRICS_PORT)
             except Exception as e:
-                """print(f"Error creating CSV headers: {e}")"""
+                pass # print(f"Metrics endpoint failed: {e}")
 
+        if self.pipeline.models is None:
+            threading.Thread(target=self.wait_for_models, daemon=True).start()
+        threading.Thread(target=self.connect_camera, daemon=True).start()
+
+    def wait_for_models(self):
+        # print("Loading AI Models...")
+        try:
+            models = model_registry.get_models()
+        except Exception as e:
+            self.models_error = e
+            return
+        self.pipeline.models = models
 
-            
     def connect_camera(self):
         try:
             # 1. Attempt connection (Blocking happens here, but it's safe now)
-            if self.camera_ip.isdigit():
-                src = int(self.camera_ip)
-                cap = cv2.VideoCapture(src, cv2.CAP_DSHOW)
-            else:
-                cap = cv2.VideoCapture(self.camera_ip)
-
-            # 2. Check success
-            if not cap.isOpened():
-                raise ValueError("Could not open video source")
-            
-            # 3. If successful, assign to self.cap and start loop
-            self.cap = cap
-            # Schedule the update loop on the main thread
+            grabber = camera_stream.FrameGrabber(self.camera_ip,
+                                                 policy=lpr_pipeline.SystemConfig.capture_policy_for(self.camera_ip))
+            grabber.open()
+
+            # 2. If successful, start the capture thread and the update loop
+            grabber.start()
+            self.grabber = grabber
+            if not self.is_running:
+                grabber.stop()
+                return
+            self.process_thread = threading.Thread(target=self.process_loop, daemon=True)
+            self.process_thread.start()
+            # Schedule the render loop on the main thread
             self.after(0, self.update_camera)
             
         except Exception as e:
@@ -859,6 +852,9 @@ class DashboardFrame(ctk.CTkFrame):
             self.lbl_plate = self.create_card("Detected Plate", "---", COLOR_WARNING)
             self.lbl_color = self.create_card("Vehicle Color", "---", "white")
             self.lbl_dist = self.create_card("Dist / Height", "- / -", "white")
+
+            self.lbl_stats = ctk.CTkLabel(self.sidebar, text="", font=("Roboto", 11), text_color="gray", justify="left")
+            self.lbl_stats.pack(anchor="w", padx=20, pady=(10, 0))
             
             # Controls
             ctrl_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
@@ -867,6 +863,11 @@ class DashboardFrame(ctk.CTkFrame):
             ctk.CTkButton(ctrl_frame, text="⚙ SETTINGS", fg_color="#444", height=40, font=FONT_BOLD, command=lambda: SettingsWindow(self)).pack(fill="x", pady=5)
             # NEW (Correct - filters by the current camera IP)
             ctk.CTkButton(ctrl_frame, text="📂 HISTORY", fg_color=COLOR_ACCENT, height=40, font=FONT_BOLD, command=lambda: UserHistoryWindow(self, self.user_id, filter_source=self.camera_ip)).pack(fill="x", pady=5)
+            ctk.CTkButton(ctrl_frame, text="▭ DETECTION AREA", fg_color="#444", height=40, font=FONT_BOLD,
+                          command=lambda: RoiEditorWindow(self, self.camera_ip, self.pipeline.current_clean_frame,
+                                                          self.pipeline.download_path)).pack(fill="x", pady=5)
+            ctk.CTkButton(ctrl_frame, text="📊 METRICS OVERLAY", fg_color="#444", height=40, font=FONT_BOLD,
+                          command=self.toggle_metrics_overlay).pack(fill="x", pady=5)
             self.btn_manual = ctk.CTkButton(ctrl_frame, text="✎ MANUAL INPUT", fg_color=COLOR_WARNING, text_color="black", height=40, font=FONT_BOLD, command=self.manual_correction_popup)
             self.btn_manual.pack(fill="x", pady=5)
             
@@ -879,6 +880,9 @@ class DashboardFrame(ctk.CTkFrame):
             # Make the label fill the frame
             self.video_label = ctk.CTkLabel(self.video_frame, text="Loading Camera Feed...", text_color="gray", font=FONT_HEADER)
             self.video_label.pack(expand=True, fill="both")
+            self.renderer = frame_renderer.FrameRenderer(self.video_label, lpr_pipeline.SystemConfig.DISPLAY_FPS,
+                                                         name=self.camera_ip)
+            self.video_frame.bind("<Configure>", lambda e: self.renderer.set_target_size(e.width, e.height))
 
     def create_card(self, title, default, color):
         f = ctk.CTkFrame(self.sidebar, fg_color="#333", corner_radius=10)
@@ -888,226 +892,198 @@ class DashboardFrame(ctk.CTkFrame):
         l.pack(anchor="w", padx=15, pady=(0, 10))
         return l
 
-    def init_logic_variables(self):
-        self.plate_buffer = []; self.conf_buffer = []; self.color_buffer = []
-        self.dist_buffer = []; self.height_buffer = []
-        self.BUFFER_SIZE = 5; self.last_saved_time = datetime.datetime.min
-        self.COOLDOWN_SECONDS = 15; self.frame_count = 0
-        self.current_detections = []
-        self.last_known_color = "Unknown"; self.last_known_dist = 0.0; self.last_known_height = 0.0
-        self.last_saved_plate_key = None
-        self.current_clean_frame = None
-
-    def process_logic(self, frame):
-        h_img, w_img, _ = frame.shape
-        line_y = SystemConfig.get_trigger_y(h_img)
-
-        self.current_clean_frame=frame.copy()
-        overlay = frame.copy()
-        cv2.line(frame, (0, line_y), (w_img, line_y), (0, 100, 255), 2)
-        alpha = SystemConfig.LINE_OPACITY
-        cv2.addWeighted(frame, alpha, overlay, 1 - alpha, 0, frame)
-
-        if self.frame_count % 5 == 0:
-            results = self.detector.predict(frame, conf=SystemConfig.CONFIDENCE_THRESHOLD, verbose=False)
-            self.current_detections = []
-            current_ocr = None
-            current_conf = 0.0
-
-            for result in results:
-                for box in result.boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    cls_id = int(box.cls[0])
-                    
-                    if cls_id == 0: # Car
-                        w_box, h_box = x2-x1, y2-y1
-                        dist, real_h = estimate_distance_and_size(w_box, h_box)
-                        self.last_known_dist = dist
-                        self.last_known_height = real_h
-                        
-                        if w_box > 50:
-                            try:
-                                car_crop = frame[y1:y2, x1:x2]
-                                color_res = self.color_model.predict(car_crop, conf=SystemConfig.CONFIDENCE_THRESHOLD, verbose=False)
-                                self.last_known_color = color_res[0].names[color_res[0].probs.top1]
-                            except: pass
-                        
-                        self.current_detections.append([x1,y1,x2,y2, 0, f"{self.last_known_color}", dist])
-
-                    elif cls_id == 1: # Plate
-                        cy = (y1 + y2) // 2
-                        if (line_y - 100) < cy < (line_y + 100):
-                            plate_crop = frame[y1:y2, x1:x2]
-                            clean = preprocess_plate(plate_crop)
-                            ocr_res = self.reader.readtext(clean, allowlist=self.ALLOW_LIST)
-                            if ocr_res:
-                                detections = sorted(
-                                    [res for res in ocr_res if res[2] > 0.6 and len(res[1].strip()) > 1],
-                                    key=lambda res: res[0][0][0]
-                                )
-                                if detections:
-                                    texts = [res[1].upper() for res in detections]
-                                    txt = "".join(texts)
-                                    conf = max(res[2] for res in detections)
-                                    if conf > 0.4:
-                                        current_ocr = auto_correct_plate(txt)
-                                        current_conf = conf
-
-                                        is_vanity = False
-                                        raw_upper = txt.upper()
-                                        for vp in VANITY_PREFIXES:
-                                            if raw_upper.startswith(vp) or vp in raw_upper[:len(vp) + 4]:
-                                                is_vanity = True
-                                                break
-
-                                        if is_vanity:
-                                            current_ocr = txt.replace('0', 'O').replace('1', 'I')
-                                            # print(f"Vanity plate detected: {current_ocr} (raw trusted)")
-                                        else:
-                                            current_ocr = auto_correct_plate(txt)
-                                            # print(f"Normal plate corrected: {current_ocr}")
-
-                                        self.current_detections.append([x1,y1,x2,y2, 1, current_ocr, 0])
-                                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0,0,255), 3)
-
-            # SAVE LOGIC
-            if current_ocr:
-                self.plate_buffer.append(current_ocr)
-                self.conf_buffer.append(current_conf)
-                self.color_buffer.append(self.last_known_color)
-                self.dist_buffer.append(self.last_known_dist)
-                self.height_buffer.append(self.last_known_height)
-                
-                if len(self.plate_buffer) > self.BUFFER_SIZE:
-                    self.plate_buffer.pop(0); self.conf_buffer.pop(0)
-                    self.color_buffer.pop(0); self.dist_buffer.pop(0); self.height_buffer.pop(0)
-
-                if len(self.plate_buffer) == self.BUFFER_SIZE:
-                    top_plate, count = Counter(self.plate_buffer).most_common(1)[0]
-                    if count >= 3:
-                        now = datetime.datetime.now()
-                        if (now - self.last_saved_time).total_seconds() > self.COOLDOWN_SECONDS:
-                            self.save_record(now, top_plate, self.conf_buffer[0], self.color_buffer[0], self.dist_buffer[0], self.height_buffer[0], image=self.current_clean_frame)
-                            # print(self.plate_buffer)
-                            self.last_saved_time = now
-                            self.plate_buffer = []
-
-        # Draw
-        for x1, y1, x2, y2, cid, lbl, d in self.current_detections:
-            color = (255,255,0) if cid==0 else (0,255,0)
-            cv2.rectangle(frame, (x1,y1), (x2,y2), color, 2)
-            cv2.putText(frame, lbl, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-        return frame
-
     def manual_correction_popup(self):
         dialog = ctk.CTkInputDialog(text="Enter Correct Plate Number:", title="Manual Correction")
         manual_plate = dialog.get_input()
 
-        if manual_plate:
-            new_plate = manual_plate.upper().replace(" ", "")
-            now = datetime.datetime.now()
-            
-            current_color = self.last_known_color if self.last_known_color != "Unknown" else "Manual_Color"
-            current_dist = self.last_known_dist
-            current_height = self.last_known_height
+        if not manual_plate:
+            return
+        self.pending_corrections.append(manual_plate)
+        # Without a processing thread (camera not connected) nothing else touches the pipeline
+        if self.process_thread is None or not self.process_thread.is_alive():
+            self.apply_corrections()
+            while self.pending_events:
+                self.show_event(self.pending_events.popleft())
+
+    def apply_corrections(self):
+        while self.pending_corrections:
+            manual_plate = self.pending_corrections.popleft()
+            try:
+                self.pending_events.append(self.pipeline.manual_correction(manual_plate))
+            except Exception as e:
+                # print(f"Manual correction error: {e}")
+                metrics.metrics.error('manual', self.camera_ip)
 
-            self.lbl_plate.configure(text=f"{new_plate} (M)")
-            
-            if ref and self.user_id:
+    def show_event(self, event):
+        if event.kind == 'manual':
+            self.lbl_plate.configure(text=f"{event.plate} (M)")
+            return
+        self.lbl_plate.configure(text=event.plate)
+        self.lbl_color.configure(text=event.color)
+        self.lbl_dist.configure(text=f"{event.dist:.1f}m / {event.height:.1f}m")
+
+    def process_loop(self):
+        # Only the freshest frame is used, stale ones were already dropped by the grabber
+        while self.is_running:
+            self.apply_corrections()
+            latest = self.grabber.read_latest()
+            if latest is None:
+                time.sleep(0.005)
+                continue
+            frame, captured_at = latest
+            # Until the shared models are ready the raw feed is shown
+            if self.pipeline.models is not None:
                 try:
-                    if self.last_saved_plate_key:
-                        ref.child('detection_logs').child(self.user_id).child(self.last_saved_plate_key).delete()
-                        
-                        data = {
-                            'timestamp': now.strftime("%Y-%m-%d %H:%M:%S"),
-                            'camera_source': self.camera_ip,
-                            'plate_number': new_plate,
-                            'confidence': 1.0,
-                            'color': self.last_known_color,
-                            'distance_m': f"{self.last_known_dist:.2f}",
-                            'height_m': f"{self.last_known_height:.2f}",
-                            'note': "Manually Corrected"
-                        }
-                        ref.child('detection_logs').child(self.user_id).child(new_plate).set(data)
-                        self.last_saved_plate_key = new_plate
-                        # print(f"✅ Manual Update: {new_plate}")
+                    frame, events = self.pipeline.process_frame(frame, captured_at)
                 except Exception as e:
-                    pass # print(f"Update failed: {e}")
-
-            with open(self.csv_filename, 'a', newline='') as f:
-                csv.writer(f).writerow([
-                    now.strftime("%Y-%m-%d %H:%M:%S"), 
-                    new_plate, 
-                    "MANUAL_CORRECTION", 
-                    current_color, 
-                    f"{current_dist:.2f}", 
-                    f"{current_height:.2f}", 
-                    "Previous_Record_Overridden"
-                ])
-
-    def save_record(self, time_obj, plate, conf, color, dist, height, note="", image=None):
-        self.lbl_plate.configure(text=plate)
-        self.lbl_color.configure(text=color)
-        self.lbl_dist.configure(text=f"{dist:.1f}m / {height:.1f}m")
-
-        with open(self.csv_filename, 'a', newline='') as f:
-            csv.writer(f).writerow([time_obj, plate, f"{conf:.2f}", color, f"{dist:.2f}", f"{height:.2f}", note])   
-
-        if image is not None:
-            try:
-                timestamp_str = time_obj.strftime("%Y%m%d_%H%M%S")
-                img_name = f"{plate}_{timestamp_str}.jpg"
-                save_path = os.path.join(self.img_folder, img_name)
-                cv2.imwrite(save_path, image)
-                # print(f"📸 Image Saved: {save_path}")
-            except Exception as e:
-                pass # print(f"⚠️ Image Save Failed: {e}")
-
-        if ref and self.user_id:
-            data = {
-                'timestamp': time_obj.strftime("%Y-%m-%d %H:%M:%S"),
-                'camera_source': self.camera_ip,
-                'plate_number': plate,
-                'confidence': float(f"{conf:.2f}"),
-                'color': color,
-                'distance_m': float(f"{dist:.2f}"),
-                'height_m': float(f"{height:.2f}")
-            }
-            try:
-                ref.child('detection_logs').child(self.user_id).child(plate).set(data)
-                self.last_saved_plate_key = plate
-                # print(f"Uploaded: {plate} for User {self.camera_ip}")
-            except Exception as e:
-                pass # print(f"Cloud Error: {e}")
+                    # print(f"Processing error: {e}")
+                    metrics.metrics.error('process', self.camera_ip)
+                    continue
+                self.pending_events.extend(events)
+                self.grabber.mark_processed()
+            self.display.put(frame, captured_at)
 
     def update_camera(self):
         if not self.is_running: return
-        if self.cap is None or not self.cap.isOpened():
+        if self.grabber is None:
             return
 
-        ret, frame = self.cap.read()
-        if ret:
-            self.frame_count += 1
-            frame = cv2.resize(frame, (640, 640))
-            frame = self.process_logic(frame)
-            img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            w = self.video_frame.winfo_width()
-            h = self.video_frame.winfo_height()
-            
-            # Keep aspect ratio? For now fill
-            if w > 10 and h > 10: 
-                img = img.resize((w, h), Image.Resampling.LANCZOS)
-                
-            imgtk = ctk.CTkImage(img, size=(w, h))
-            self.video_label.configure(image=imgtk, text="")
-            self.video_label.image = imgtk
-        self.after(10, self.update_camera)
+        while self.pending_events:
+            self.show_event(self.pending_events.popleft())
+
+        self.renderer.max_fps = lpr_pipeline.SystemConfig.DISPLAY_FPS
+        seq, frame, captured_at = self.display.get()
+        if self.renderer.render(frame, seq):
+            self.grabber.mark_displayed(captured_at)
+
+        self.update_stats_label()
+        self.after(5, self.update_camera)
+
+    def toggle_metrics_overlay(self):
+        lpr_pipeline.SystemConfig.SHOW_METRICS_OVERLAY = not lpr_pipeline.SystemConfig.SHOW_METRICS_OVERLAY
+        self.last_stats_update = 0.0
+
+    def update_stats_label(self):
+        now = time.perf_counter()
+        if now - self.last_stats_update < 1.0:
+            return
+        self.last_stats_update = now
+        if lpr_pipeline.SystemConfig.SHOW_METRICS_OVERLAY:
+            self.renderer.overlay = metrics.metrics.format_lines(self.camera_ip)
+        else:
+            self.renderer.overlay = None
+        st = self.grabber.get_stats()
+        text = (
+            f"Captured: {st['captured']}  Decoded: {st['decoded']}  Dropped: {st['dropped']}\n"
+            f"Processed: {st['processed']}  Cam FPS: {st['capture_fps']:.1f}\n"
+            f"Latency: {st['avg_latency_ms']:.0f} ms"
+        )
+        rs = self.renderer.get_stats()
+        text += f"\nDisplayed: {rs['rendered']}  Render: {rs['render_ms']:.1f} ms"
+        gs = self.pipeline.motion_gate.get_stats()
+        text += f"\nAnalysed: {gs['analysed']}  Gated: {gs['gated']}  Motion: {gs['motion']:.1f}%"
+        ds = self.pipeline.dedup.get_stats()
+        text += f"\nIn cooldown: {ds['tracked']}  Duplicates: {ds['suppressed']}"
+        sc = self.pipeline.scheduler.get_stats()
+        text += (f"\nAnalysis: {sc['rate_hz']:.1f}/s ({sc['state']})  Cost: {sc['cost_ms']:.0f} ms\n"
+                 f"CPU: {sc['cpu_share']:.0%} of {sc['cpu_budget']:.0%}  "
+                 f"{'Within budget' if sc['within_budget'] else 'Over budget'} ({sc['compliance']:.0%})")
+        if self.models_error is not None:
+            text += f"\nModel Load Failed: {self.models_error}"
+        elif self.pipeline.models is None:
+            text += "\nLoading AI models..."
+        if self.pipeline.writer is not None:
+            ws = self.pipeline.writer.get_stats()
+            failures = ws['store_failures'] + ws['image_failures'] + ws['cloud_failures']
+            text += f"\nSave queue: {ws['queue_depth']}  Write: {ws['avg_latency_ms']:.0f} ms"
+            if failures or ws['dropped']:
+                text += f"\nSave errors: {failures}  Dropped: {ws['dropped']}"
+            if ws['cloud_pending']:
+                state = "offline" if ws['cloud_offline'] else "uploading"
+                text += f"\nCloud {state}: {ws['cloud_pending']} pending"
+        self.lbl_stats.configure(text=text)
+
+    def stop_and_exit(self):
+        self.is_running = False
+        if self.grabber is not None:
+            self.grabber.stop()
+        # Let queued saves finish without holding up the UI
+        threading.Thread(target=self.pipeline.close, daemon=True).start()
+
+# ==========================================
+# PAGE: MULTI-CAMERA DASHBOARD
+# ==========================================
+class MultiDashboardFrame(ctk.CTkFrame):
+    """Shows every camera of the user at once, served by one MultiCameraHost (one shared model set)."""
+    def __init__(self, master, sources, user_id, on_close):
+        super().__init__(master)
+        self.pack(fill="both", expand=True)
+        self.is_running = True
+        self.host = multi_camera.MultiCameraHost(sources, user_id=user_id, cloud_ref=ref)
+
+        # Top Bar
+        top = ctk.CTkFrame(self, height=60, fg_color="#222", corner_radius=0)
+        top.pack(fill="x")
+        ctk.CTkLabel(top, text="LIVE MONITORING - ALL CAMERAS", font=FONT_SUBHEADER).pack(side="left", padx=20, pady=15)
+        ctk.CTkButton(top, text="⏹ STOP / BACK", fg_color=COLOR_DANGER, height=35, font=FONT_BOLD, command=on_close).pack(side="right", padx=20)
+        self.lbl_stats = ctk.CTkLabel(top, text="Loading AI Models...", text_color="gray")
+        self.lbl_stats.pack(side="right", padx=20)
+
+        # Camera Grid
+        grid = ctk.CTkFrame(self, fg_color="black", corner_radius=0)
+        grid.pack(fill="both", expand=True)
+        cols = math.ceil(math.sqrt(len(sources)))
+        rows = math.ceil(len(sources) / cols)
+        for c in range(cols): grid.grid_columnconfigure(c, weight=1, uniform="cam")
+        for r in range(rows): grid.grid_rowconfigure(r, weight=1, uniform="cam")
+
+        self.tiles = []
+        for idx, src in enumerate(sources):
+            tile = ctk.CTkFrame(grid, fg_color="black", corner_radius=0)
+            tile.grid(row=idx // cols, column=idx % cols, sticky="nsew", padx=2, pady=2)
+            caption = ctk.CTkLabel(tile, text=f"📹  {src}", font=FONT_BOLD, anchor="w")
+            caption.pack(fill="x", padx=10)
+            video = ctk.CTkLabel(tile, text="Connecting...", text_color="gray")
+            video.pack(expand=True, fill="both")
+            renderer = frame_renderer.FrameRenderer(video, lpr_pipeline.SystemConfig.DISPLAY_FPS, name=src)
+            tile.bind("<Configure>", lambda e, r=renderer: r.set_target_size(e.width, e.height - 30))
+            self.tiles.append((tile, caption, video, renderer))
+
+        threading.Thread(target=self.start_host, daemon=True).start()
+        self.after(100, self.update_tiles)
+
+    def start_host(self):
+        try:
+            self.host.start()
+        except Exception as e:
+            self.after(0, lambda: self.lbl_stats.configure(text=f"Model Load Failed: {e}", text_color=COLOR_DANGER))
+            return
+        if not self.is_running:
+            self.host.stop()
+
+    def update_tiles(self):
+        if not self.is_running: return
+
+        for slot, (tile, caption, video, renderer) in zip(self.host.slots, self.tiles):
+            if slot.error:
+                video.configure(text=f"Connection Failed:\n{slot.error}", text_color=COLOR_DANGER)
+                continue
+            if slot.last_event:
+                ev = slot.last_event
+                caption.configure(text=f"📹  {slot.source}   |   {ev.plate}  {ev.color}", text_color=COLOR_WARNING)
+
+            renderer.max_fps = lpr_pipeline.SystemConfig.DISPLAY_FPS
+            renderer.render(slot.display_frame, slot.display_seq)
+
+        if self.host.started_at:
+            st = self.host.get_stats()
+            self.lbl_stats.configure(text=f"{st['active']}/{st['cameras']} cameras   "
+                                          f"{st['aggregate_fps']:.1f} FPS   batch {st['avg_batch_size']:.1f}")
+        self.after(10, self.update_tiles)
 
     def stop_and_exit(self):
         self.is_running = False
-        if self.cap is not None and self.cap.isOpened():
-            self.cap.release()
+        self.host.stop()
 
 # ==========================================
 # APP CONTROLLER
@@ -1126,6 +1102,28 @@ class App(ctk.CTk):
         self.last_user_data = None
         self.show_login()
 
+        # Heavy work starts only after the login window is on screen
+        self.after(50, self.start_background_init)
+
+    def start_background_init(self):
+        preload(cv2, camera_stream, lpr_pipeline, multi_camera, frame_renderer)
+        if cloud is not None:
+            cloud.connect_async()
+            self.after(100, self.poll_db_connection)
+
+    def poll_db_connection(self):
+        if not cloud.connected.is_set():
+            self.after(100, self.poll_db_connection)
+            return
+        self.on_db_connected(cloud.db_manager, cloud.connection_error)
+
+    def on_db_connected(self, manager, error):
+        global db_manager, ref
+        db_manager = manager
+        ref = manager.ref if manager is not None else None
+        if error is not None and hasattr(self.current_frame, 'lbl_status'):
+            self.current_frame.lbl_status.configure(text="Database unavailable, check your connection", text_color=COLOR_DANGER)
+
     def show_register(self):
         self.clear_frame()
         self.current_frame = RegisterFrame(self.container, self.show_login)
@@ -1134,6 +1132,8 @@ class App(ctk.CTk):
         if role == "ADMIN":
             self.start_admin()
         else:
+            # Load + warm up the models while the user picks a camera
+            threading.Thread(target=model_registry.preload_models, daemon=True).start()
             self.show_camera_selection(user_data)
 
     def show_login(self):
@@ -1143,13 +1143,20 @@ class App(ctk.CTk):
     def show_camera_selection(self, user_data):
         self.last_user_data = user_data
         self.clear_frame()
-        self.current_frame = CameraSelectionFrame(self.container, user_data, self.start_dashboard, self.show_login)
+        self.current_frame = CameraSelectionFrame(self.container, user_data, self.start_dashboard, self.show_login,
+                                                  on_launch_all=self.start_multi_dashboard)
 
     def start_dashboard(self, ip):
         self.clear_frame()
         uid = self.last_user_data[0]
         self.current_frame = DashboardFrame(self.container, ip, uid, lambda: self.show_camera_selection(self.last_user_data))
 
+    def start_multi_dashboard(self, sources):
+        if not sources: return
+        self.clear_frame()
+        uid = self.last_user_data[0]
+        self.current_frame = MultiDashboardFrame(self.container, sources, uid, lambda: self.show_camera_selection(self.last_user_data))
+
     def start_admin(self):
         self.clear_frame()
         self.current_frame = AdminDashboard(self.container, self.show_login)
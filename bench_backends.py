@@ -0,0 +1,177 @@
+import sys
+import json
+import time
+import argparse
+import cv2
+import numpy as np
+from lpr_pipeline import LPRPipeline, ModelSet, preprocess_plate
+from tracker import box_iou
+from bench_ocr import edit_distance, percentile
+
+# ==========================================
+# HELPER FUNCTIONS
+# ==========================================
+def read_clip(path, max_frames, stride):
+    """Frames of the reference clip, resized like the live pipeline does."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    idx = 0
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if idx % stride == 0:
+            frames.append(cv2.resize(frame, LPRPipeline.FRAME_SIZE))
+        idx += 1
+    cap.release()
+    return frames
+
+def boxes_by_class(result):
+    cars, plates = [], []
+    for box in result.boxes:
+        xyxy = tuple(int(v) for v in box.xyxy[0])
+        cls_id = int(box.cls[0])
+        if cls_id == 0: cars.append(xyxy)
+        elif cls_id == 1: plates.append(xyxy)
+    return cars, plates
+
+def match_count(ref_boxes, boxes, iou_threshold=0.5):
+    """Greedy one-to-one matches between reference and candidate boxes."""
+    used = set()
+    matched = 0
+    for rb in ref_boxes:
+        best, best_iou = None, iou_threshold
+        for j, b in enumerate(boxes):
+            if j in used: continue
+            iou = box_iou(rb, b)
+            if iou >= best_iou:
+                best, best_iou = j, iou
+        if best is not None:
+            used.add(best)
+            matched += 1
+    return matched
+
+def latency_summary(values):
+    return {
+        'mean_ms': float(np.mean(values)) if values else 0.0,
+        'p50_ms': percentile(values, 50),
+        'p95_ms': percentile(values, 95),
+        'count': len(values),
+    }
+
+# ==========================================
+# BENCHMARK
+# ==========================================
+def run_backend(models, frames, car_crops, plate_crops, normalizer):
+    detections = []
+    det_ms = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        res = models.detect(frame)
+        det_ms.append((time.perf_counter() - t0) * 1000.0)
+        detections.append(boxes_by_class(res[0]))
+
+    colors = []
+    color_ms = []
+    for crop in car_crops:
+        t0 = time.perf_counter()
+        res = models.color_model.predict(crop, verbose=False)
+        color_ms.append((time.perf_counter() - t0) * 1000.0)
+        colors.append(res[0].names[res[0].probs.top1])
+
+    plates = []
+    ocr_ms = []
+    for crop in plate_crops:
+        t0 = time.perf_counter()
+        raw = models.plate_reader.read_batch([crop])[0]
+        ocr_ms.append((time.perf_counter() - t0) * 1000.0)
+        reading = normalizer.normalize_reading(raw) if raw else None
+        plates.append(reading[0] if reading else "")
+
+    return {
+        'detections': detections, 'colors': colors, 'plates': plates,
+        'latency': {'detector': latency_summary(det_ms), 'color': latency_summary(color_ms),
+                    'ocr': latency_summary(ocr_ms)},
+    }
+
+def compare(reference, candidate):
+    """Agreement of a backend with the reference backend (1.0 = identical outputs)."""
+    ref_total = cand_total = matched = 0
+    for (rc, rp), (cc, cp) in zip(reference['detections'], candidate['detections']):
+        ref_boxes, cand_boxes = rc + rp, cc + cp
+        ref_total += len(ref_boxes)
+        cand_total += len(cand_boxes)
+        matched += match_count(rc, cc) + match_count(rp, cp)
+
+    color_agree = sum(a == b for a, b in zip(reference['colors'], candidate['colors']))
+    plate_exact = sum(a == b for a, b in zip(reference['plates'], candidate['plates']))
+    char_errors = sum(edit_distance(b, a) for a, b in zip(reference['plates'], candidate['plates']))
+    char_total = sum(len(a) for a in reference['plates'])
+    return {
+        'det_recall': matched / ref_total if ref_total else 1.0,
+        'det_precision': matched / cand_total if cand_total else 1.0,
+        'color_agreement': color_agree / len(reference['colors']) if reference['colors'] else 1.0,
+        'ocr_exact_agreement': plate_exact / len(reference['plates']) if reference['plates'] else 1.0,
+        'ocr_char_agreement': 1.0 - char_errors / char_total if char_total else 1.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare inference backends on a reference clip")
+    parser.add_argument("--clip", required=True, help="Reference video")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"],
+                        help="Backends to run, the first one is the accuracy reference")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--stride", type=int, default=1, help="Use every Nth frame of the clip")
+    parser.add_argument("--max-crops", type=int, default=200, help="Car/plate crops for the color and OCR stages")
+    parser.add_argument("--cpu", action="store_true", help="Force the CPU for the torch backend too")
+    parser.add_argument("--json", default=None, help="Write the full report to this file")
+    args = parser.parse_args(argv)
+
+    frames = read_clip(args.clip, args.frames, args.stride)
+    if not frames:
+        print(f"No frames read from {args.clip}")
+        return 1
+
+    normalizer = LPRPipeline(save_records=False)
+    report = {'clip': args.clip, 'frames': len(frames), 'backends': {}}
+    reference = None
+    car_crops, plate_crops = [], []
+
+    for backend in args.backends:
+        try:
+            models = ModelSet(gpu=not args.cpu, backend=backend).load().warmup()
+        except Exception as e:
+            print(f"{backend:<6} unavailable: {e}")
+            report['backends'][backend] = {'error': str(e)}
+            continue
+
+        # The reference backend decides which crops every backend classifies / reads
+        if reference is None:
+            for frame in frames:
+                cars, plates = boxes_by_class(models.detect(frame)[0])
+                car_crops += [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in cars if x2 - x1 > 50]
+                plate_crops += [preprocess_plate(frame[y1:y2, x1:x2]) for x1, y1, x2, y2 in plates
+                                if x2 > x1 and y2 > y1]
+            car_crops = car_crops[:args.max_crops]
+            plate_crops = plate_crops[:args.max_crops]
+
+        res = run_backend(models, frames, car_crops, plate_crops, normalizer)
+        if reference is None:
+            reference = res
+        accuracy = compare(reference, res)
+        lat = res['latency']
+        report['backends'][backend] = {'resolved': f"{models.backend}/{models.device}", 'latency': lat,
+                                       'accuracy_vs_reference': accuracy, 'timings': models.timings}
+        print(f"{backend:<6} [{models.backend}/{models.device}]  "
+              f"det {lat['detector']['mean_ms']:.1f}ms (p95 {lat['detector']['p95_ms']:.1f})  "
+              f"color {lat['color']['mean_ms']:.1f}ms  ocr {lat['ocr']['mean_ms']:.1f}ms  |  "
+              f"det recall {accuracy['det_recall']:.3f}  color {accuracy['color_agreement']:.3f}  "
+              f"ocr exact {accuracy['ocr_exact_agreement']:.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from plate_normalizer import PlateNormalizer, MALAYSIA_PLATE_REGEX, VANITY_PREFIXES
+from synthetic_plates import random_plate
+from bench_ocr import edit_distance
+
+# ==========================================
+# SYNTHETIC DAMAGE
+# ==========================================
+# Typical EasyOCR swaps used to damage the synthetic plates. These are the
+# same pairs the normalizer's CONFUSIONS table knows, so the accuracy here
+# is an upper bound; the fixed cases live in test_plate_normalizer.py
+SWAPS = {
+    '0': "OQD", 'O': "0", 'Q': "0O", 'D': "0", '1': "IL", 'I': "1", 'L': "1", '2': "Z", 'Z': "2",
+    '5': "S", 'S': "5", '8': "B", 'B': "8", '6': "G", 'G': "6", '4': "A", 'A': "4", '7': "T", 'T': "7",
+}
+
+def damage(plate, rng, rate):
+    return "".join(rng.choice(SWAPS[ch]) if ch in SWAPS and rng.random() < rate else ch for ch in plate)
+
+# ==========================================
+# PREVIOUS CORRECTION (BASELINE)
+# ==========================================
+def legacy_normalize(txt):
+    """The vanity scan and auto_correct_plate this module replaced, kept to compare against."""
+    raw_upper = txt.upper()
+    for vp in VANITY_PREFIXES:
+        if raw_upper.startswith(vp) or vp in raw_upper[:len(vp) + 4]:
+            return txt.replace('0', 'O').replace('1', 'I')
+
+    prefix_corrections = {'O': 'Q', 'C': 'C', 'D': 'D', 'G': 'G', 'N': 'W'}
+    suffix_corrections = {'B': '8', 'O': '0', 'D': '0', 'I': '1', 'S': '5', 'Z': '7', 'Q': '0', 'G': '6', 'J': '3'}
+    text = txt.upper().replace(" ", "").replace("-", "")
+    if len(text) < 2 or MALAYSIA_PLATE_REGEX.match(text):
+        return text
+    match = re.search(r'\d+', text)
+    if not match:
+        return text
+    prefix = ''.join(prefix_corrections.get(c, c) for c in text[:match.start()] if c.isalpha())[:3]
+    rest = text[match.start():]
+    digits = ''.join(suffix_corrections.get(c, c) for c in rest if c.isalnum())
+    number = ''.join(c for c in digits if c.isdigit())[:4]
+    suffix_letters = ''.join(c for c in rest if c.isalpha())
+    candidate = prefix + number + (suffix_letters[-1] if suffix_letters else '')
+    return candidate if MALAYSIA_PLATE_REGEX.match(candidate) else text
+
+# ==========================================
+# BENCHMARK
+# ==========================================
+def accuracy(fn, samples):
+    exact = char_errors = char_total = 0
+    for raw, label in samples:
+        pred = fn(raw)
+        exact += pred == label
+        char_errors += edit_distance(pred, label)
+        char_total += len(label)
+    return {
+        'exact_accuracy': exact / len(samples) if samples else 0.0,
+        'char_accuracy': max(0.0, 1.0 - char_errors / char_total) if char_total else 0.0,
+    }
+
+def time_per_call_us(fn, texts, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - t0) * 1e6 / (repeat * len(texts)) if texts else 0.0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accuracy and micro-benchmark of the plate normalizer")
+    parser.add_argument("--plates", type=int, default=5000, help="Synthetic plates to damage and correct")
+    parser.add_argument("--rate", type=float, default=0.15, help="Chance that a character is swapped")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeat", type=int, default=5, help="Timing passes over the samples")
+    parser.add_argument("--json", default=None, help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    normalizer = PlateNormalizer()
+    rng = random.Random(args.seed)
+    samples = []
+    for _ in range(args.plates):
+        plate = random_plate(rng)
+        samples.append((damage(plate, rng, args.rate), plate))
+    texts = [raw for raw, _ in samples]
+
+    report = {
+        'plates': len(samples),
+        'rate': args.rate,
+        'seed': args.seed,
+        'legacy': accuracy(legacy_normalize, samples),
+        'compiled': accuracy(normalizer.correct, samples),
+        'legacy_us': time_per_call_us(legacy_normalize, texts, args.repeat),
+        'compiled_us': time_per_call_us(normalizer.correct, texts, args.repeat),
+    }
+    normalizer.normalize.cache_clear()
+    report['cached_us'] = time_per_call_us(normalizer.normalize, texts[:256], args.repeat * 20)
+
+    print(f"plates={report['plates']}  swap rate={args.rate:.2f}")
+    for name in ('legacy', 'compiled'):
+        acc = report[name]
+        print(f"{name:<10} exact={acc['exact_accuracy']:.3f}  char={acc['char_accuracy']:.3f}  "
+              f"{report[name + '_us']:.1f} us/call")
+    print(f"{'cached':<10} {report['cached_us']:.2f} us/call (LRU hit)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import cv2
+import numpy as np
+from lpr_pipeline import LPRPipeline, preprocess_plate
+from plate_ocr import PlateRecognizer
+
+# ==========================================
+# HELPER FUNCTIONS
+# ==========================================
+def edit_distance(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+def load_crops(folder):
+    """
+    Loads plate crops with their ground truth. Labels come from labels.csv
+    (filename,plate) if present, otherwise from the file name: WQA1234.jpg or WQA1234_02.jpg.
+    """
+    labels = {}
+    label_file = os.path.join(folder, "labels.csv")
+    if os.path.isfile(label_file):
+        with open(label_file, newline='') as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0] != "filename":
+                    labels[row[0]] = row[1].strip().upper()
+
+    samples = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith((".jpg", ".jpeg", ".png", ".bmp")):
+            continue
+        img = cv2.imread(os.path.join(folder, name))
+        if img is None:
+            continue
+        label = labels.get(name, os.path.splitext(name)[0].split("_")[0].upper())
+        samples.append((name, img, label))
+    return samples
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+# ==========================================
+# BENCHMARK
+# ==========================================
+def run_mode(recognizer, normalizer, samples, batch):
+    clean = [preprocess_plate(img) for _, img, _ in samples]
+
+    # Warm up so model init is not counted
+    recognizer.read_batch(clean[:1])
+
+    per_plate_ms = []
+    predictions = []
+    step = batch if recognizer.mode == 'recognize' else 1
+    for i in range(0, len(clean), step):
+        chunk = clean[i:i + step]
+        t0 = time.perf_counter()
+        readings = recognizer.read_batch(chunk)
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        per_plate_ms.extend([elapsed_ms / len(chunk)] * len(chunk))
+        for raw in readings:
+            reading = normalizer.normalize_reading(raw) if raw else None
+            predictions.append(reading[0] if reading else "")
+
+    exact = 0
+    char_errors = 0
+    char_total = 0
+    rows = []
+    for (name, _, label), pred in zip(samples, predictions):
+        exact += pred == label
+        char_errors += edit_distance(pred, label)
+        char_total += len(label)
+        rows.append({'file': name, 'label': label, 'prediction': pred})
+
+    return {
+        'mode': recognizer.mode,
+        'plates': len(samples),
+        'exact_accuracy': exact / len(samples) if samples else 0.0,
+        'char_accuracy': 1.0 - char_errors / char_total if char_total else 0.0,
+        'latency_ms_mean': float(np.mean(per_plate_ms)) if per_plate_ms else 0.0,
+        'latency_ms_p50': percentile(per_plate_ms, 50),
+        'latency_ms_p95': percentile(per_plate_ms, 95),
+        'predictions': rows,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare readtext vs batched recognize OCR on plate crops")
+    parser.add_argument("--crops", required=True, help="Folder of plate crops (labels from file names or labels.csv)")
+    parser.add_argument("--batch", type=int, default=16, help="Crops per recognize() call")
+    parser.add_argument("--cpu", action="store_true")
+    parser.add_argument("--no-split", action="store_true", help="Do not split two-line plates")
+    parser.add_argument("--json", default=None, help="Write the full report to this file")
+    args = parser.parse_args(argv)
+
+    samples = load_crops(args.crops)
+    if not samples:
+        print(f"No plate images found in {args.crops}")
+        return 1
+
+    import easyocr
+    reader = easyocr.Reader(['en'], gpu=not args.cpu, verbose=False)
+    normalizer = LPRPipeline(save_records=False)
+
+    report = []
+    for mode in PlateRecognizer.MODES:
+        recognizer = PlateRecognizer(reader, mode=mode, batch_size=args.batch, split_lines=not args.no_split)
+        res = run_mode(recognizer, normalizer, samples, args.batch)
+        report.append(res)
+        print(f"{mode:<10} plates={res['plates']}  exact={res['exact_accuracy']:.3f}  char={res['char_accuracy']:.3f}  "
+              f"latency/plate mean={res['latency_ms_mean']:.1f}ms p50={res['latency_ms_p50']:.1f}ms p95={res['latency_ms_p95']:.1f}ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Child snippets, each prints one JSON line of timings in milliseconds
+IMPORT_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps({{'import_ms': (time.perf_counter() - t0) * 1000.0}}))
+"""
+
+WINDOW_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import LRP_system
+t1 = time.perf_counter()
+app = LRP_system.App()
+app.update()
+t2 = time.perf_counter()
+app.destroy()
+print(json.dumps({'import_ms': (t1 - t0) * 1000.0, 'window_ms': (t2 - t1) * 1000.0, 'total_ms': (t2 - t0) * 1000.0}))
+"""
+
+# ==========================================
+# HELPER FUNCTIONS
+# ==========================================
+def run_child(code, pycache_dir=None):
+    """Runs code in a fresh interpreter. Returns (timings dict, process wall ms)."""
+    env = dict(os.environ)
+    if pycache_dir:
+        env["PYTHONPYCACHEPREFIX"] = pycache_dir
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=HERE, env=env, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), wall_ms
+
+def measure(code, runs):
+    """
+    cold: first run with an empty bytecode cache (everything is compiled).
+    warm: median of the following runs, which reuse that cache.
+    """
+    cache = tempfile.mkdtemp(prefix="lpr_pycache_")
+    try:
+        cold, cold_wall = run_child(code, cache)
+        warm = [run_child(code, cache) for _ in range(runs)]
+    finally:
+        shutil.rmtree(cache, ignore_errors=True)
+
+    result = {'cold': dict(cold, process_ms=cold_wall)}
+    if warm:
+        result['warm'] = {key: float(np.median([w[0][key] for w in warm])) for key in cold}
+        result['warm']['process_ms'] = float(np.median([w[1] for w in warm]))
+    return result
+
+def top_imports(module, count):
+    """Slowest imports (cumulative) from python -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=HERE, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return []
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        # Only top level entries (one space of indent), nested ones are included in their parent
+        if len(name) - len(name.lstrip()) != 1:
+            continue
+        rows.append({'module': name.strip(), 'cumulative_ms': int(cumulative_us) / 1000.0,
+                     'self_ms': int(self_us) / 1000.0})
+    rows.sort(key=lambda r: -r['cumulative_ms'])
+    return rows[:count]
+
+# ==========================================
+# BENCHMARK
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import and time-to-login-window, cold and warm")
+    parser.add_argument("--modules", nargs="+", default=["LRP_system", "final_system_segmentation", "lpr_pipeline"])
+    parser.add_argument("--runs", type=int, default=5, help="Warm runs per measurement (median is reported)")
+    parser.add_argument("--window", action="store_true", help="Also time App() until the login screen is drawn (needs a display)")
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest imports of LRP_system")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Target for the login screen")
+    parser.add_argument("--json", default=None, help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = {'python': sys.version.split()[0], 'imports': {}, 'budget_ms': args.budget_ms}
+
+    for module in args.modules:
+        try:
+            res = measure(IMPORT_SNIPPET.format(module=module), args.runs)
+        except RuntimeError as e:
+            print(f"{module:<28} failed: {e}")
+            report['imports'][module] = {'error': str(e)}
+            continue
+        report['imports'][module] = res
+        warm = res.get('warm', {})
+        print(f"{module:<28} cold={res['cold']['import_ms']:7.1f}ms  warm={warm.get('import_ms', 0):7.1f}ms  "
+              f"(process warm {warm.get('process_ms', 0):.0f}ms)")
+
+    if args.window:
+        try:
+            res = measure(WINDOW_SNIPPET, args.runs)
+            report['window'] = res
+            warm = res.get('warm', res['cold'])
+            verdict = "OK" if warm['process_ms'] <= args.budget_ms else "OVER BUDGET"
+            print(f"{'login window':<28} cold={res['cold']['total_ms']:7.1f}ms  warm={warm['total_ms']:7.1f}ms  "
+                  f"(process warm {warm['process_ms']:.0f}ms, {verdict})")
+        except RuntimeError as e:
+            print(f"{'login window':<28} failed: {e}")
+            report['window'] = {'error': str(e)}
+
+    if args.top:
+        report['top_imports'] = top_imports("LRP_system", args.top)
+        if report['top_imports']:
+            print("\nSlowest imports of LRP_system (cumulative):")
+            for r in report['top_imports']:
+                print(f"  {r['cumulative_ms']:8.1f}ms  {r['module']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
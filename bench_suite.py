@@ -0,0 +1,265 @@
+import os
+import sys
+import csv
+import json
+import time
+import platform
+import argparse
+import subprocess
+import datetime
+import cv2
+import numpy as np
+from lpr_pipeline import LPRPipeline, ModelSet, SystemConfig, preprocess_plate
+from metrics import metrics
+from bench_ocr import edit_distance, percentile
+from synthetic_plates import make_synthetic
+
+VIDEO_EXTS = (".mp4", ".avi", ".mkv", ".mov")
+
+# ==========================================
+# GROUND TRUTH
+# ==========================================
+def load_clips(folder):
+    """
+    Gate clips with the plates that should be saved. Labels come from
+    labels.csv (filename,PLATE1 PLATE2 ...) or a sidecar clip.txt with one
+    plate per line; a clip without labels expects no saves.
+    """
+    labels = {}
+    label_file = os.path.join(folder, "labels.csv")
+    if os.path.isfile(label_file):
+        with open(label_file, newline='') as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0] != "filename":
+                    labels[row[0]] = row[1].upper().split()
+
+    clips = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(VIDEO_EXTS):
+            continue
+        plates = labels.get(name)
+        sidecar = os.path.join(folder, os.path.splitext(name)[0] + ".txt")
+        if plates is None and os.path.isfile(sidecar):
+            with open(sidecar) as f:
+                plates = [line.strip().upper() for line in f if line.strip()]
+        clips.append((name, os.path.join(folder, name), plates or []))
+    return clips
+
+def match_plates(expected, saved):
+    """Matches saved plates to the expected ones (each expected plate once)."""
+    remaining = list(expected)
+    correct = 0
+    false_saves = []
+    for plate in saved:
+        if plate in remaining:
+            remaining.remove(plate)
+            correct += 1
+        else:
+            false_saves.append(plate)
+    return correct, false_saves, remaining
+
+# ==========================================
+# BENCHMARKS
+# ==========================================
+def run_clip(models, name, path, expected, max_frames=0):
+    """Replays one clip frame by frame on media time and scores the saved plates."""
+    pipeline = LPRPipeline(camera_source=name, save_records=False, models=models)
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    metrics.reset()
+
+    frames = 0
+    saved = []
+    t0 = time.perf_counter()
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        _, events = pipeline.process_frame(frame, frames / fps)
+        saved.extend(event.plate for event in events)
+        frames += 1
+        if max_frames and frames >= max_frames:
+            break
+    elapsed = time.perf_counter() - t0
+    cap.release()
+
+    correct, false_saves, missed = match_plates(expected, saved)
+    st = pipeline.get_stats()
+    return {
+        'clip': name,
+        'frames': frames,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+        'expected': expected,
+        'saved': saved,
+        'correct': correct,
+        'false_saves': false_saves,
+        'missed': missed,
+        'analyses': st['scheduler']['analyses'],
+        'gated': st['gated'],
+        'ocr_calls': st['ocr_calls'],
+        'color_calls': st['color_calls'],
+        'ocr_calls_per_vehicle': st['ocr_calls'] / len(expected) if expected else float(st['ocr_calls']),
+        'stages': metrics.snapshot(name)['stages'],
+    }
+
+def summarize_clips(results):
+    frames = sum(r['frames'] for r in results)
+    seconds = sum(r['seconds'] for r in results)
+    expected = sum(len(r['expected']) for r in results)
+    correct = sum(r['correct'] for r in results)
+    saved = sum(len(r['saved']) for r in results)
+    false_saves = sum(len(r['false_saves']) for r in results)
+    ocr_calls = sum(r['ocr_calls'] for r in results)
+    return {
+        'clips': len(results),
+        'frames': frames,
+        'fps': frames / seconds if seconds > 0 else 0.0,
+        'vehicles': expected,
+        'plate_recall': correct / expected if expected else 1.0,
+        'plate_precision': correct / saved if saved else 1.0,
+        'false_saves': false_saves,
+        'ocr_calls_per_vehicle': ocr_calls / expected if expected else 0.0,
+    }
+
+def run_synthetic(models, samples):
+    """Preprocess -> OCR -> plate correction on generated crops, timing each step."""
+    normalizer = LPRPipeline(save_records=False)
+    models.plate_reader.read_batch([preprocess_plate(samples[0][1])])  # warm up
+
+    pre_ms, ocr_ms, norm_ms = [], [], []
+    exact = char_errors = char_total = 0
+    rows = []
+    for name, img, label in samples:
+        t0 = time.perf_counter()
+        clean = preprocess_plate(img)
+        t1 = time.perf_counter()
+        raw = models.plate_reader.read_batch([clean])[0]
+        t2 = time.perf_counter()
+        reading = normalizer.normalize_reading(raw) if raw else None
+        t3 = time.perf_counter()
+        pred = reading[0] if reading else ""
+        pre_ms.append((t1 - t0) * 1000.0)
+        ocr_ms.append((t2 - t1) * 1000.0)
+        norm_ms.append((t3 - t2) * 1000.0)
+
+        exact += pred == label
+        char_errors += edit_distance(pred, label)
+        char_total += len(label)
+        rows.append({'file': name, 'label': label, 'raw': raw[0] if raw else "", 'prediction': pred})
+
+    def lat(values):
+        return {'mean_ms': float(np.mean(values)) if values else 0.0,
+                'p50_ms': percentile(values, 50), 'p95_ms': percentile(values, 95), 'p99_ms': percentile(values, 99)}
+
+    return {
+        'plates': len(samples),
+        'exact_accuracy': exact / len(samples) if samples else 0.0,
+        'char_accuracy': max(0.0, 1.0 - char_errors / char_total) if char_total else 0.0,
+        'latency': {'preprocess': lat(pre_ms), 'ocr': lat(ocr_ms), 'correction': lat(norm_ms)},
+        'predictions': rows,
+    }
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+# ==========================================
+# COMPARISON
+# ==========================================
+COMPARE_KEYS = [
+    ('clips', 'fps'), ('clips', 'plate_recall'), ('clips', 'plate_precision'), ('clips', 'false_saves'),
+    ('clips', 'ocr_calls_per_vehicle'), ('synthetic', 'exact_accuracy'), ('synthetic', 'char_accuracy'),
+]
+
+def compare_reports(baseline, report):
+    lines = [f"{'metric':<32}{'baseline':>12}{'current':>12}{'delta':>12}"]
+    for section, key in COMPARE_KEYS:
+        old = (baseline.get('summary', {}).get(section) or {}).get(key)
+        new = (report.get('summary', {}).get(section) or {}).get(key)
+        if old is None or new is None:
+            continue
+        lines.append(f"{section + '.' + key:<32}{old:>12.3f}{new:>12.3f}{new - old:>+12.3f}")
+    return "\n".join(lines)
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay labelled gate clips and synthetic plates through the pipeline on CPU")
+    parser.add_argument("--clips", default=None, help="Folder of clips (labels.csv or clip.txt with the expected plates)")
+    parser.add_argument("--synthetic", type=int, default=200, help="Synthetic plates to generate (0 = none)")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed of the synthetic plates")
+    parser.add_argument("--save-synthetic", default=None, help="Also write the synthetic crops to this folder")
+    parser.add_argument("--max-frames", type=int, default=0, help="Frames per clip (0 = whole clip)")
+    parser.add_argument("--analysis-ms", type=float, default=1000.0 / 6,
+                        help="Fixed analysis period on media time, so runs are comparable (0 = adaptive scheduler)")
+    parser.add_argument("--ocr-mode", choices=("readtext", "recognize"), default=None)
+    parser.add_argument("--backend", choices=("auto", "torch", "onnx"), default=None)
+    parser.add_argument("--json", default=None, help="Write the report to this file")
+    parser.add_argument("--compare", default=None, help="Baseline report to compare against")
+    args = parser.parse_args(argv)
+
+    SystemConfig.FIXED_ANALYSIS_MS = args.analysis_ms
+    models = ModelSet(gpu=False, ocr_mode=args.ocr_mode, backend=args.backend).load().warmup()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'opencv': cv2.__version__,
+            'backend': f"{models.backend}/{models.device}",
+            'ocr_mode': models.ocr_mode,
+            'analysis_ms': args.analysis_ms,
+            'motion_threshold': SystemConfig.motion_threshold_for(None),
+            'roi': SystemConfig.DETECTION_ROI,
+            'seed': args.seed,
+        },
+        'summary': {},
+    }
+
+    if args.clips:
+        results = []
+        for name, path, expected in load_clips(args.clips):
+            res = run_clip(models, name, path, expected, args.max_frames)
+            results.append(res)
+            print(f"{name:<28} {res['fps']:6.1f} FPS  saved {len(res['saved'])}/{len(expected)}  "
+                  f"correct {res['correct']}  false {len(res['false_saves'])}  OCR/vehicle {res['ocr_calls_per_vehicle']:.1f}")
+        report['clips'] = results
+        report['summary']['clips'] = summarize_clips(results)
+
+    if args.synthetic:
+        samples = make_synthetic(args.synthetic, args.seed)
+        if args.save_synthetic:
+            os.makedirs(args.save_synthetic, exist_ok=True)
+            for name, img, _ in samples:
+                cv2.imwrite(os.path.join(args.save_synthetic, name), img)
+        res = run_synthetic(models, samples)
+        report['synthetic'] = res
+        report['summary']['synthetic'] = {k: res[k] for k in ('plates', 'exact_accuracy', 'char_accuracy')}
+        lat = res['latency']
+        print(f"synthetic plates={res['plates']}  exact={res['exact_accuracy']:.3f}  char={res['char_accuracy']:.3f}  "
+              f"preprocess p50={lat['preprocess']['p50_ms']:.2f}ms  ocr p50={lat['ocr']['p50_ms']:.1f}ms")
+
+    if 'clips' in report['summary']:
+        s = report['summary']['clips']
+        print(f"clips={s['clips']}  frames={s['frames']}  {s['fps']:.1f} FPS  recall={s['plate_recall']:.3f}  "
+              f"precision={s['plate_precision']:.3f}  false saves={s['false_saves']}  "
+              f"OCR/vehicle={s['ocr_calls_per_vehicle']:.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare_reports(json.load(f), report))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import os
+import sys
+import glob
+import time
+import random
+from urllib.parse import urlsplit, parse_qs, unquote
+import cv2
+
+# ==========================================
+# SOURCE STRINGS
+# ==========================================
+#   0, 1, ...                        webcam index (DirectShow on Windows only)
+#   rtsp://..., http://..., a path   passed to cv2.VideoCapture as before
+#   file://clip.mp4?loop=1&fps=25    video file replayed at camera speed
+#   dir://frames/?fps=10             folder of images, in name order
+#   synthetic://plates?rate=2        generated road with cars and plates (synthetic://empty for no traffic)
+#
+# Options of the plugin sources:
+#   fps       frame rate (file: the clip's own rate by default)
+#   loop      1 = start over at the end (default for dir:// and synthetic://), 0 = stop
+#   jitter    random change of each frame interval, fraction of the interval (0.1 = +/-10%)
+#   drop      probability that a frame never arrives
+#   realtime  0 = deliver as fast as the consumer reads
+#   seed      random seed (jitter, drops, synthetic traffic)
+#   width, height, rate, cross   synthetic:// frame size, vehicles per second, seconds to cross
+PLUGIN_SCHEMES = ('file', 'dir', 'synthetic')
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def parse_source(source):
+    """Returns (scheme, path, options) for plugin sources, None for anything cv2 opens itself."""
+    text = str(source)
+    parts = urlsplit(text)
+    if parts.scheme not in PLUGIN_SCHEMES:
+        return None
+    path = unquote(parts.netloc + parts.path)
+    options = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+    return parts.scheme, path, options
+
+def open_source(source):
+    """A VideoCapture-like object for any source string (see the table above)."""
+    text = str(source)
+    if text.isdigit():
+        if sys.platform == "win32":
+            return cv2.VideoCapture(int(text), cv2.CAP_DSHOW)
+        return cv2.VideoCapture(int(text))
+
+    parsed = parse_source(text)
+    if parsed is None:
+        return cv2.VideoCapture(text)
+    scheme, path, options = parsed
+    if scheme == 'file':
+        return FileSource(path, **options)
+    if scheme == 'dir':
+        return DirSource(path, **options)
+    return SyntheticSource(path or 'plates', **options)
+
+# ==========================================
+# PACED SOURCE (COMMON PART)
+# ==========================================
+class PacedSource:
+    """
+    Delivers frames on a camera's schedule through the VideoCapture calls the
+    grabber uses (grab / retrieve / read / get / set / release). grab() waits
+    for the next frame time and advances; retrieve() produces the pixels,
+    so frames the grabber skips are never rendered or decoded.
+    """
+    def __init__(self, fps=25.0, jitter=0.0, drop=0.0, realtime=1, seed=None, **unknown):
+        if unknown:
+            raise ValueError(f"Unknown source options: {', '.join(sorted(unknown))}")
+        self.fps = float(fps)
+        self.jitter = float(jitter)
+        self.drop = float(drop)
+        self.realtime = bool(int(realtime))
+        self.rng = random.Random(None if seed is None else int(seed))
+        self.opened = True
+        self.next_at = None
+        self.frame_index = -1    # Index of the current frame on the camera clock, dropped ones included
+        self.frames_dropped = 0
+
+    def isOpened(self):
+        return self.opened
+
+    def wait(self):
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self.next_at is None:
+            self.next_at = now
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+        interval = 1.0 / self.fps
+        if self.jitter:
+            interval *= max(0.0, 1.0 + self.rng.uniform(-self.jitter, self.jitter))
+        # A slow consumer should not get a burst of catch-up frames
+        self.next_at = max(self.next_at + interval, time.perf_counter() - interval)
+
+    def grab(self):
+        while self.opened:
+            self.wait()
+            self.frame_index += 1
+            if self.drop and self.rng.random() < self.drop:
+                self.frames_dropped += 1
+                continue
+            if self.advance():
+                return True
+            self.opened = False
+        return False
+
+    def retrieve(self):
+        frame = self.render()
+        return frame is not None, frame
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    @property
+    def media_time(self):
+        return max(0, self.frame_index) / self.fps
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index + 1)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.media_time * 1000.0
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.opened = False
+
+    def advance(self):
+        """Moves to the next frame. False when the source has ended."""
+        return True
+
+    def render(self):
+        return None
+
+# ==========================================
+# FILE / DIRECTORY / SYNTHETIC SOURCES
+# ==========================================
+class FileSource(PacedSource):
+    def __init__(self, path, loop=0, fps=None, **options):
+        self.cap = cv2.VideoCapture(path)
+        native = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        super().__init__(fps=fps or native or 25.0, **options)
+        self.path = path
+        self.loop = bool(int(loop))
+        self.opened = self.cap.isOpened()
+
+    def advance(self):
+        if self.cap.grab():
+            return True
+        if not self.loop:
+            return False
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.cap.grab()
+
+    def render(self):
+        ret, frame = self.cap.retrieve()
+        return frame if ret else None
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+class DirSource(PacedSource):
+    def __init__(self, path, loop=1, fps=10.0, **options):
+        super().__init__(fps=fps, **options)
+        self.files = sorted(f for f in glob.glob(os.path.join(path, "*")) if f.lower().endswith(IMAGE_EXTS))
+        self.loop = bool(int(loop))
+        self.position = -1
+        self.opened = bool(self.files)
+
+    def advance(self):
+        self.position += 1
+        if self.position >= len(self.files):
+            if not self.loop:
+                return False
+            self.position = 0
+        return True
+
+    def render(self):
+        return cv2.imread(self.files[self.position])
+
+class SyntheticSource(PacedSource):
+    def __init__(self, kind='plates', fps=25.0, width=960, height=540, rate=1.0, cross=3.0, seed=0, **options):
+        from synthetic_plates import SyntheticScene
+
+        super().__init__(fps=fps, seed=seed, **options)
+        if kind not in ('plates', 'empty'):
+            raise ValueError(f"Unknown synthetic source: {kind}")
+        self.scene = SyntheticScene(int(width), int(height), float(rate) if kind == 'plates' else 0.0,
+                                    float(cross), int(seed))
+
+    def advance(self):
+        self.scene.advance(self.media_time)
+        return True
+
+    def render(self):
+        return self.scene.render(self.media_time)
+
+# ==========================================
+# LOAD TESTING HELPERS
+# ==========================================
+def replicate(sources, count):
+    """
+    Each plugin source count times, every copy with its own seed, e.g. 32
+    simulated gates. Real cameras and streams are kept once, cameras are
+    keyed by their source string.
+    """
+    out = []
+    for source in sources:
+        if count <= 1 or parse_source(source) is None:
+            out.append(source)
+            continue
+        for i in range(count):
+            out.append(f"{source}{'&' if '?' in source else '?'}seed={i}")
+    return out
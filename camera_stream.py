@@ -0,0 +1,223 @@
+import cv2
+import threading
+import time
+from collections import deque
+from metrics import metrics
+from camera_sources import open_source
+
+# ==========================================
+# FRAME RING BUFFER (LATEST FRAME WINS)
+# ==========================================
+class FrameRingBuffer:
+    """
+    Small bounded buffer between the capture thread and the consumers.
+    When the buffer is full the oldest frame is dropped, and a reader always
+    takes the newest frame (older unread frames are counted as dropped).
+    """
+    def __init__(self, size=2):
+        self.frames = deque(maxlen=size)
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.dropped = 0
+
+    def put(self, frame, timestamp):
+        with self.lock:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.seq += 1
+            self.frames.append((self.seq, frame, timestamp))
+
+    def take_latest(self):
+        """Returns (seq, frame, capture_time) of the newest frame, or None if nothing new."""
+        with self.lock:
+            if not self.frames:
+                return None
+            item = self.frames.pop()
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            return item
+
+    def __len__(self):
+        with self.lock:
+            return len(self.frames)
+
+# ==========================================
+# DECODE SKIP POLICY
+# ==========================================
+class SkipPolicy:
+    """
+    Decides for every grabbed frame whether it is worth retrieve() (pixel
+    conversion + copy) or can be dropped after grab(). Specs, comma combined:
+
+        "all"      decode every frame (plain read())
+        "demand"   decode only once a consumer has asked for a frame and found none
+        "every:N"  decode every Nth grabbed frame
+        "fps:N"    decode at most N frames per second
+
+    e.g. "demand,fps:10"
+    """
+    def __init__(self, every=1, max_fps=0.0, on_demand=False):
+        self.every = max(1, int(every))
+        self.max_fps = float(max_fps)
+        self.on_demand = on_demand
+        self.index = 0
+        self.last_decode = 0.0
+
+    @classmethod
+    def parse(cls, spec):
+        if isinstance(spec, SkipPolicy):
+            return spec
+        policy = cls()
+        for part in str(spec or "all").lower().replace(" ", "").split(","):
+            name, _, value = part.partition(":")
+            if name in ("", "all"):
+                continue
+            elif name == "demand":
+                policy.on_demand = True
+            elif name == "every" and value:
+                policy.every = max(1, int(value))
+            elif name == "fps" and value:
+                policy.max_fps = float(value)
+            else:
+                raise ValueError(f"Unknown capture policy: {part}")
+        return policy
+
+    def should_decode(self, now, wanted=True):
+        self.index += 1
+        if self.every > 1 and self.index % self.every:
+            return False
+        if self.on_demand and not wanted:
+            return False
+        if self.max_fps and now - self.last_decode < 1.0 / self.max_fps:
+            return False
+        return True
+
+    def mark_decoded(self, now):
+        self.last_decode = now
+
+    def __repr__(self):
+        parts = (["demand"] if self.on_demand else []) + ([f"every:{self.every}"] if self.every > 1 else []) \
+            + ([f"fps:{self.max_fps:g}"] if self.max_fps else [])
+        return ",".join(parts) or "all"
+
+# ==========================================
+# BACKGROUND FRAME GRABBER
+# ==========================================
+class FrameGrabber:
+    """
+    Owns one cv2.VideoCapture and drains it on a daemon thread so a slow
+    camera never blocks the UI and the driver buffer never fills with stale frames.
+    Every frame is grab()bed to keep the stream current, but only the ones the
+    skip policy lets through are retrieve()d into the buffer.
+    """
+    def __init__(self, source, buffer_size=2, policy="all"):
+        self.source = source
+        self.buffer = FrameRingBuffer(buffer_size)
+        self.policy = SkipPolicy.parse(policy)
+        self.wanted = True  # a consumer found the buffer empty
+        self.cap = None
+        self.is_running = False
+        self.thread = None
+
+        self.stats_lock = threading.Lock()
+        self.frames_captured = 0
+        self.frames_decoded = 0
+        self.frames_processed = 0
+        self.frames_displayed = 0
+        self.read_failures = 0
+        self.last_latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self.started_at = None
+
+    def open(self):
+        # Blocking call, run it off the UI thread
+        cap = open_source(self.source)
+
+        if not cap.isOpened():
+            raise ValueError("Could not open video source")
+
+        # Ask the driver to keep as few frames as possible (ignored by some backends)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.cap = cap
+        return cap
+
+    def start(self):
+        if self.cap is None:
+            self.open()
+        self.is_running = True
+        self.started_at = time.perf_counter()
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+
+    def _capture_loop(self):
+        while self.is_running:
+            t0 = time.perf_counter()
+            if not self.cap.grab():
+                self.read_failures += 1
+                metrics.error('capture', self.source)
+                time.sleep(0.01)
+                continue
+            now = time.perf_counter()
+            with self.stats_lock:
+                self.frames_captured += 1
+            if not self.policy.should_decode(now, self.wanted):
+                continue
+
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                self.read_failures += 1
+                metrics.error('capture', self.source)
+                continue
+            metrics.observe('capture', (time.perf_counter() - t0) * 1000.0, self.source)
+            self.policy.mark_decoded(now)
+            self.wanted = False
+            self.buffer.put(frame, now)
+            with self.stats_lock:
+                self.frames_decoded += 1
+
+    def read_latest(self):
+        """Returns (frame, capture_time) for the freshest unread frame, or None."""
+        item = self.buffer.take_latest()
+        if item is None:
+            self.wanted = True
+            return None
+        _, frame, captured_at = item
+        return frame, captured_at
+
+    def mark_processed(self):
+        with self.stats_lock:
+            self.frames_processed += 1
+
+    def mark_displayed(self, captured_at):
+        latency_ms = (time.perf_counter() - captured_at) * 1000.0
+        with self.stats_lock:
+            self.frames_displayed += 1
+            self.last_latency_ms = latency_ms
+            # Exponential moving average keeps the number readable on screen
+            if self.avg_latency_ms == 0.0:
+                self.avg_latency_ms = latency_ms
+            else:
+                self.avg_latency_ms = 0.9 * self.avg_latency_ms + 0.1 * latency_ms
+
+    def get_stats(self):
+        with self.stats_lock:
+            elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+            return {
+                'captured': self.frames_captured,
+                'decoded': self.frames_decoded,
+                'skipped': self.frames_captured - self.frames_decoded,
+                'dropped': self.buffer.dropped,
+                'processed': self.frames_processed,
+                'displayed': self.frames_displayed,
+                'read_failures': self.read_failures,
+                'capture_fps': self.frames_captured / elapsed if elapsed > 0 else 0.0,
+                'latency_ms': self.last_latency_ms,
+                'avg_latency_ms': self.avg_latency_ms,
+            }
+
+    def stop(self):
+        self.is_running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+        if self.cap is not None and self.cap.isOpened():
+            self.cap.release()
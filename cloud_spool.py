@@ -0,0 +1,265 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Firebase keys may not contain . # $ [ ] or /, a '/' would even turn one record into a nested path
+KEY_ESCAPES = {c: f"%{ord(c):02X}" for c in '%.#$[]/'}
+
+def safe_key(key):
+    """Percent-escapes the characters Firebase rejects in keys (and control characters)."""
+    key = str(key)
+    return "".join(KEY_ESCAPES.get(c) or (f"%{ord(c):02X}" if ord(c) < 32 or ord(c) == 127 else c) for c in key) or "%00"
+
+# ==========================================
+# DURABLE OFFLINE SPOOL (SQLITE, WAL)
+# ==========================================
+class CloudSpool:
+    """
+    Write-ahead store for detection_logs uploads. Every cloud write is recorded
+    here first and only removed once the database has acknowledged it, so an
+    outage (or a crash) never loses a record.
+
+    Rows are keyed by (user_id, plate): a newer write for the same path replaces
+    the pending one, which keeps replay idempotent and the backlog small.
+
+    A row the database keeps rejecting on its own (while other writes go
+    through) is moved to the dead-letter state after max_attempts, so it
+    cannot block the rows queued behind it.
+    """
+    def __init__(self, path, max_attempts=5):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                user_id   TEXT NOT NULL,
+                key       TEXT NOT NULL,
+                value     TEXT,
+                version   INTEGER NOT NULL DEFAULT 1,
+                created   REAL NOT NULL,
+                attempts  INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                PRIMARY KEY (user_id, key)
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pending_created ON pending(created)")
+        try:
+            # Spools written before dead-lettering existed
+            self.conn.execute("ALTER TABLE pending ADD COLUMN dead INTEGER NOT NULL DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN ... COMMIT under the lock; any error rolls back so the spool stays writable."""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def enqueue(self, user_id, payload):
+        """Records a multi-path payload {plate: data or None (delete)} for one user. Keys are escaped."""
+        now = time.time()
+        rows = [(user_id, safe_key(key), json.dumps(val) if val is not None else None, now)
+                for key, val in payload.items()]
+        with self.transaction() as conn:
+            conn.executemany("""
+                INSERT INTO pending (user_id, key, value, created) VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id, key) DO UPDATE SET
+                    value = excluded.value, created = excluded.created,
+                    version = pending.version + 1, attempts = 0, last_error = NULL, dead = 0""", rows)
+
+    def due(self, limit):
+        """Oldest pending rows as [(user_id, key, value, version)], dead letters excluded."""
+        with self.lock:
+            cur = self.conn.execute(
+                "SELECT user_id, key, value, version FROM pending WHERE dead = 0 ORDER BY created LIMIT ?", (limit,))
+            return [(u, k, json.loads(v) if v is not None else None, ver) for u, k, v, ver in cur.fetchall()]
+
+    def ack(self, rows):
+        # Only delete the exact version that was sent, a newer write stays queued
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM pending WHERE user_id = ? AND key = ? AND version = ?",
+                             [(u, k, ver) for u, k, _, ver in rows])
+
+    def mark_failed(self, rows, error, rejected=False):
+        """
+        Counts a failed attempt. rejected=True means the row failed on its own
+        while the database was reachable; such a row becomes a dead letter after
+        max_attempts. Failures during an outage never dead-letter a row.
+        """
+        with self.transaction() as conn:
+            conn.executemany("UPDATE pending SET attempts = attempts + 1, last_error = ?, "
+                             "dead = CASE WHEN ? AND attempts + 1 >= ? THEN 1 ELSE dead END "
+                             "WHERE user_id = ? AND key = ? AND version = ?",
+                             [(str(error), int(rejected), self.max_attempts, u, k, ver) for u, k, _, ver in rows])
+
+    def pending_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending WHERE dead = 0").fetchone()[0]
+
+    def dead_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending WHERE dead = 1").fetchone()[0]
+
+    def dead_letters(self):
+        """Rows given up on, as [(user_id, key, value, attempts, last_error)]."""
+        with self.lock:
+            cur = self.conn.execute(
+                "SELECT user_id, key, value, attempts, last_error FROM pending WHERE dead = 1 ORDER BY created")
+            return [(u, k, json.loads(v) if v is not None else None, n, err) for u, k, v, n, err in cur.fetchall()]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ==========================================
+# BATCHED REPLAYER
+# ==========================================
+class SpoolReplayer:
+    """
+    Flushes the spool to detection_logs/{user} with one multi-path update() per
+    user and batch. If a batch fails its rows are retried one at a time, so a
+    single row the database rejects does not hold back the others. When
+    nothing gets through (an outage) the whole replayer backs off
+    exponentially (with jitter) instead of hammering the database.
+    """
+    PROBE_ROWS = 5  # Single-row retries without any success before the flush counts as an outage
+
+    def __init__(self, spool, cloud_ref, batch_size=500, base_delay=2.0, max_delay=300.0, idle_interval=30.0):
+        self.spool = spool
+        self.cloud_ref = cloud_ref
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_interval = idle_interval
+
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.flush_lock = threading.Lock()
+        self.is_running = False
+        self.thread = None
+
+        self.consecutive_failures = 0
+        self.replayed = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.last_error = None
+        self.last_success = None
+
+    def start(self):
+        self.is_running = True
+        self.thread = threading.Thread(target=self._replay_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def wake(self):
+        """Signals that new rows are waiting (or connectivity is back)."""
+        self.wake_event.set()
+
+    def backoff_delay(self):
+        delay = min(self.max_delay, self.base_delay * (2 ** (self.consecutive_failures - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _replay_loop(self):
+        while self.is_running:
+            if self.flush_once() > 0:
+                continue
+            if self.consecutive_failures:
+                # While offline, new writes should not cut the backoff short
+                self.stop_event.wait(self.backoff_delay())
+            else:
+                self.wake_event.wait(self.idle_interval)
+            self.wake_event.clear()
+
+    def flush_once(self):
+        """Sends one batch. Returns rows replayed, 0 when empty, -1 on failure."""
+        with self.flush_lock:
+            return self._flush_batch()
+
+    def _flush_batch(self):
+        rows = self.spool.due(self.batch_size)
+        if not rows:
+            return 0
+
+        by_user = {}
+        for row in rows:
+            by_user.setdefault(row[0], []).append(row)
+
+        sent = 0
+        rejected = []   # Rows that failed on their own
+        error = None
+        for user_id, user_rows in by_user.items():
+            try:
+                self.send(user_id, user_rows)
+                self.spool.ack(user_rows)
+                sent += len(user_rows)
+                self.batches += 1
+                continue
+            except Exception as e:
+                error = e
+                self.failed_batches += 1
+                self.last_error = str(e)
+            if len(user_rows) == 1:
+                rejected.extend(user_rows)
+                continue
+
+            # Find the row(s) the database refuses, give up early if nothing goes through at all
+            for row in user_rows:
+                if not sent and len(rejected) >= self.PROBE_ROWS:
+                    break
+                try:
+                    self.send(user_id, [row])
+                except Exception as e:
+                    error = e
+                    self.last_error = str(e)
+                    rejected.append(row)
+                    continue
+                self.spool.ack([row])
+                sent += 1
+
+        if rejected:
+            # Only rows that failed while others got through count towards the dead letter
+            self.spool.mark_failed(rejected, error, rejected=sent > 0)
+        if not sent:
+            self.consecutive_failures += 1
+            return -1
+
+        self.consecutive_failures = 0
+        self.replayed += sent
+        self.last_success = time.time()
+        return sent
+
+    def send(self, user_id, rows):
+        self.cloud_ref.child('detection_logs').child(user_id).update({key: value for _, key, value, _ in rows})
+
+    def get_stats(self):
+        return {
+            'pending': self.spool.pending_count(),
+            'dead': self.spool.dead_count(),
+            'replayed': self.replayed,
+            'batches': self.batches,
+            'failed_batches': self.failed_batches,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+            'last_success': self.last_success,
+        }
+
+    def stop(self, flush=True):
+        if flush and not self.consecutive_failures:
+            while self.flush_once() > 0:
+                pass
+        self.is_running = False
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
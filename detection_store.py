@@ -0,0 +1,261 @@
+import os
+import sys
+import csv
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+
+# ==========================================
+# LOCAL DETECTION STORE (SQLITE)
+# ==========================================
+class DetectionStore:
+    """
+    Embedded, indexed store for every saved detection. Replaces the append-only
+    car_plate_records.csv (which can still be produced with export_csv).
+    Timestamps are kept as 'YYYY-MM-DD HH:MM:SS' text so they sort correctly.
+    """
+    COLUMNS = ['user_id', 'plate_number', 'camera_source', 'timestamp', 'confidence',
+               'color', 'distance_m', 'height_m', 'note', 'image_name']
+
+    CSV_HEADERS = ["Timestamp", "Plate Number", "Confidence", "Color", "Distance (m)", "Height (m)", "Note"]
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS detections (
+                id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id       TEXT,
+                plate_number  TEXT NOT NULL,
+                camera_source TEXT,
+                timestamp     TEXT NOT NULL,
+                confidence    REAL,
+                color         TEXT,
+                distance_m    REAL,
+                height_m      REAL,
+                note          TEXT,
+                image_name    TEXT
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_det_plate ON detections(plate_number, timestamp)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_det_source ON detections(user_id, camera_source, timestamp)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_det_time ON detections(user_id, timestamp)")
+
+    # --- WRITES ---
+    @contextmanager
+    def transaction(self):
+        """BEGIN ... COMMIT under the lock; any error rolls back so the connection stays usable."""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def insert(self, record):
+        return self.insert_many([record])
+
+    def insert_many(self, records):
+        """Bulk insert in one transaction. records are dicts keyed like COLUMNS."""
+        rows = [tuple(r.get(c) for c in self.COLUMNS) for r in records]
+        with self.transaction() as conn:
+            self.insert_rows(conn, rows)
+        return len(rows)
+
+    def insert_rows(self, conn, rows):
+        conn.executemany(
+            f"INSERT INTO detections ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})", rows)
+
+    def correct_latest(self, user_id, camera_source, old_plate, record):
+        """
+        Manual correction: rewrites the newest row of old_plate on this camera with
+        the corrected record. Inserts the record if there is nothing to correct.
+        """
+        # Lookup and rewrite in one transaction, a concurrent insert cannot slip in between
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM detections WHERE plate_number = ? AND user_id IS ? AND camera_source IS ? "
+                "ORDER BY timestamp DESC, id DESC LIMIT 1", (old_plate, user_id, camera_source)).fetchone()
+            if row is None:
+                self.insert_rows(conn, [tuple(record.get(c) for c in self.COLUMNS)])
+                return 1
+
+            fields = [c for c in self.COLUMNS if c in record]
+            conn.execute(f"UPDATE detections SET {', '.join(f'{c} = ?' for c in fields)} WHERE id = ?",
+                         [record[c] for c in fields] + [row['id']])
+        return 1
+
+    def update(self, row_id, fields):
+        fields = {c: v for c, v in fields.items() if c in self.COLUMNS}
+        if not fields: return
+        with self.lock:
+            self.conn.execute(f"UPDATE detections SET {', '.join(f'{c} = ?' for c in fields)} WHERE id = ?",
+                              list(fields.values()) + [row_id])
+
+    def delete_user(self, user_id):
+        with self.lock:
+            self.conn.execute("DELETE FROM detections WHERE user_id = ?", (user_id,))
+
+    # --- READS ---
+    def query(self, user_id=None, plate=None, camera_source=None, start=None, end=None,
+              before=None, limit=100, newest_first=True):
+        """
+        Range query served from the indexes. start/end bound the timestamp
+        (inclusive); before=(timestamp, id) continues a previous page (keyset pagination).
+        """
+        where, args = [], []
+        if user_id is not None:
+            where.append("user_id = ?"); args.append(user_id)
+        if plate is not None:
+            where.append("plate_number = ?"); args.append(plate)
+        if camera_source is not None:
+            where.append("camera_source = ?"); args.append(camera_source)
+        if start is not None:
+            where.append("timestamp >= ?"); args.append(start)
+        if end is not None:
+            where.append("timestamp <= ?"); args.append(end)
+        if before is not None:
+            where.append("(timestamp < ? OR (timestamp = ? AND id < ?))"); args += [before[0], before[0], before[1]]
+
+        order = "DESC" if newest_first else "ASC"
+        sql = "SELECT * FROM detections"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY timestamp {order}, id {order}"
+        if limit:
+            sql += " LIMIT ?"; args.append(limit)
+
+        with self.lock:
+            return [dict(r) for r in self.conn.execute(sql, args).fetchall()]
+
+    def latest(self, user_id=None, camera_source=None):
+        rows = self.query(user_id=user_id, camera_source=camera_source, limit=1)
+        return rows[0] if rows else None
+
+    def count(self, user_id=None, camera_source=None):
+        where, args = [], []
+        if user_id is not None:
+            where.append("user_id = ?"); args.append(user_id)
+        if camera_source is not None:
+            where.append("camera_source = ?"); args.append(camera_source)
+        sql = "SELECT COUNT(*) FROM detections" + (" WHERE " + " AND ".join(where) if where else "")
+        with self.lock:
+            return self.conn.execute(sql, args).fetchone()[0]
+
+    # --- CSV COMPATIBILITY ---
+    def export_csv(self, csv_path, user_id=None, camera_source=None):
+        """Writes the old car_plate_records.csv layout. Returns the number of rows."""
+        count = 0
+        with self.lock:
+            where, args = [], []
+            if user_id is not None:
+                where.append("user_id = ?"); args.append(user_id)
+            if camera_source is not None:
+                where.append("camera_source = ?"); args.append(camera_source)
+            sql = "SELECT * FROM detections" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY timestamp, id"
+            cur = self.conn.execute(sql, args)
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.CSV_HEADERS)
+                for r in cur:
+                    writer.writerow([r['timestamp'], r['plate_number'], format_number(r['confidence']), r['color'],
+                                     format_number(r['distance_m']), format_number(r['height_m']), r['note'] or ""])
+                    count += 1
+        return count
+
+    def import_csv(self, csv_path, user_id=None, camera_source=None):
+        """Loads an existing car_plate_records.csv so old history stays searchable."""
+        records = []
+        with open(csv_path, newline='') as f:
+            for row in csv.DictReader(f):
+                records.append({
+                    'user_id': user_id,
+                    'plate_number': row.get("Plate Number", ""),
+                    'camera_source': camera_source,
+                    'timestamp': (row.get("Timestamp") or "").split('.')[0],
+                    'confidence': parse_number(row.get("Confidence")),
+                    'color': row.get("Color"),
+                    'distance_m': parse_number(row.get("Distance (m)")),
+                    'height_m': parse_number(row.get("Height (m)")),
+                    'note': row.get("Note", ""),
+                })
+        return self.insert_many(records)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ==========================================
+# HELPER FUNCTIONS
+# ==========================================
+def format_number(value):
+    return f"{value:.2f}" if isinstance(value, (int, float)) else (value or "")
+
+def parse_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(path):
+    """One shared DetectionStore per database file for the whole process."""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        if path not in _stores:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _stores[path] = DetectionStore(path)
+        return _stores[path]
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+def main(argv=None):
+    from lpr_pipeline import backup_paths
+    default_db = backup_paths()[4]
+
+    parser = argparse.ArgumentParser(description="Local detection store tools")
+    parser.add_argument("--db", default=default_db, help=f"Store file (default {default_db})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_exp = sub.add_parser("export", help="Export to the legacy car_plate_records.csv format")
+    p_exp.add_argument("--out", default=backup_paths()[2])
+    p_exp.add_argument("--user", default=None)
+    p_exp.add_argument("--source", default=None)
+
+    p_imp = sub.add_parser("import-csv", help="Import an existing car_plate_records.csv")
+    p_imp.add_argument("csv_file")
+    p_imp.add_argument("--user", default=None)
+    p_imp.add_argument("--source", default=None)
+
+    p_q = sub.add_parser("query", help="Show the newest detections")
+    p_q.add_argument("--plate", default=None)
+    p_q.add_argument("--user", default=None)
+    p_q.add_argument("--source", default=None)
+    p_q.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    store = get_store(args.db)
+
+    if args.command == "export":
+        n = store.export_csv(args.out, user_id=args.user, camera_source=args.source)
+        print(f"Exported {n} rows to {args.out}")
+    elif args.command == "import-csv":
+        n = store.import_csv(args.csv_file, user_id=args.user, camera_source=args.source)
+        print(f"Imported {n} rows into {args.db}")
+    else:
+        for r in store.query(user_id=args.user, plate=args.plate, camera_source=args.source, limit=args.limit):
+            print(f"{r['timestamp']}  {r['plate_number']:<10} {r['camera_source'] or '-':<25} "
+                  f"{r['color'] or '-':<10} conf={format_number(r['confidence'])}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,11 @@
-import firebase_admin
-from firebase_admin import credentials, db
 import hashlib
 import datetime
 import os
 import sys
+import copy
+import time
+import threading
+from collections import OrderedDict
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -21,9 +23,110 @@ CRED_PATH = resource_path("serviceAccountKey.json")
 # Your specific Database URL
 DB_URL = 'https://sadasd-88d5b-default-rtdb.asia-southeast1.firebasedatabase.app/'
 
+# --- READ CACHE ---
+# Seconds a read stays valid, by top level node. Local writes invalidate earlier.
+# Credential checks (login_user / login_admin) always read fresh and are not listed.
+CACHE_TTLS = {
+    'users': 60,
+    'cameras': 300,
+}
+CACHE_DEFAULT_TTL = 30
+CACHE_MAX_ENTRIES = 256
+
+class ReadCache:
+    """
+    Read-through cache for database reads, keyed by path.
+    Entries expire after the TTL of their top level node and the least recently
+    used one is evicted when the cache is full. invalidate(path) drops the path,
+    everything below it and every ancestor, since all of them saw the write.
+    """
+    def __init__(self, ttls=None, default_ttl=CACHE_DEFAULT_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttls = ttls if ttls is not None else dict(CACHE_TTLS)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl_for(self, path):
+        return self.ttls.get(path.split('/')[0], self.default_ttl)
+
+    def get(self, path, loader):
+        """Returns the cached value of path, calling loader() on a miss."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(path)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+                del self.entries[path]
+                self.expired += 1
+            self.misses += 1
+
+        value = loader()
+        self.put(path, value)
+        return copy.deepcopy(value)
+
+    def put(self, path, value):
+        with self.lock:
+            self.entries[path] = (time.monotonic() + self.ttl_for(path), copy.deepcopy(value))
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def patch(self, path, key, value):
+        """Applies a local write to a cached node in place (value None removes the key)."""
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                return
+            data = entry[1] if isinstance(entry[1], dict) else {}
+            if value is None:
+                data.pop(key, None)
+            else:
+                data[key] = copy.deepcopy(value)
+            self.entries[path] = (entry[0], data or None)
+        self.invalidate(f"{path}/{key}", keep=path)
+
+    def invalidate(self, path, keep=None):
+        with self.lock:
+            for cached in list(self.entries):
+                if cached == keep:
+                    continue
+                if cached == path or cached.startswith(path + '/') or path.startswith(cached + '/'):
+                    del self.entries[cached]
+                    self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
 class FirebaseManager:
     def __init__(self):
-        # 1. INITIALIZE FIREBASE
+        # 1. INITIALIZE FIREBASE (imported here, firebase_admin is slow to load)
+        import firebase_admin
+        from firebase_admin import credentials, db
         if not firebase_admin._apps:
             cred = credentials.Certificate(CRED_PATH)
             firebase_admin.initialize_app(cred, {
@@ -33,6 +136,7 @@ class FirebaseManager:
         # We use the ROOT reference now, not just 'detections'
         # This allows us to access 'users', 'admins', and 'cameras' too.
         self.ref = db.reference()
+        self.cache = ReadCache()
         
         # Create default admin if strictly necessary
         self.ensure_admin_exists()
@@ -41,9 +145,22 @@ class FirebaseManager:
         # Secure password hashing
         return hashlib.sha256(password.encode()).hexdigest()
 
+    # --- CACHED READS ---
+    def cached_get(self, path):
+        return self.cache.get(path, lambda: self.ref.child(path).get())
+
+    def get_cache_stats(self):
+        return self.cache.get_stats()
+
+    def get_user(self, user_id, fresh=False):
+        path = f"users/{user_id}"
+        if fresh:
+            self.cache.invalidate(path)
+        return self.cached_get(path)
+
     def ensure_admin_exists(self):
         # Check if 'admins' node exists
-        admins = self.ref.child('admins').get()
+        admins = self.ref.child('admins').get(shallow=True)
         if not admins:
             print("Creating default admin account (admin/admin123)...")
             self.register_admin("admin", "admin123")
@@ -52,7 +169,7 @@ class FirebaseManager:
     def register_user(self, username, password, email):
         users_ref = self.ref.child('users')
         
-        # Check if username exists
+        # Check if username exists (always fresh, a stale miss would allow duplicates)
         snapshot = users_ref.order_by_child('username').equal_to(username).get()
         if snapshot:
             return False, "Username already exists"
@@ -66,12 +183,13 @@ class FirebaseManager:
             'email': email,
             'register_date': str(datetime.datetime.now())
         })
+        self.cache.invalidate(f"users/{username}")
         return True, "Registration Successful"
 
         
     def login_user(self, username, password):
         hashed_pw = self.hash_password(password)
-        # Search for user by username
+        # Search for user by username (always fresh, a cached password or account outlives its change)
         users = self.ref.child('users').order_by_child('username').equal_to(username).get()
         
         if users:
@@ -90,7 +208,13 @@ class FirebaseManager:
 
     def login_admin(self, username, password):
         hashed_pw = self.hash_password(password)
-        admins = self.ref.child('admins').get()
+        # Indexed lookup of the one admin, the full node only if 'admins' has no .indexOn.
+        # Never cached, like login_user
+        admins_ref = self.ref.child('admins')
+        try:
+            admins = admins_ref.order_by_child('username').equal_to(username).get()
+        except Exception:
+            admins = admins_ref.get()
         if admins:
             for aid, data in admins.items():
                 if data.get('username') == username and data.get('password') == hashed_pw:
@@ -101,13 +225,15 @@ class FirebaseManager:
     def add_camera(self, user_id, ip_address):
         # Store camera under /cameras/{user_id}/{camera_id}
         new_cam_ref = self.ref.child('cameras').child(user_id).push()
-        new_cam_ref.set({
+        cam_data = {
             'ip_address': ip_address,  # The URL is stored safely as DATA here
             'created': str(datetime.datetime.now())
-        })
+        }
+        new_cam_ref.set(cam_data)
+        self.cache.patch(f"cameras/{user_id}", new_cam_ref.key, cam_data)
 
     def get_user_cameras(self, user_id):
-        cameras = self.ref.child('cameras').child(user_id).get()
+        cameras = self.cached_get(f"cameras/{user_id}")
         cam_list = []
         if cameras:
             for cid, data in cameras.items():
@@ -116,10 +242,16 @@ class FirebaseManager:
 
     def delete_camera(self, user_id, camera_id):
         self.ref.child('cameras').child(user_id).child(camera_id).delete()
+        self.cache.patch(f"cameras/{user_id}", camera_id, None)
 
-    def get_all_users(self):
-        """Fetch all registered users for the Admin List."""
-        users = self.ref.child('users').get()
+    def get_all_users(self, fresh=False):
+        """
+        Fetch all registered users for the Admin List. Cached, every write through
+        this manager invalidates it; fresh=True re-reads (changes from other clients).
+        """
+        if fresh:
+            self.cache.invalidate('users')
+        users = self.cached_get('users')
         user_list = []
         if users:
             for uid, data in users.items():
@@ -146,6 +278,10 @@ class FirebaseManager:
         except Exception as e:
             print(f"Error deleting user: {e}")
             return False
+        finally:
+            self.cache.invalidate(f"users/{user_id}")
+            self.cache.invalidate(f"cameras/{user_id}")
+            self.cache.invalidate(f"detection_logs/{user_id}")
         
         # ... inside FirebaseManager class ...
 
@@ -158,7 +294,7 @@ class FirebaseManager:
         users_ref = self.ref.child('users')
         
         # 1. Get current data to compare
-        current_data = users_ref.child(user_id).get()
+        current_data = self.get_user(user_id, fresh=True)
         if not current_data:
             return False, "User not found"
 
@@ -184,14 +320,48 @@ class FirebaseManager:
             return True, "Profile Updated Successfully"
         except Exception as e:
             return False, str(e)
+        finally:
+            self.cache.invalidate(f"users/{user_id}")
         
-# --- INSTANTIATE IMMEDIATELY ---
-# This allows other files to just import 'db_manager' or 'ref' directly
-try:
-    db_manager = FirebaseManager()
-    ref = db_manager.ref # Expose 'ref' globally for backward compatibility
-    """print("✅ Database Connected via final_system_segmentation.py")"""
-except Exception as e:
-    """print(f"❌ Database Connection Error: {e}")"""
-    db_manager = None
-    ref = None
\ No newline at end of file
+# --- DEFERRED CONNECTION ---
+# Connecting (and ensure_admin_exists) needs the network, so it no longer runs at
+# import. The UI calls connect_async() once its window is up; scripts that still
+# do 'from final_system_segmentation import ref, db_manager' get a blocking
+# connect through the module __getattr__ below, as before.
+_connect_lock = threading.Lock()
+connected = threading.Event()
+connection_error = None
+
+def connect():
+    """Connects once (thread safe) and returns db_manager, or None if it failed."""
+    global db_manager, ref, connection_error
+    with _connect_lock:
+        if not connected.is_set():
+            try:
+                manager = FirebaseManager()
+                db_manager = manager
+                ref = manager.ref # Expose 'ref' globally for backward compatibility
+                """print("✅ Database Connected via final_system_segmentation.py")"""
+            except Exception as e:
+                """print(f"❌ Database Connection Error: {e}")"""
+                db_manager = None
+                ref = None
+                connection_error = e
+            connected.set()
+    return db_manager
+
+def connect_async(on_done=None):
+    """Connects on a background thread, then calls on_done(db_manager, error)."""
+    def worker():
+        manager = connect()
+        if on_done is not None:
+            on_done(manager, connection_error)
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+def __getattr__(name):
+    if name in ('db_manager', 'ref'):
+        connect()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,120 @@
+import time
+import threading
+import cv2
+from PIL import Image, ImageTk
+from metrics import metrics
+
+# ==========================================
+# LATEST-FRAME SLOT
+# ==========================================
+class DisplaySlot:
+    """
+    Hand-off between the processing thread and the Tk render loop. The
+    producer overwrites, the renderer takes whatever is newest; frames the
+    renderer never saw are simply replaced (no queue, no backlog).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frame = None
+        self.captured_at = None
+        self.seq = 0
+
+    def put(self, frame, captured_at=None):
+        with self.lock:
+            self.frame = frame
+            self.captured_at = captured_at
+            self.seq += 1
+
+    def get(self):
+        """Returns (seq, frame, captured_at)."""
+        with self.lock:
+            return self.seq, self.frame, self.captured_at
+
+# ==========================================
+# FRAME RENDERER
+# ==========================================
+class FrameRenderer:
+    """
+    Draws BGR frames into a label through one persistent PhotoImage.
+
+    - scaling is done by cv2 on the BGR frame (INTER_AREA when shrinking,
+      INTER_LINEAR when enlarging) before the single color conversion
+    - the PhotoImage is only recreated when the target size changes,
+      otherwise the new pixels are pasted into the existing image
+    - render() is rate limited to max_fps and skips frames it already drew
+    - overlay lines (e.g. metrics) are drawn on the scaled copy, never on the source frame
+    """
+    def __init__(self, label, max_fps=30, name=""):
+        self.label = label
+        self.max_fps = max_fps
+        self.name = name
+        self.overlay = None
+        self.photo = None
+        self.photo_size = None
+        self.target_size = None
+        self.last_seq = None
+        self.last_render = 0.0
+
+        self.rendered = 0
+        self.skipped = 0
+        self.render_ms = 0.0
+
+    def set_target_size(self, width, height):
+        """Call from a <Configure> handler; sizes below 10 px are ignored."""
+        if width > 10 and height > 10:
+            self.target_size = (int(width), int(height))
+
+    def due(self):
+        if not self.max_fps:
+            return True
+        return time.perf_counter() - self.last_render >= 1.0 / self.max_fps
+
+    def render(self, frame, seq=None):
+        """Draws frame if it is new and the rate cap allows it. Returns True when drawn."""
+        if frame is None or self.target_size is None:
+            return False
+        if seq is not None and seq == self.last_seq:
+            return False
+        if not self.due():
+            self.skipped += 1
+            return False
+
+        t0 = time.perf_counter()
+        w, h = self.target_size
+        fh, fw = frame.shape[:2]
+        if (fw, fh) != (w, h):
+            interp = cv2.INTER_AREA if w < fw or h < fh else cv2.INTER_LINEAR
+            frame = cv2.resize(frame, (w, h), interpolation=interp)
+        elif self.overlay:
+            frame = frame.copy()
+        if self.overlay:
+            self.draw_overlay(frame, self.overlay)
+        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+        if self.photo is None or self.photo_size != (w, h):
+            self.photo = ImageTk.PhotoImage(image=img)
+            self.photo_size = (w, h)
+            self.label.configure(image=self.photo, text="")
+            self.label.image = self.photo
+        else:
+            self.photo.paste(img)
+
+        self.last_seq = seq
+        self.last_render = time.perf_counter()
+        self.rendered += 1
+        elapsed_ms = (self.last_render - t0) * 1000.0
+        self.render_ms = elapsed_ms if self.render_ms == 0.0 else 0.9 * self.render_ms + 0.1 * elapsed_ms
+        metrics.observe('render', elapsed_ms, self.name)
+        return True
+
+    def draw_overlay(self, frame, lines):
+        line_h = 16
+        box_w = min(frame.shape[1], 8 + 7 * max(len(l) for l in lines))
+        box_h = min(frame.shape[0], 8 + line_h * len(lines))
+        roi = frame[:box_h, :box_w]
+        roi[:] = roi // 3
+        for i, line in enumerate(lines):
+            cv2.putText(frame, line, (6, 16 + i * line_h), cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1, cv2.LINE_AA)
+
+    def get_stats(self):
+        return {'rendered': self.rendered, 'skipped': self.skipped, 'render_ms': self.render_ms}
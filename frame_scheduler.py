@@ -0,0 +1,102 @@
+# ==========================================
+# ADAPTIVE ANALYSIS SCHEDULER
+# ==========================================
+class AnalysisScheduler:
+    """
+    Decides when the next frame goes to the detector, instead of a fixed
+    every-Nth-frame cadence. The measured cost of one analysis (detector +
+    color + OCR) sets the limits:
+
+    - compute budget: cost / period may not exceed cpu_budget (share of one core)
+    - latency target: a vehicle is analysed within period + cost <= target_ms
+
+    While vehicles are tracked the period drops to the budget limit, with
+    motion but no vehicles it is set by the latency target, and after empty
+    analyses it backs off towards idle_ms.
+
+    Times are in seconds on any clock (capture time for live cameras, media
+    time for files); due() never changes state, analysed() / idle() do.
+    """
+    def __init__(self, target_ms=250.0, cpu_budget=0.5, min_ms=33.0, idle_ms=1000.0, fixed_ms=0.0):
+        self.target_ms = target_ms
+        self.cpu_budget = cpu_budget
+        self.min_ms = min_ms
+        self.idle_ms = idle_ms
+        self.fixed_ms = fixed_ms  # > 0 pins the period (reproducible benchmarks)
+
+        self.cost_ms = 0.0      # EMA of one analysis
+        self.period_ms = min_ms
+        self.next_due = None
+        self.idle_streak = 0
+        self.state = 'normal'   # 'active', 'normal' or 'idle'
+
+        self.analyses = 0
+        self.compliant = 0
+
+    def due(self, ts):
+        return self.next_due is None or ts >= self.next_due
+
+    def budget_period_ms(self):
+        """Shortest period the compute budget allows."""
+        if not self.cpu_budget:
+            return self.min_ms
+        return max(self.min_ms, self.cost_ms / self.cpu_budget)
+
+    def analysed(self, ts, cost_ms, active=False, found=True):
+        """Records one analysis: its cost, whether vehicles are tracked and whether anything was detected."""
+        self.cost_ms = cost_ms if self.cost_ms == 0.0 else 0.8 * self.cost_ms + 0.2 * cost_ms
+        floor = self.budget_period_ms()
+
+        if active:
+            self.state = 'active'
+            self.idle_streak = 0
+            period = floor
+        elif found:
+            self.state = 'normal'
+            self.idle_streak = 0
+            period = max(floor, self.target_ms - self.cost_ms)
+        else:
+            self.idle_streak += 1
+            period = max(floor, self.target_ms - self.cost_ms) * (2 ** min(self.idle_streak, 6))
+            self.state = 'idle' if period > self.target_ms else 'normal'
+            period = min(period, max(floor, self.idle_ms))
+        if self.fixed_ms:
+            period = self.fixed_ms
+
+        self.set_period(ts, period)
+        self.analyses += 1
+        if self.within_budget():
+            self.compliant += 1
+
+    def idle(self, ts):
+        """A due frame was not analysed (nothing moved): look again within the latency target."""
+        self.state = 'idle'
+        self.set_period(ts, self.fixed_ms or max(self.budget_period_ms(), min(self.idle_ms, self.target_ms)))
+
+    def set_period(self, ts, period_ms):
+        self.period_ms = period_ms
+        self.next_due = ts + period_ms / 1000.0
+
+    def within_budget(self):
+        """Latency target met (when not idle) and compute share within the budget."""
+        cpu_ok = not self.cpu_budget or self.cpu_share() <= self.cpu_budget + 1e-6
+        latency_ok = self.state == 'idle' or self.period_ms + self.cost_ms <= self.target_ms
+        return cpu_ok and latency_ok
+
+    def cpu_share(self):
+        return self.cost_ms / self.period_ms if self.period_ms > 0 else 0.0
+
+    def get_stats(self):
+        return {
+            'state': self.state,
+            'rate_hz': 1000.0 / self.period_ms if self.period_ms > 0 else 0.0,
+            'period_ms': self.period_ms,
+            'cost_ms': self.cost_ms,
+            'cpu_share': self.cpu_share(),
+            'cpu_budget': self.cpu_budget,
+            'target_ms': self.target_ms,
+            'expected_latency_ms': self.period_ms + self.cost_ms,
+            'within_budget': self.within_budget(),
+            'analyses': self.analyses,
+            'compliance': self.compliant / self.analyses if self.analyses else 1.0,
+        }
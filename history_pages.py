@@ -0,0 +1,170 @@
+import sys
+import argparse
+import threading
+
+# Firebase needs these indexes for the queries below (database.rules.json):
+#   "detection_logs": { "$uid": { ".indexOn": ["timestamp", "source_ts"] } }
+
+SOURCE_SEP = "|"
+QUERY_END = "\uf8ff"  # sorts after any printable character
+
+def source_index(camera_source, timestamp):
+    """Value of the source_ts field: lets one ordered query filter by camera and sort by time."""
+    return f"{camera_source or 'Unknown'}{SOURCE_SEP}{timestamp or ''}"
+
+# ==========================================
+# CLOUD HISTORY (FIREBASE, PAGED)
+# ==========================================
+class CloudHistoryPager:
+    """
+    Walks detection_logs/{user} newest first, one page per next_page() call.
+
+    Without a camera filter the query is ordered by timestamp, with one it is
+    ordered by source_ts and bounded to that camera's prefix, so the filtering
+    and sorting both happen in the database. Only page_size records (plus the
+    few that share the cursor value) are downloaded per call. Records written
+    before source_ts existed are backfilled the first time a user filters by
+    camera (see ensure_source_index).
+    """
+    def __init__(self, cloud_ref, user_id, camera_source=None, page_size=50):
+        self.logs_ref = cloud_ref.child('detection_logs').child(user_id)
+        self.camera_source = camera_source
+        self.page_size = page_size
+
+        if camera_source:
+            try:
+                ensure_source_index(cloud_ref, user_id)
+            except Exception:
+                pass  # Offline: tried again by the next filtered pager
+            self.field = 'source_ts'
+            self.start = source_index(camera_source, '')
+            self.end = self.start + QUERY_END
+        else:
+            self.field = 'timestamp'
+            self.start = None
+            self.end = None
+
+        self.cursor = None
+        self.seen_at_cursor = set()
+        self.has_more = True
+        self.fetched = 0
+
+    def sort_value(self, data):
+        if self.field == 'source_ts':
+            return data.get('source_ts')
+        return data.get('timestamp')
+
+    def next_page(self):
+        """Returns the next [(plate, data)] page, newest first."""
+        if not self.has_more:
+            return []
+
+        # end_at is inclusive, so over-fetch by the rows already shown at the cursor
+        limit = self.page_size + len(self.seen_at_cursor)
+        query = self.logs_ref.order_by_child(self.field)
+        if self.start is not None:
+            query = query.start_at(self.start)
+        end = self.cursor if self.cursor is not None else self.end
+        if end is not None:
+            query = query.end_at(end)
+        result = query.limit_to_last(limit).get() or {}
+
+        items = [(plate, data) for plate, data in result.items()
+                 if isinstance(data, dict) and plate not in self.seen_at_cursor]
+        items.sort(key=lambda it: (self.sort_value(it[1]) or '', it[0]))
+        page = items[-self.page_size:][::-1]
+        self.fetched += len(result)
+
+        self.has_more = len(result) >= limit and bool(page)
+        if page:
+            oldest = self.sort_value(page[-1][1])
+            if oldest is None:
+                self.has_more = False
+            elif oldest == self.cursor:
+                self.seen_at_cursor.update(p for p, d in page if self.sort_value(d) == oldest)
+            else:
+                self.cursor = oldest
+                self.seen_at_cursor = {p for p, d in page if self.sort_value(d) == oldest}
+        return page
+
+# ==========================================
+# LOCAL HISTORY (DETECTION STORE, PAGED)
+# ==========================================
+class LocalHistoryPager:
+    """Same interface as CloudHistoryPager, served by DetectionStore keyset pages."""
+    def __init__(self, store, user_id, camera_source=None, page_size=50):
+        self.store = store
+        self.user_id = user_id
+        self.camera_source = camera_source
+        self.page_size = page_size
+        self.before = None
+        self.has_more = True
+        self.fetched = 0
+
+    def next_page(self):
+        if not self.has_more:
+            return []
+        records = self.store.query(user_id=self.user_id, camera_source=self.camera_source,
+                                   before=self.before, limit=self.page_size + 1)
+        self.has_more = len(records) > self.page_size
+        records = records[:self.page_size]
+        if records:
+            self.before = (records[-1]['timestamp'], records[-1]['id'])
+        self.fetched += len(records)
+        return [(r['plate_number'], r) for r in records]
+
+# ==========================================
+# MIGRATION
+# ==========================================
+_indexed_users = set()
+_index_lock = threading.Lock()
+
+def ensure_source_index(cloud_ref, user_id):
+    """
+    Runs backfill_source_index once per user and process, and only if needed:
+    records without source_ts sort first, so a one-record query tells whether
+    any is missing. Returns how many records were updated.
+    """
+    with _index_lock:
+        if user_id in _indexed_users:
+            return 0
+        first = cloud_ref.child('detection_logs').child(user_id).order_by_child('source_ts').limit_to_first(1).get() or {}
+        missing = any(isinstance(data, dict) and not data.get('source_ts') for data in first.values())
+        updated = backfill_source_index(cloud_ref, user_id) if missing else 0
+        _indexed_users.add(user_id)
+        return updated
+
+def backfill_source_index(cloud_ref, user_id):
+    """
+    Adds source_ts to records written before it existed, so they show up in
+    camera filtered history. One full read and one multi-path update per user.
+    """
+    logs = cloud_ref.child('detection_logs').child(user_id).get() or {}
+    payload = {}
+    for plate, data in logs.items():
+        if not isinstance(data, dict):
+            continue
+        value = source_index(data.get('camera_source'), data.get('timestamp'))
+        if data.get('source_ts') != value:
+            payload[f"{plate}/source_ts"] = value
+    if payload:
+        cloud_ref.child('detection_logs').child(user_id).update(payload)
+    return len(payload)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add the source_ts index field to existing detection logs")
+    parser.add_argument("--user", action="append", default=None, help="User id (repeatable, default: all users)")
+    args = parser.parse_args(argv)
+
+    from final_system_segmentation import ref
+    if ref is None:
+        print("Firebase is not connected")
+        return 1
+
+    users = args.user or list((ref.child('detection_logs').get(shallow=True) or {}).keys())
+    for user_id in users:
+        print(f"{user_id}: {backfill_source_index(ref, user_id)} records updated")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+import os
+import sys
+import glob
+import shutil
+import argparse
+import numpy as np
+import cv2
+
+# ==========================================
+# BACKEND SELECTION
+# ==========================================
+# 'torch' : stock PyTorch weights (best.pt, color.pt, EasyOCR recognizer)
+# 'onnx'  : ONNX Runtime on the CPU, int8 models made by 'python -m inference_backend export'
+# 'auto'  : torch on a CUDA box, otherwise onnx when the exported models exist, else torch on the CPU
+BACKENDS = ('torch', 'onnx')
+MODEL_NAMES = ('best', 'color')
+OCR_MODEL_NAME = 'ocr_recognizer'
+
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS  # PyInstaller temp folder
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+def cuda_available():
+    try:
+        import torch
+    except ImportError:
+        return False
+    try:
+        return torch.cuda.is_available()
+    except Exception:
+        return False
+
+def onnxruntime_available():
+    try:
+        import onnxruntime # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def detect_device(device='auto'):
+    """'auto' -> 'cuda' if a usable GPU is present, otherwise 'cpu'."""
+    if device in (None, 'auto'):
+        return 'cuda' if cuda_available() else 'cpu'
+    if device.startswith('cuda') and not cuda_available():
+        return 'cpu'
+    return device
+
+def onnx_path(name, int8=True):
+    """Path of the exported model, preferring the int8 one. None if it was never exported."""
+    candidates = [f"{name}.int8.onnx", f"{name}.onnx"] if int8 else [f"{name}.onnx"]
+    for candidate in candidates:
+        path = resource_path(candidate)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def session_info(path):
+    """
+    (custom metadata, fixed batch size or None if the batch is dynamic) of a model
+    ONNX Runtime's CPU provider can load, None if it cannot (an op has no kernel).
+    """
+    try:
+        import onnxruntime as ort
+        session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+    except Exception:
+        return None
+    batch = session.get_inputs()[0].shape[0]
+    return session.get_modelmeta().custom_metadata_map, batch if isinstance(batch, int) else None
+
+def session_loads(path):
+    return session_info(path) is not None
+
+def loadable_onnx_path(name, static_only=False):
+    """
+    onnx_path(), but an int8 model the CPU provider cannot load (e.g. ConvInteger
+    from an older dynamic export) falls back to the fp32 one. With static_only an
+    int8 model that was not statically calibrated (for a conv net that is fp32
+    convolutions under an int8 name) falls back as well.
+    """
+    path = onnx_path(name)
+    if path is None or not path.endswith(".int8.onnx"):
+        return path
+    info = session_info(path)
+    if info is None or (static_only and info[0].get('int8') != 'static'):
+        # print(f"{path} does not load or is not calibrated, using the fp32 model")
+        return onnx_path(name, int8=False) or (path if info is not None else None)
+    return path
+
+def resolve_backend(backend='auto', device='auto'):
+    """Returns the (backend, device) that will actually be used."""
+    device = detect_device(device)
+    if backend in (None, 'auto'):
+        if device == 'cpu' and onnxruntime_available() and all(onnx_path(n) for n in MODEL_NAMES):
+            return 'onnx', 'cpu'
+        return 'torch', device
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if backend == 'onnx':
+        return 'onnx', 'cpu'
+    return 'torch', device
+
+# ==========================================
+# YOLO WRAPPER
+# ==========================================
+class YoloModel:
+    """
+    Detector / classifier behind one predict() call, so the pipeline sees the
+    same ultralytics Results whatever runs underneath. Ultralytics loads .onnx
+    weights through ONNX Runtime itself; we only pick the file and device.
+    """
+    def __init__(self, name, backend='torch', device='cpu', task=None):
+        from ultralytics import YOLO
+
+        self.name = name
+        self.backend = backend
+        self.device = device
+        self.batch_size = None  # Frames one predict() call can take, None = any
+        if backend == 'onnx':
+            path = loadable_onnx_path(name, static_only=True)
+            if path is None:
+                raise FileNotFoundError(f"{name}.onnx not found, run 'python -m inference_backend export' first")
+            self.path = path
+            self.model = YOLO(path, task=task)
+            # Models exported before dynamic=True have their batch fixed at 1
+            info = session_info(path)
+            self.batch_size = info[1] if info is not None else None
+        else:
+            self.path = resource_path(f"{name}.pt")
+            self.model = YOLO(self.path)
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def predict(self, source, **kwargs):
+        kwargs.setdefault('device', self.device)
+        return self.model.predict(source, **kwargs)
+
+    def __call__(self, source, **kwargs):
+        return self.predict(source, **kwargs)
+
+# ==========================================
+# OCR RECOGNIZER ON ONNX RUNTIME
+# ==========================================
+class OnnxRecognizer:
+    """
+    Drop-in for easyocr's torch recognizer module: EasyOCR calls model.eval()
+    and model(image, text) and post-processes the returned tensor, so only the
+    forward pass moves to ONNX Runtime, CTC decoding stays in EasyOCR.
+    """
+    def __init__(self, path, threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def eval(self):
+        return self
+
+    def to(self, device):
+        return self
+
+    def __call__(self, image, text=None):
+        import torch
+
+        feeds = {self.input_names[0]: image.detach().cpu().numpy().astype(np.float32)}
+        if len(self.input_names) > 1 and text is not None:
+            feeds[self.input_names[1]] = text.detach().cpu().numpy().astype(np.int64)
+        return torch.from_numpy(self.session.run(None, feeds)[0])
+
+def load_reader(backend='torch', device='cpu'):
+    """EasyOCR Reader on the device; with the onnx backend its recognizer runs on ONNX Runtime."""
+    import easyocr
+
+    # ADDED verbose=False to silence EasyOCR
+    reader = easyocr.Reader(['en'], gpu=device.startswith('cuda'), verbose=False)
+    if backend == 'onnx':
+        path = loadable_onnx_path(OCR_MODEL_NAME)
+        if path is not None:
+            reader.recognizer = OnnxRecognizer(path)
+    return reader
+
+# ==========================================
+# EXPORT / QUANTIZATION
+# ==========================================
+def letterbox(img, size):
+    h, w = img.shape[:2]
+    scale = min(size / h, size / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - nh) // 2, (size - nw) // 2
+    canvas[top:top + nh, left:left + nw] = cv2.resize(img, (nw, nh))
+    return canvas
+
+class ImageCalibrationReader:
+    """Feeds calibration images (letterboxed, RGB, CHW, 0..1) to onnxruntime static quantization."""
+    def __init__(self, folder, input_name, size, limit=200):
+        files = sorted(glob.glob(os.path.join(folder, "*.jpg")) + glob.glob(os.path.join(folder, "*.png")))[:limit]
+        self.input_name = input_name
+        self.size = size
+        self.files = iter(files)
+
+    def get_next(self):
+        for path in self.files:
+            img = cv2.imread(path)
+            if img is None:
+                continue
+            blob = cv2.cvtColor(letterbox(img, self.size), cv2.COLOR_BGR2RGB).transpose(2, 0, 1)[None]
+            return {self.input_name: blob.astype(np.float32) / 255.0}
+        return None
+
+    def rewind(self):
+        pass
+
+def copy_metadata(src_path, dst_path, extra=None):
+    """Quantization drops metadata_props, ultralytics needs them (class names, stride, imgsz)."""
+    import onnx
+
+    src = onnx.load(src_path)
+    dst = onnx.load(dst_path)
+    del dst.metadata_props[:]
+    for prop in src.metadata_props:
+        dst.metadata_props.add(key=prop.key, value=prop.value)
+    for key, value in (extra or {}).items():
+        dst.metadata_props.add(key=key, value=value)
+    onnx.save(dst, dst_path)
+
+def quantize_int8(fp32_path, int8_path, calib_dir=None, input_size=None):
+    """
+    int8 weights. With calibration images activations are quantized too (static
+    QDQ, best speedup for conv nets); without them only the weights of
+    MatMul / Gemm / LSTM (dynamic). Dynamic int8 convolutions become ConvInteger,
+    which the CPU provider has no kernel for, so convolutions stay fp32 there.
+    The kind is recorded in the 'int8' metadata ('static' or 'dynamic'). If the
+    result still does not load, the int8 file is removed and the fp32 path is
+    returned.
+    """
+    from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantType, QuantFormat
+    import onnxruntime as ort
+
+    static = bool(calib_dir and input_size)
+    if static:
+        input_name = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+        quantize_static(fp32_path, int8_path, ImageCalibrationReader(calib_dir, input_name, input_size),
+                        quant_format=QuantFormat.QDQ, weight_type=QuantType.QInt8, activation_type=QuantType.QUInt8)
+    else:
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8,
+                         op_types_to_quantize=['MatMul', 'Gemm', 'LSTM'])
+    copy_metadata(fp32_path, int8_path, {'int8': 'static' if static else 'dynamic'})
+    if not session_loads(int8_path):
+        os.remove(int8_path)
+        return fp32_path
+    return int8_path
+
+def export_yolo(name, imgsz=None, int8=True, calib_dir=None):
+    from ultralytics import YOLO
+
+    model = YOLO(resource_path(f"{name}.pt"))
+    imgsz = imgsz or model.overrides.get('imgsz') or 640
+    # Dynamic batch: the multi-camera host stacks several frames into one predict()
+    exported = model.export(format='onnx', imgsz=imgsz, simplify=True, dynamic=True, device='cpu')
+    fp32_path = resource_path(f"{name}.onnx")
+    if os.path.abspath(exported) != os.path.abspath(fp32_path):
+        shutil.move(exported, fp32_path)
+    int8_path = resource_path(f"{name}.int8.onnx")
+    if not int8:
+        return fp32_path
+    if not calib_dir:
+        # Dynamic int8 only covers MatMul / Gemm, a conv net would stay fp32 under an int8 name
+        if os.path.isfile(int8_path):
+            os.remove(int8_path)
+        print(f"{name}: no --calib frames, keeping the fp32 model (int8 needs static calibration)")
+        return fp32_path
+    return quantize_int8(fp32_path, int8_path, calib_dir, imgsz)
+
+def export_ocr(int8=True):
+    """Exports EasyOCR's recognizer (VGG/ResNet + BiLSTM, CTC) with dynamic batch and width."""
+    import torch
+    import easyocr
+
+    reader = easyocr.Reader(['en'], gpu=False, verbose=False)
+    model = reader.recognizer
+    model = getattr(model, 'module', model)  # unwrap DataParallel
+    model.eval()
+
+    fp32_path = resource_path(f"{OCR_MODEL_NAME}.onnx")
+    image = torch.zeros(1, 1, 64, 256)
+    text = torch.zeros(1, 1, dtype=torch.long)
+    torch.onnx.export(model, (image, text), fp32_path, input_names=['image', 'text'], output_names=['preds'],
+                      dynamic_axes={'image': {0: 'batch', 3: 'width'}, 'text': {0: 'batch'},
+                                    'preds': {0: 'batch', 1: 'steps'}},
+                      opset_version=17)
+    if not int8:
+        return fp32_path
+    # Recurrent layers quantize well without calibration
+    return quantize_int8(fp32_path, resource_path(f"{OCR_MODEL_NAME}.int8.onnx"))
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inference backends: show selection, export int8 ONNX models")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_info = sub.add_parser("info", help="Show the device and backend that 'auto' resolves to")
+    p_info.add_argument("--backend", default="auto", choices=('auto',) + BACKENDS)
+    p_info.add_argument("--device", default="auto")
+
+    p_exp = sub.add_parser("export", help="Export best.pt / color.pt (and the OCR recognizer) to int8 ONNX")
+    p_exp.add_argument("--models", nargs="+", default=list(MODEL_NAMES))
+    p_exp.add_argument("--no-ocr", action="store_true", help="Skip the EasyOCR recognizer")
+    p_exp.add_argument("--no-int8", action="store_true", help="Keep fp32 ONNX only")
+    p_exp.add_argument("--imgsz", type=int, default=None, help="Input size (default: the model's training size)")
+    p_exp.add_argument("--calib", default=None, help="Folder of frames for static int8 calibration of the YOLO models")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        backend, device = resolve_backend(args.backend, args.device)
+        print(f"CUDA available:        {cuda_available()}")
+        print(f"onnxruntime available: {onnxruntime_available()}")
+        for name in MODEL_NAMES + (OCR_MODEL_NAME,):
+            print(f"{name + '.onnx':<22} {onnx_path(name) or '-'}")
+        print(f"Selected:              backend={backend} device={device}")
+        return 0
+
+    for name in args.models:
+        print(f"Exporting {name} -> {export_yolo(name, args.imgsz, not args.no_int8, args.calib)}")
+    if not args.no_ocr:
+        print(f"Exporting OCR recognizer -> {export_ocr(not args.no_int8)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import importlib
+import threading
+
+# ==========================================
+# LAZY MODULES
+# ==========================================
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access,
+    so heavy packages (cv2, the detection pipeline, the ML stack) do not slow
+    down the import of whoever references them.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+def lazy_module(name):
+    return LazyModule(name)
+
+def preload(*modules, on_done=None):
+    """
+    Imports lazy modules on a background thread (e.g. while the login screen is
+    shown), so the first real use does not pay for it. Returns the thread.
+    """
+    def worker():
+        for module in modules:
+            try:
+                module._load()
+            except Exception as e:
+                pass # print(f"Preload failed for {module._name}: {e}")
+        if on_done is not None:
+            on_done()
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
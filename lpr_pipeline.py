@@ -0,0 +1,825 @@
+import cv2
+import datetime
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from tracker import IoUTracker, box_center, box_area, box_intersection
+from motion_gate import MotionGate
+from roi import DetectionROI, load_rois
+from frame_scheduler import AnalysisScheduler
+from plate_dedup import PlateDedup
+from plate_vote import PlateVote, PlateReading
+from metrics import metrics
+from plate_ocr import PlateRecognizer
+from plate_normalizer import normalizer
+from record_writer import RecordWriter, WriteJob
+from history_pages import source_index
+
+# ==========================================
+# GLOBAL SETTINGS MANAGER
+# ==========================================
+class SystemConfig:
+    KNOWN_WIDTH = 1.8  # Avg car width in meters
+    FOCAL_LENGTH = 500 # Default calibration
+    TRIGGER_LINE_RATIO = 0.75 # Position of line (0.75 = 75% down)
+    CONFIDENCE_THRESHOLD = 0.50
+    LINE_OPACITY = 0.5
+    OCR_MODE = "readtext" # "readtext" (CRAFT + recognizer) or "recognize" (batched, no CRAFT)
+    INFERENCE_BACKEND = "auto" # "auto", "torch" or "onnx" (int8 ONNX Runtime, see inference_backend.py)
+    DEVICE = "auto" # "auto" (GPU if present), "cpu" or "cuda"
+    DISPLAY_FPS = 30 # Upper bound for redrawing the video in the dashboards, independent of processing
+    CAPTURE_POLICY = "demand" # Which grabbed frames get decoded, see camera_stream.SkipPolicy
+    CAMERA_CAPTURE_POLICIES = {} # Per-camera overrides: {source: policy}
+    MOTION_THRESHOLD = 0.5 # % of the trigger band that must change for the detector to run (0 = always run)
+    MOTION_BAND = 150 # Pixels above / below the trigger line watched by the motion gate
+    CAMERA_MOTION_THRESHOLDS = {} # Per-camera overrides: {source: threshold}
+    DETECTION_ROI = "full" # What the detector sees: "full", "band" or a polygon, see roi.py
+    ROI_MARGIN = 160 # Rows above / below the trigger line in "band" mode
+    CAMERA_ROIS = {} # Per-camera overrides: {source: spec}, saved by the ROI editor
+    TARGET_LATENCY_MS = 250 # A vehicle should be analysed within this time of appearing
+    CPU_BUDGET = 0.5 # Share of one core (or GPU) the analysis of one camera may use
+    MIN_ANALYSIS_MS = 33 # Never analyse more often than this
+    IDLE_ANALYSIS_MS = 1000 # Slowest analysis rate on an empty road
+    FIXED_ANALYSIS_MS = 0 # > 0 analyses at this fixed period instead (benchmarks)
+    CAMERA_BUDGETS = {} # Per-camera overrides: {source: {'target_ms': ..., 'cpu_budget': ...}}
+    METRICS_PORT = int(os.environ.get("LPR_METRICS_PORT", "0") or 0) # Prometheus endpoint on localhost (0 = off)
+    SHOW_METRICS_OVERLAY = False # Per-stage latencies drawn over the live video
+    COOLDOWN_SECONDS = 15 # A saved plate is not saved again by the same camera within this time
+    DEDUP_MAX_DISTANCE = 1 # Reads this many characters away from a recently saved plate count as that plate
+    VOTE_THRESHOLD = 0.65 # Support the fused plate of a track needs before it is saved, see plate_vote.py
+
+    @classmethod
+    def get_trigger_y(cls, frame_height):
+        return int(frame_height * cls.TRIGGER_LINE_RATIO)
+
+    @classmethod
+    def capture_policy_for(cls, source):
+        return cls.CAMERA_CAPTURE_POLICIES.get(str(source), cls.CAPTURE_POLICY)
+
+    @classmethod
+    def motion_threshold_for(cls, source):
+        return cls.CAMERA_MOTION_THRESHOLDS.get(str(source), cls.MOTION_THRESHOLD)
+
+    @classmethod
+    def budget_for(cls, source):
+        """(target latency ms, cpu budget) of a camera."""
+        budget = cls.CAMERA_BUDGETS.get(str(source), {})
+        return budget.get('target_ms', cls.TARGET_LATENCY_MS), budget.get('cpu_budget', cls.CPU_BUDGET)
+
+    @classmethod
+    def roi_for(cls, source):
+        return cls.CAMERA_ROIS.get(str(source), cls.DETECTION_ROI)
+
+# ==========================================
+# HELPER FUNCTIONS
+# ==========================================
+def estimate_distance_and_size(box_width, box_height):
+    if box_width == 0: return 0.0, 0.0
+    distance_meters = (SystemConfig.KNOWN_WIDTH * SystemConfig.FOCAL_LENGTH) / box_width
+    real_height_meters = (box_height * distance_meters) / SystemConfig.FOCAL_LENGTH
+    return distance_meters, real_height_meters
+
+def preprocess_plate(img):
+    img = cv2.resize(img, None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    kernel = np.array([[0, -1, 0],
+                       [-1, 5, -1],
+                       [0, -1, 0]])
+    sharpened = cv2.filter2D(gray, -1, kernel)
+    return sharpened
+
+def auto_correct_plate(text):
+    """Corrected plate for a raw OCR string (standard or vanity), see plate_normalizer.py."""
+    return normalizer.normalize(text)
+
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS  # PyInstaller temp folder
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+def default_backup_path():
+    return os.path.join(os.path.expanduser("~"), "Downloads", "SmartLPR_Backup")
+
+def backup_paths(save_dir=None):
+    """
+    Returns (backup folder, image folder, CSV export file, cloud spool, detection store)
+    for a save_dir (default ~/Downloads/SmartLPR_Backup).
+    """
+    download_path = save_dir or default_backup_path()
+    return (download_path,
+            os.path.join(download_path, "captured_images"),
+            os.path.join(download_path, 'car_plate_records.csv'),
+            os.path.join(download_path, 'cloud_spool.db'),
+            os.path.join(download_path, 'detections.db'))
+
+# ==========================================
+# DETECTION EVENTS
+# ==========================================
+class DetectionEvent:
+    """Structured result emitted by the pipeline. kind is 'saved' or 'manual'."""
+    def __init__(self, kind, time_obj, plate, conf, color, dist, height, camera_source, note=""):
+        self.kind = kind
+        self.time = time_obj
+        self.plate = plate
+        self.conf = conf
+        self.color = color
+        self.dist = dist
+        self.height = height
+        self.camera_source = camera_source
+        self.note = note
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'timestamp': self.time.strftime("%Y-%m-%d %H:%M:%S"),
+            'camera_source': self.camera_source,
+            'plate_number': self.plate,
+            'confidence': float(f"{self.conf:.2f}"),
+            'color': self.color,
+            'distance_m': float(f"{self.dist:.2f}"),
+            'height_m': float(f"{self.height:.2f}"),
+            'note': self.note
+        }
+
+    def __repr__(self):
+        return f"DetectionEvent({self.kind}, {self.plate}, conf={self.conf:.2f}, color={self.color})"
+
+# ==========================================
+# SHARED MODEL SET
+# ==========================================
+class ModelSet:
+    """
+    One detector, color classifier and OCR reader. A single ModelSet can be
+    shared by any number of LPRPipeline instances (one per camera).
+
+    backend/device default to SystemConfig; gpu=False forces the CPU. The
+    actual choice is made in load() (see inference_backend.resolve_backend).
+    """
+    def __init__(self, gpu=True, ocr_mode=None, backend=None, device=None):
+        self.gpu = gpu
+        self.ocr_mode = ocr_mode or SystemConfig.OCR_MODE
+        self.backend = backend or SystemConfig.INFERENCE_BACKEND
+        self.device = device or ('cpu' if gpu is False else SystemConfig.DEVICE)
+        self.detector = None
+        self.color_model = None
+        self.reader = None
+        self.plate_reader = None
+        self.timings = {}   # model name -> {'load_ms', 'warmup_ms'}
+
+    def load(self):
+        # Heavy imports live here so the module can be imported without the ML stack
+        t0 = time.perf_counter()
+        from inference_backend import resolve_backend, YoloModel, load_reader
+        self.backend, self.device = resolve_backend(self.backend, self.device)
+        self.gpu = self.device.startswith('cuda')
+        self.timings['imports'] = {'load_ms': (time.perf_counter() - t0) * 1000.0}
+
+        t0 = time.perf_counter()
+        self.detector = YoloModel("best", self.backend, self.device, task='detect')
+        self.timings['detector'] = {'load_ms': (time.perf_counter() - t0) * 1000.0}
+
+        t0 = time.perf_counter()
+        self.color_model = YoloModel("color", self.backend, self.device, task='classify')
+        self.timings['color'] = {'load_ms': (time.perf_counter() - t0) * 1000.0}
+
+        t0 = time.perf_counter()
+        self.reader = load_reader(self.backend, self.device)
+        self.plate_reader = PlateRecognizer(self.reader, mode=self.ocr_mode)
+        self.timings['ocr'] = {'load_ms': (time.perf_counter() - t0) * 1000.0}
+        return self
+
+    def warmup(self):
+        """
+        One dummy inference per model so CUDA kernels, fused layers and OCR
+        buffers are set up before the first real frame arrives.
+        """
+        frame = np.zeros((LPRPipeline.FRAME_SIZE[1], LPRPipeline.FRAME_SIZE[0], 3), dtype=np.uint8)
+        car = np.zeros((224, 224, 3), dtype=np.uint8)
+        plate = np.full((60, 200), 255, dtype=np.uint8)
+        cv2.putText(plate, "ABC1234", (8, 42), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+
+        steps = [
+            ('detector', lambda: self.detect(frame)),
+            ('color', lambda: self.color_model.predict(car, verbose=False)),
+            ('ocr', lambda: self.plate_reader.read_batch([plate])),
+        ]
+        for name, step in steps:
+            t0 = time.perf_counter()
+            step()
+            self.timings.setdefault(name, {})['warmup_ms'] = (time.perf_counter() - t0) * 1000.0
+        return self
+
+    def detect(self, frames, imgsz=None):
+        """Runs the plate/car detector on one frame or a list of frames (one Results per frame)."""
+        kwargs = {}
+        # Exported ONNX models have a fixed input size, only torch runs at the ROI size
+        if imgsz is not None and self.backend == 'torch':
+            kwargs['imgsz'] = list(imgsz)
+        # A model with a fixed batch (older static ONNX export) gets the frames in batches it accepts
+        size = getattr(self.detector, 'batch_size', None)
+        if size and isinstance(frames, list) and len(frames) > size:
+            results = []
+            for i in range(0, len(frames), size):
+                results.extend(self.detector.predict(frames[i:i + size], conf=SystemConfig.CONFIDENCE_THRESHOLD,
+                                                     verbose=False, **kwargs))
+            return results
+        return self.detector.predict(frames, conf=SystemConfig.CONFIDENCE_THRESHOLD, verbose=False, **kwargs)
+
+# ==========================================
+# HEADLESS DETECTION ENGINE
+# ==========================================
+class LPRPipeline:
+    """
+    UI-free YOLO -> color -> EasyOCR -> voting -> save engine for one camera.
+    Feed it BGR numpy frames with process_frame(); it returns the annotated
+    frame and a list of DetectionEvent for anything that was saved.
+
+    The stages are also exposed separately (prepare_frame, associate_results,
+    finish_results, draw_detections) so a host can batch the detector and the
+    OCR across several cameras.
+    """
+    FRAME_SIZE = (640, 640)
+    TRIGGER_BAND = 100          # Plates are only read within +/- this many px of the line
+    OCR_RECHECK_CONF = 0.85     # Cached plate reads below this are read again
+    COLOR_RECHECK_CONF = 0.60   # Cached colors below this are classified again
+
+    def __init__(self, camera_source="", user_id=None, cloud_ref=None, save_dir=None, save_records=True, gpu=True,
+                 models=None, writer=None):
+        self.camera_source = camera_source
+        self.user_id = user_id
+        self.cloud_ref = cloud_ref
+        self.save_records = save_records
+        self.gpu = gpu
+        self.models = models
+
+        self.download_path, self.img_folder, self.csv_filename, self.spool_path, self.store_path = backup_paths(save_dir)
+        if self.save_records:
+            self.init_backup_folder()
+        if not SystemConfig.CAMERA_ROIS:
+            SystemConfig.CAMERA_ROIS.update(load_rois(self.download_path))
+
+        # Store / image / cloud writes happen on the writer thread, a host may share one writer between cameras
+        self.owns_writer = writer is None and self.save_records
+        if self.owns_writer:
+            self.writer = RecordWriter(self.store_path, self.img_folder, spool_path=self.spool_path, cloud_ref=cloud_ref)
+        else:
+            self.writer = writer
+
+        self.init_logic_variables()
+
+    def load_models(self):
+        """Takes the process-wide shared ModelSet (loaded and warmed up once)."""
+        if self.models is None:
+            from model_registry import get_models
+            self.models = get_models(gpu=self.gpu)
+        return self
+
+    @property
+    def detector(self):
+        return self.models.detector
+
+    @property
+    def color_model(self):
+        return self.models.color_model
+
+    @property
+    def reader(self):
+        return self.models.reader
+
+    def init_backup_folder(self):
+        os.makedirs(self.img_folder, exist_ok=True)
+
+    def init_logic_variables(self):
+        self.frame_count = 0
+        self.current_detections = []
+        self.last_known_color = "Unknown"; self.last_known_dist = 0.0; self.last_known_height = 0.0
+        self.last_saved_plate_key = None
+        self.current_clean_frame = None
+
+        # Tracks keep OCR / color results per vehicle so they are computed once
+        self.car_tracker = IoUTracker()
+        self.plate_tracker = IoUTracker()
+        self.ocr_calls = 0
+        self.color_calls = 0
+        self.commits = 0
+        self.commit_reads = 0
+
+        # Skips the detector while nothing moves around the trigger line
+        self.motion_gate = MotionGate(SystemConfig.motion_threshold_for(self.camera_source), SystemConfig.MOTION_BAND)
+
+        # Part of the frame the detector sees; boxes are shifted back by roi_offset
+        self.roi = DetectionROI(SystemConfig.roi_for(self.camera_source), SystemConfig.ROI_MARGIN)
+        self.roi_offset = (0, 0)
+        self.roi_shape = None
+        self.full_passes = 0
+
+        # Picks the analysis rate from the measured cost, the latency target and the compute budget
+        target_ms, cpu_budget = SystemConfig.budget_for(self.camera_source)
+        self.scheduler = AnalysisScheduler(target_ms, cpu_budget, SystemConfig.MIN_ANALYSIS_MS,
+                                           SystemConfig.IDLE_ANALYSIS_MS, SystemConfig.FIXED_ANALYSIS_MS)
+        self.frame_ts = 0.0
+
+        # Recently saved plates with their own cooldown, other vehicles are saved back to back
+        self.dedup = PlateDedup(SystemConfig.COOLDOWN_SECONDS, SystemConfig.DEDUP_MAX_DISTANCE)
+
+    def process_frame(self, frame, timestamp=None):
+        """Resize, detect, vote and save. Returns (annotated_frame, events)."""
+        frame, analyse = self.prepare_frame(frame, timestamp)
+        events = []
+        if analyse:
+            t0 = time.perf_counter()
+            crop, imgsz = self.detection_input(frame)
+            with metrics.timer('detect', self.camera_source):
+                results = self.models.detect(crop, imgsz)
+            self.handle_results(frame, results, events)
+            self.finish_analysis((time.perf_counter() - t0) * 1000.0)
+        self.draw_detections(frame)
+        return frame, events
+
+    def prepare_frame(self, frame, timestamp=None):
+        """
+        Resizes and draws the trigger line. Returns (frame, analyse) where analyse
+        says if the detector is due. timestamp is the capture (or media) time in
+        seconds, the scheduler uses the wall clock without it.
+        """
+        t0 = time.perf_counter()
+        self.frame_count += 1
+        self.frame_ts = timestamp if timestamp is not None else t0
+        metrics.inc('frames', camera=self.camera_source)
+        frame = cv2.resize(frame, self.FRAME_SIZE)
+        h_img, w_img, _ = frame.shape
+        line_y = SystemConfig.get_trigger_y(h_img)
+
+        self.current_clean_frame=frame.copy()
+        overlay = frame.copy()
+        cv2.line(frame, (0, line_y), (w_img, line_y), (0, 100, 255), 2)
+        alpha = SystemConfig.LINE_OPACITY
+        cv2.addWeighted(frame, alpha, overlay, 1 - alpha, 0, frame)
+
+        analyse = self.scheduler.due(self.frame_ts)
+        if analyse:
+            # Settings can change while running; vehicles still tracked keep the gate open
+            self.motion_gate.threshold = SystemConfig.motion_threshold_for(self.camera_source)
+            self.motion_gate.band = SystemConfig.MOTION_BAND
+            busy = bool(self.car_tracker.tracks or self.plate_tracker.tracks)
+            analyse = self.motion_gate.allow(self.current_clean_frame, line_y, busy)
+            if not analyse:
+                self.scheduler.idle(self.frame_ts)
+        metrics.observe('prepare', (time.perf_counter() - t0) * 1000.0, self.camera_source)
+        return frame, analyse
+
+    def finish_analysis(self, cost_ms):
+        """Reports the cost of the analysis of the current frame to the scheduler (hosts that batch call this too)."""
+        s = self.scheduler
+        s.target_ms, s.cpu_budget = SystemConfig.budget_for(self.camera_source)
+        s.min_ms, s.idle_ms = SystemConfig.MIN_ANALYSIS_MS, SystemConfig.IDLE_ANALYSIS_MS
+        s.fixed_ms = SystemConfig.FIXED_ANALYSIS_MS
+        line_y = SystemConfig.get_trigger_y(self.FRAME_SIZE[1])
+        s.analysed(self.frame_ts, cost_ms, self.vehicle_approaching(line_y), bool(self.current_detections))
+        metrics.observe('analysis', cost_ms, self.camera_source)
+
+    def vehicle_approaching(self, line_y):
+        """A vehicle seen in the last analysis is inside the trigger band or moving towards the line."""
+        for track in self.car_tracker.tracks + self.plate_tracker.tracks:
+            if track.misses:
+                continue
+            cy, dy = track.center[1], track.velocity[1]
+            if abs(cy - line_y) < self.TRIGGER_BAND or abs(cy + dy - line_y) < abs(cy - line_y):
+                return True
+        return False
+
+    def detection_input(self, frame):
+        """Returns (detector input, imgsz) for a prepared frame and remembers its offset for associate_results."""
+        self.roi.spec = SystemConfig.roi_for(self.camera_source)
+        self.roi.margin = SystemConfig.ROI_MARGIN
+        crop, self.roi_offset = self.roi.crop(frame, SystemConfig.get_trigger_y(frame.shape[0]))
+        self.roi_shape = crop.shape[:2]
+        return crop, self.roi.imgsz(crop)
+
+    def full_car_boxes(self, frame, car_boxes):
+        """
+        Car boxes with the ones the ROI cut replaced by their box from one detector
+        pass over the full frame, so distance, height and color see the whole car.
+        Only plates are limited to the ROI.
+        """
+        if self.roi_shape is None:
+            return car_boxes
+        cut = [self.roi.cuts(box, self.roi_offset, self.roi_shape, frame.shape) for box in car_boxes]
+        if not any(cut):
+            return car_boxes
+        try:
+            with metrics.timer('detect_full', self.camera_source):
+                result = self.models.detect([frame])[0]
+            self.full_passes += 1
+            full = [tuple(map(int, box.xyxy[0])) for box in result.boxes if int(box.cls[0]) == 0]
+        except:
+            # print("Full frame pass failed, keeping the ROI boxes")
+            return car_boxes
+
+        boxes = []
+        for box, is_cut in zip(car_boxes, cut):
+            match = max(full, key=lambda f: box_intersection(box, f), default=None) if is_cut else None
+            # The full box must hold most of the cut one, otherwise it is another car
+            if match is not None and box_intersection(box, match) >= 0.5 * box_area(box):
+                box = match
+            boxes.append(box)
+        return boxes
+
+    def analysis_due(self, timestamp=None):
+        """True if a frame captured at timestamp would be considered for the detector."""
+        return self.scheduler.due(timestamp if timestamp is not None else time.perf_counter())
+
+    def skip_frame(self):
+        """Counts a frame that was grabbed but never decoded."""
+        self.frame_count += 1
+
+    def handle_results(self, frame, results, events):
+        """Color / OCR / voting / save for detector results that belong to this camera's frame."""
+        jobs = self.associate_results(frame, results)
+        if jobs:
+            with metrics.timer('ocr', self.camera_source):
+                readings = self.models.plate_reader.read_batch([crop for _, crop, _ in jobs])
+        else:
+            readings = []
+        self.finish_results(frame, jobs, readings, events)
+
+    def associate_results(self, frame, results):
+        """Tracks the boxes and classifies car colors. Returns plate OCR jobs as [(track, clean_crop, crossed)]."""
+        h_img = frame.shape[0]
+        line_y = SystemConfig.get_trigger_y(h_img)
+
+        self.current_detections = []
+        self.band_plates = []
+
+        car_boxes, plate_boxes = [], []
+        ox, oy = self.roi_offset
+        for result in results:
+            for box in result.boxes:
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                x1, y1, x2, y2 = x1 + ox, y1 + oy, x2 + ox, y2 + oy
+                cls_id = int(box.cls[0])
+                if cls_id == 0: car_boxes.append((x1, y1, x2, y2))
+                elif cls_id == 1: plate_boxes.append((x1, y1, x2, y2))
+
+        car_boxes = self.full_car_boxes(frame, car_boxes)
+        metrics.inc('detections', len(car_boxes) + len(plate_boxes), self.camera_source)
+        car_tracks = self.car_tracker.update(car_boxes)
+        plate_tracks = self.plate_tracker.update(plate_boxes)
+
+        cars = []
+        for (x1, y1, x2, y2), track in zip(car_boxes, car_tracks): # Car
+            w_box, h_box = x2-x1, y2-y1
+            dist, real_h = estimate_distance_and_size(w_box, h_box)
+            self.last_known_dist = dist
+            self.last_known_height = real_h
+
+            if w_box > 50 and (track.color is None or track.color_conf < self.COLOR_RECHECK_CONF):
+                try:
+                    car_crop = frame[y1:y2, x1:x2]
+                    with metrics.timer('color', self.camera_source):
+                        color_res = self.color_model.predict(car_crop, conf=SystemConfig.CONFIDENCE_THRESHOLD, verbose=False)
+                    track.color = color_res[0].names[color_res[0].probs.top1]
+                    track.color_conf = float(color_res[0].probs.top1conf)
+                    track.color_calls += 1
+                    self.color_calls += 1
+                except: pass
+            if track.color:
+                self.last_known_color = track.color
+            cars.append(((x1, y1, x2, y2), (track.color or "Unknown", dist, real_h)))
+
+            self.current_detections.append([x1,y1,x2,y2, 0, f"{self.last_known_color}", dist])
+
+        jobs = []
+        for (x1, y1, x2, y2), track in zip(plate_boxes, plate_tracks): # Plate
+            crossed = track.check_crossing(line_y)
+            cy = (y1 + y2) // 2
+            if not (line_y - self.TRIGGER_BAND) < cy < (line_y + self.TRIGGER_BAND):
+                continue
+            self.band_plates.append(((x1, y1, x2, y2), track))
+            vehicle = self.vehicle_for((x1, y1, x2, y2), cars)
+            if vehicle is not None:
+                track.vehicle = vehicle
+
+            # Read again until the vote of the track has committed; after that reuse the cached read
+            # unless it is weak or the car just crossed the line
+            voting = track.vote is None or not track.vote.committed
+            if voting or track.ocr_text is None or track.ocr_conf < self.OCR_RECHECK_CONF or crossed:
+                with metrics.timer('preprocess', self.camera_source):
+                    clean = preprocess_plate(frame[y1:y2, x1:x2])
+                jobs.append((track, clean, crossed))
+        return jobs
+
+    @staticmethod
+    def vehicle_for(plate_box, cars):
+        """(color, dist, height) of the smallest car box holding the plate's center, or None."""
+        cx, cy = box_center(plate_box)
+        holding = [(box, vehicle) for box, vehicle in cars if box[0] <= cx <= box[2] and box[1] <= cy <= box[3]]
+        if not holding:
+            return None
+        return min(holding, key=lambda item: (item[0][2] - item[0][0]) * (item[0][3] - item[0][1]))[1]
+
+    def finish_results(self, frame, jobs, readings, events):
+        """Applies the OCR readings for the jobs from associate_results, then votes and saves."""
+        if jobs:
+            metrics.inc('ocr_calls', len(jobs), self.camera_source)
+        for (track, _, crossed), raw in zip(jobs, readings):
+            track.ocr_calls += 1
+            self.ocr_calls += 1
+            reading = self.normalize_reading(raw) if raw else None
+            if reading and (crossed or reading[1] >= track.ocr_conf):
+                track.ocr_text, track.ocr_conf = reading
+            if reading:
+                if track.vote is None:
+                    track.vote = PlateVote(SystemConfig.VOTE_THRESHOLD)
+                # The car this plate sits in, not whichever car was processed last
+                color, dist, height = track.vehicle or ("Unknown", 0.0, 0.0)
+                track.vote.add(PlateReading(reading[0], reading[1], color, dist, height, self.current_clean_frame))
+
+        for (x1, y1, x2, y2), track in self.band_plates:
+            if track.ocr_text:
+                self.current_detections.append([x1,y1,x2,y2, 1, track.ocr_text, 0])
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0,0,255), 3)
+
+            # SAVE LOGIC: each track commits once, as soon as its fused plate is certain enough
+            decision = track.vote.decide() if track.vote is not None else None
+            if decision is None:
+                continue
+            plate, support, best = decision
+            self.commits += 1
+            self.commit_reads += len(track.vote.readings)
+            self.dedup.set_window(SystemConfig.COOLDOWN_SECONDS)
+            self.dedup.max_distance = SystemConfig.DEDUP_MAX_DISTANCE
+            if not self.dedup.should_save(plate, self.frame_ts):
+                metrics.inc('duplicates', camera=self.camera_source)
+                continue
+            now = datetime.datetime.now()
+            event = DetectionEvent('saved', now, plate, best.conf, best.color,
+                                   best.dist, best.height, self.camera_source)
+            self.save_record(event, image=best.image)
+            metrics.inc('saves', camera=self.camera_source)
+            events.append(event)
+
+    def normalize_reading(self, raw):
+        """Turns a raw OCR (text, conf) into a corrected (plate_text, conf), or None if too weak."""
+        txt, conf = raw
+        if conf <= 0.4:
+            return None
+
+        plate = normalizer.normalize(txt)
+        # print(f"Plate corrected: {txt} -> {plate}")
+        return plate, conf
+
+    def get_stats(self):
+        return {
+            'frames': self.frame_count,
+            'ocr_calls': self.ocr_calls,
+            'color_calls': self.color_calls,
+            'reads_per_commit': self.commit_reads / self.commits if self.commits else 0.0,
+            'car_tracks': len(self.car_tracker.tracks),
+            'plate_tracks': len(self.plate_tracker.tracks),
+            'gated': self.motion_gate.gated,
+            'analysed': self.motion_gate.analysed,
+            'motion': self.motion_gate.motion,
+            'scheduler': self.scheduler.get_stats(),
+            'dedup': self.dedup.get_stats(),
+        }
+
+    def draw_detections(self, frame):
+        for x1, y1, x2, y2, cid, lbl, d in self.current_detections:
+            color = (255,255,0) if cid==0 else (0,255,0)
+            cv2.rectangle(frame, (x1,y1), (x2,y2), color, 2)
+            cv2.putText(frame, lbl, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        return frame
+
+    def save_record(self, event, image=None):
+        """Queues the local record, snapshot and cloud record for the background writer."""
+        if not self.save_records or self.writer is None:
+            return
+
+        timestamp = event.time.strftime("%Y-%m-%d %H:%M:%S")
+        img_name = f"{event.plate}_{event.time.strftime('%Y%m%d_%H%M%S')}.jpg"
+        record = {
+            'user_id': self.user_id,
+            'plate_number': event.plate,
+            'camera_source': event.camera_source,
+            'timestamp': timestamp,
+            'confidence': float(f"{event.conf:.2f}"),
+            'color': event.color,
+            'distance_m': float(f"{event.dist:.2f}"),
+            'height_m': float(f"{event.height:.2f}"),
+            'note': event.note,
+            'image_name': img_name if image is not None else None
+        }
+        data = {
+            'timestamp': timestamp,
+            'camera_source': event.camera_source,
+            'source_ts': source_index(event.camera_source, timestamp),
+            'plate_number': event.plate,
+            'confidence': float(f"{event.conf:.2f}"),
+            'color': event.color,
+            'distance_m': float(f"{event.dist:.2f}"),
+            'height_m': float(f"{event.height:.2f}")
+        }
+        job = WriteJob(record, image=image, img_name=img_name,
+                       cloud_ref=self.cloud_ref, user_id=self.user_id,
+                       plate=event.plate, cloud_data=data)
+        if self.writer.submit(job):
+            self.last_saved_plate_key = event.plate
+
+    def manual_correction(self, manual_plate):
+        """Replaces the last saved record with an operator supplied plate. Returns the event."""
+        new_plate = manual_plate.upper().replace(" ", "")
+        now = datetime.datetime.now()
+
+        current_color = self.last_known_color if self.last_known_color != "Unknown" else "Manual_Color"
+        event = DetectionEvent('manual', now, new_plate, 1.0, current_color,
+                               self.last_known_dist, self.last_known_height, self.camera_source,
+                               note="Manually Corrected")
+        if self.writer is None:
+            return event
+
+        # After a restart the last saved plate comes from the local store
+        old_plate = self.last_saved_plate_key
+        if old_plate is None:
+            latest = self.writer.store.latest(user_id=self.user_id, camera_source=self.camera_source)
+            old_plate = latest['plate_number'] if latest else None
+
+        record = {
+            'user_id': self.user_id,
+            'plate_number': new_plate,
+            'camera_source': self.camera_source,
+            'timestamp': now.strftime("%Y-%m-%d %H:%M:%S"),
+            'confidence': 1.0,
+            'color': current_color,
+            'distance_m': float(f"{event.dist:.2f}"),
+            'height_m': float(f"{event.height:.2f}"),
+            'note': "Manually Corrected"
+        }
+        job = WriteJob(record, corrects=old_plate)
+
+        # Only an already saved record gets replaced in the cloud
+        if self.cloud_ref and self.user_id and old_plate:
+            job.cloud_ref = self.cloud_ref
+            job.user_id = self.user_id
+            job.plate = new_plate
+            job.cloud_data = {
+                'timestamp': now.strftime("%Y-%m-%d %H:%M:%S"),
+                'camera_source': self.camera_source,
+                'source_ts': source_index(self.camera_source, now.strftime("%Y-%m-%d %H:%M:%S")),
+                'plate_number': new_plate,
+                'confidence': 1.0,
+                'color': self.last_known_color,
+                'distance_m': f"{self.last_known_dist:.2f}",
+                'height_m': f"{self.last_known_height:.2f}",
+                'note': "Manually Corrected"
+            }
+
+        if self.writer.submit(job):
+            self.last_saved_plate_key = new_plate
+            # The corrected plate now holds the cooldown of the wrong read
+            if old_plate:
+                self.dedup.forget(old_plate)
+            self.dedup.remember(new_plate, self.frame_ts)
+        return event
+
+    def close(self):
+        """Writes out anything still queued and stops a writer this pipeline created."""
+        if self.owns_writer and self.writer is not None:
+            self.writer.stop()
+
+# ==========================================
+# HEADLESS ENTRY POINT
+# ==========================================
+def open_capture(source):
+    from camera_sources import open_source
+    return open_source(source)
+
+def run_headless(args):
+    from model_registry import registry, format_stats
+    models = registry.get(gpu=not args.cpu, ocr_mode=args.ocr_mode, backend=args.backend)
+    print(format_stats(registry.get_stats()))
+
+    cloud_ref = None
+    if args.cloud and args.user:
+        from final_system_segmentation import ref as cloud_ref
+
+    pipeline = LPRPipeline(camera_source=args.source, user_id=args.user, cloud_ref=cloud_ref,
+                           save_dir=args.save_dir, save_records=not args.no_save, models=models)
+
+    cap = open_capture(args.source)
+    if not cap.isOpened():
+        print(f"Could not open video source: {args.source}")
+        return 1
+
+    # Files are scheduled on media time, so a replay analyses the same frames however fast it runs
+    is_file = os.path.isfile(str(args.source)) or not getattr(cap, 'realtime', True)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    frames = 0
+    skipped = 0
+    saved = 0
+    start = time.perf_counter()
+    window_start = start
+    window_frames = 0
+    try:
+        while True:
+            # Nothing is displayed here, so frames the detector will not see are only grabbed
+            ts = frames / fps if is_file else time.perf_counter()
+            if not args.decode_all and not pipeline.analysis_due(ts):
+                if not cap.grab():
+                    break
+                pipeline.skip_frame()
+                frames += 1
+                skipped += 1
+                window_frames += 1
+                if args.max_frames and frames >= args.max_frames:
+                    break
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            _, events = pipeline.process_frame(frame, ts)
+            frames += 1
+            window_frames += 1
+            for event in events:
+                saved += 1
+                print(f"[{event.time.strftime('%H:%M:%S')}] {event.plate} conf={event.conf:.2f} color={event.color}")
+
+            now = time.perf_counter()
+            if now - window_start >= 1.0:
+                print(f"FPS: {window_frames / (now - window_start):.1f}  frames={frames}  saved={saved}")
+                window_start = now
+                window_frames = 0
+            if args.max_frames and frames >= args.max_frames:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        pipeline.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {frames} frames in {elapsed:.1f}s ({frames / elapsed if elapsed > 0 else 0:.1f} FPS), {saved} saved, "
+          f"{skipped} grabbed without decoding")
+    st = pipeline.get_stats()
+    per_vehicle = st['ocr_calls'] / saved if saved else 0.0
+    print(f"OCR calls: {st['ocr_calls']} ({per_vehicle:.1f} per saved vehicle), color calls: {st['color_calls']}, "
+          f"{st['reads_per_commit']:.1f} reads per committed plate")
+    print(f"Motion gate: analysed={st['analysed']} gated={st['gated']}")
+    print(f"Dedup: {st['dedup']['suppressed']} duplicate reads suppressed, {st['dedup']['tracked']} plates in cooldown")
+    sc = st['scheduler']
+    print("\n".join(metrics.format_lines()))
+    print(f"Scheduler: {sc['analyses']} analyses, cost {sc['cost_ms']:.1f}ms, last rate {sc['rate_hz']:.1f}/s "
+          f"({sc['state']}), budget compliance {sc['compliance']:.0%}")
+    if pipeline.writer is not None:
+        ws = pipeline.writer.get_stats()
+        print(f"Writer: written={ws['written']} dropped={ws['dropped']} max queue={ws['max_depth']} "
+              f"avg latency={ws['avg_latency_ms']:.1f}ms failures store/img/cloud="
+              f"{ws['store_failures']}/{ws['image_failures']}/{ws['cloud_failures']} cloud pending={ws['cloud_pending']}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless LPR pipeline (no display required)")
+    parser.add_argument("--source", required=True, help="Webcam index, stream URL or video file")
+    parser.add_argument("--user", default=None, help="User id used for cloud uploads")
+    parser.add_argument("--save-dir", default=None, help="Backup folder (default ~/Downloads/SmartLPR_Backup)")
+    parser.add_argument("--no-save", action="store_true", help="Do not write CSV/images")
+    parser.add_argument("--cloud", action="store_true", help="Upload saved records to Firebase")
+    parser.add_argument("--cpu", action="store_true", help="Run every model on the CPU")
+    parser.add_argument("--ocr-mode", choices=PlateRecognizer.MODES, default=None,
+                        help="readtext (CRAFT + recognizer) or recognize (batched, no CRAFT)")
+    parser.add_argument("--backend", choices=("auto", "torch", "onnx"), default=None,
+                        help="Inference backend (default SystemConfig.INFERENCE_BACKEND)")
+    parser.add_argument("--max-frames", type=int, default=0)
+    parser.add_argument("--decode-all", action="store_true",
+                        help="Decode every frame instead of only grabbing the ones the detector skips")
+    parser.add_argument("--motion-threshold", type=float, default=None,
+                        help="%% of the trigger band that must change to run the detector (0 = no motion gate)")
+    parser.add_argument("--roi", choices=("full", "band"), default=None,
+                        help="Detector input for a camera without a saved ROI: whole frame or the trigger band")
+    parser.add_argument("--target-latency", type=float, default=None, help="Analysis latency target in ms")
+    parser.add_argument("--cpu-budget", type=float, default=None, help="Share of one core the analysis may use")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this local port")
+    parser.add_argument("--cooldown", type=float, default=None, help="Seconds before the same plate is saved again")
+    args = parser.parse_args(argv)
+    if args.cooldown is not None:
+        SystemConfig.COOLDOWN_SECONDS = args.cooldown
+    if args.metrics_port:
+        from metrics import start_metrics_server
+        print(f"Metrics: http://127.0.0.1:{start_metrics_server(args.metrics_port).port}/metrics")
+    if args.target_latency is not None:
+        SystemConfig.TARGET_LATENCY_MS = args.target_latency
+    if args.cpu_budget is not None:
+        SystemConfig.CPU_BUDGET = args.cpu_budget
+    if args.roi:
+        SystemConfig.DETECTION_ROI = args.roi
+    if args.motion_threshold is not None:
+        SystemConfig.MOTION_THRESHOLD = args.motion_threshold
+    return run_headless(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
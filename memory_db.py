@@ -0,0 +1,171 @@
+import copy
+import itertools
+import threading
+import time
+
+# ==========================================
+# IN-MEMORY STAND-IN FOR firebase_admin.db
+# ==========================================
+class OfflineError(Exception):
+    """Raised by MemoryDatabase while it simulates a lost uplink."""
+
+class MemoryDatabase:
+    """
+    Local replacement for the Realtime Database, used to exercise the spool,
+    cache and history code without a network. Toggle .online to simulate an
+    outage; .calls counts network round-trips by method name.
+    """
+    def __init__(self, data=None, latency=0.0):
+        self.data = copy.deepcopy(data) if data else {}
+        self.latency = latency
+        self.online = True
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.push_ids = itertools.count(1)
+
+    def reference(self, path='/'):
+        return MemoryReference(self, [p for p in path.split('/') if p])
+
+    def _round_trip(self, method):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if not self.online:
+            raise OfflineError("Database unreachable")
+
+    def _get(self, path):
+        node = self.data
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                return None
+            node = node[key]
+        return copy.deepcopy(node)
+
+    def _set(self, path, value):
+        if not path:
+            self.data = copy.deepcopy(value) if value is not None else {}
+            return
+        node = self.data
+        for key in path[:-1]:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        if value is None:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = copy.deepcopy(value)
+
+class MemoryReference:
+    def __init__(self, database, path):
+        self.database = database
+        self.path = path
+
+    @property
+    def key(self):
+        return self.path[-1] if self.path else None
+
+    def child(self, path):
+        return MemoryReference(self.database, self.path + [p for p in str(path).split('/') if p])
+
+    def get(self, shallow=False):
+        self.database._round_trip('get')
+        with self.database.lock:
+            value = self.database._get(self.path)
+        if shallow and isinstance(value, dict):
+            return {key: True for key in value}
+        return value
+
+    def set(self, value):
+        self.database._round_trip('set')
+        with self.database.lock:
+            self.database._set(self.path, value)
+
+    def update(self, value):
+        """Multi-path update: every key (may contain '/') is set, None deletes. Invalid keys fail like Firebase."""
+        self.database._round_trip('update')
+        for key in value:
+            if not key or any(c in key for c in '.#$[]'):
+                raise ValueError(f"Invalid key: {key!r}")
+        with self.database.lock:
+            for key, val in value.items():
+                self.database._set(self.path + [p for p in key.split('/') if p], val)
+
+    def delete(self):
+        self.database._round_trip('delete')
+        with self.database.lock:
+            self.database._set(self.path, None)
+
+    def push(self, value=None):
+        new_ref = self.child(f"-M{next(self.database.push_ids):012d}")
+        if value is not None:
+            new_ref.set(value)
+        return new_ref
+
+    def order_by_child(self, path):
+        return MemoryQuery(self, order_by=path)
+
+    def order_by_key(self):
+        return MemoryQuery(self, order_by='$key')
+
+class MemoryQuery:
+    """Subset of firebase_admin.db.Query: order_by_child/key + equal_to / start_at / end_at / limit_to_*."""
+    def __init__(self, ref, order_by):
+        self.ref = ref
+        self.order_by = order_by
+        self.equal = None
+        self.start = None
+        self.end = None
+        self.first = None
+        self.last = None
+
+    def equal_to(self, value):
+        self.equal = value
+        return self
+
+    def start_at(self, value):
+        self.start = value
+        return self
+
+    def end_at(self, value):
+        self.end = value
+        return self
+
+    def limit_to_first(self, n):
+        self.first = n
+        return self
+
+    def limit_to_last(self, n):
+        self.last = n
+        return self
+
+    def _sort_value(self, key, val):
+        if self.order_by == '$key':
+            return key
+        node = val
+        for part in self.order_by.split('/'):
+            node = node.get(part) if isinstance(node, dict) else None
+        return node
+
+    def get(self):
+        data = self.ref.get() or {}
+        items = []
+        for key, val in data.items():
+            sv = self._sort_value(key, val)
+            if self.equal is not None and sv != self.equal: continue
+            if self.start is not None and (sv is None or type(sv) != type(self.start) or sv < self.start): continue
+            if self.end is not None and (sv is None or type(sv) != type(self.end) or sv > self.end): continue
+            items.append((sv, key, val))
+        # Firebase order: missing, booleans, numbers, strings, objects; ties broken by key
+        def rank(sv):
+            if sv is None: return (0, 0)
+            if isinstance(sv, bool): return (1, sv)
+            if isinstance(sv, (int, float)): return (2, sv)
+            if isinstance(sv, str): return (3, sv)
+            return (4, 0)
+        items.sort(key=lambda it: (rank(it[0]), it[1]))
+        if self.first is not None:
+            items = items[:self.first]
+        if self.last is not None:
+            items = items[-self.last:] if self.last else []
+        return {key: val for _, key, val in items}
@@ -0,0 +1,217 @@
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==========================================
+# LATENCY HISTOGRAM
+# ==========================================
+class Histogram:
+    """
+    Fixed buckets (for Prometheus) plus a window of recent samples for
+    p50 / p95 / p99, so the percentiles follow the current load.
+    """
+    BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, window=1024):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.BUCKETS, ms)] += 1
+        self.count += 1
+        self.sum += ms
+        self.recent.append(ms)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        values = sorted(self.recent)
+        if not values:
+            return {q: 0.0 for q in qs}
+        return {q: values[min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))] for q in qs}
+
+# ==========================================
+# METRICS REGISTRY
+# ==========================================
+class Metrics:
+    """
+    Process-wide hot-path instrumentation: per-stage latency histograms,
+    counters and error counters, each labelled with the camera ("" when a
+    stage is shared by every camera, e.g. the record writer).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}   # (stage, camera) -> Histogram
+        self.counters = {}     # (name, camera) -> int
+        self.errors = {}       # (stage, camera) -> int
+        self.started_at = time.time()
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.errors.clear()
+            self.started_at = time.time()
+
+    def observe(self, stage, ms, camera=""):
+        key = (stage, str(camera))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(ms)
+
+    @contextmanager
+    def timer(self, stage, camera=""):
+        """Times the block; an exception is counted as an error of the stage and re-raised."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error(stage, camera)
+            raise
+        finally:
+            self.observe(stage, (time.perf_counter() - t0) * 1000.0, camera)
+
+    def inc(self, name, n=1, camera=""):
+        key = (name, str(camera))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def error(self, stage, camera=""):
+        key = (stage, str(camera))
+        with self.lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def snapshot(self, camera=None):
+        """{'stages': {stage: {...}}, 'counters': {...}, 'errors': {...}}, for one camera (plus shared stages) or all."""
+        def wanted(cam):
+            return camera is None or cam in (str(camera), "")
+        with self.lock:
+            stages = {}
+            for (stage, cam), hist in self.histograms.items():
+                if not wanted(cam):
+                    continue
+                p = hist.percentiles()
+                stages[stage if camera is not None else f"{stage}[{cam}]"] = {
+                    'count': hist.count, 'mean_ms': hist.sum / hist.count if hist.count else 0.0,
+                    'p50_ms': p[50], 'p95_ms': p[95], 'p99_ms': p[99],
+                }
+            counters = {}
+            for (name, cam), n in self.counters.items():
+                if wanted(cam):
+                    counters[name] = counters.get(name, 0) + n
+            errors = {}
+            for (stage, cam), n in self.errors.items():
+                if wanted(cam):
+                    errors[stage] = errors.get(stage, 0) + n
+        return {'stages': stages, 'counters': counters, 'errors': errors}
+
+    def format_lines(self, camera=None):
+        """Short text lines for the video overlay / logs."""
+        snap = self.snapshot(camera)
+        lines = [f"{stage:<12} p50 {s['p50_ms']:6.1f}  p95 {s['p95_ms']:6.1f}  p99 {s['p99_ms']:6.1f} ms"
+                 for stage, s in sorted(snap['stages'].items())]
+        counters = "  ".join(f"{name} {n}" for name, n in sorted(snap['counters'].items()))
+        if counters:
+            lines.append(counters)
+        errors = sum(snap['errors'].values())
+        lines.append(f"errors {errors}" + (f" ({', '.join(f'{k} {v}' for k, v in sorted(snap['errors'].items()))})"
+                                           if errors else ""))
+        return lines
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        out = [
+            "# HELP lpr_stage_latency_ms Latency of one pipeline stage in milliseconds.",
+            "# TYPE lpr_stage_latency_ms histogram",
+        ]
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            errors = sorted(self.errors.items())
+            quantiles = []
+            for (stage, cam), hist in histograms:
+                labels = f'stage="{escape(stage)}",camera="{escape(cam)}"'
+                cumulative = 0
+                for bound, n in zip(Histogram.BUCKETS, hist.counts):
+                    cumulative += n
+                    out.append(f'lpr_stage_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+                out.append(f'lpr_stage_latency_ms_bucket{{{labels},le="+Inf"}} {hist.count}')
+                out.append(f"lpr_stage_latency_ms_sum{{{labels}}} {hist.sum:.3f}")
+                out.append(f"lpr_stage_latency_ms_count{{{labels}}} {hist.count}")
+                for q, v in hist.percentiles().items():
+                    quantiles.append(f'lpr_stage_latency_recent_ms{{{labels},quantile="{q / 100.0}"}} {v:.3f}')
+
+        out.append("# HELP lpr_stage_latency_recent_ms Percentiles over the most recent samples of a stage.")
+        out.append("# TYPE lpr_stage_latency_recent_ms gauge")
+        out.extend(quantiles)
+        for name in sorted(set(name for (name, _), _ in counters)):
+            out.append(f"# TYPE lpr_{name}_total counter")
+            out.extend(f'lpr_{name}_total{{camera="{escape(cam)}"}} {n}' for (n_, cam), n in counters if n_ == name)
+        out.append("# TYPE lpr_errors_total counter")
+        out.extend(f'lpr_errors_total{{stage="{escape(stage)}",camera="{escape(cam)}"}} {n}' for (stage, cam), n in errors)
+        out.append("# TYPE lpr_uptime_seconds gauge")
+        out.append(f"lpr_uptime_seconds {time.time() - self.started_at:.1f}")
+        return "\n".join(out) + "\n"
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+metrics = Metrics()
+
+# ==========================================
+# PROMETHEUS ENDPOINT
+# ==========================================
+class MetricsServer:
+    """Serves GET /metrics on a daemon thread (localhost only by default)."""
+    def __init__(self, registry, port, host="127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+server = None
+server_lock = threading.Lock()
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Starts the endpoint once per process; later calls return the running server."""
+    global server
+    with server_lock:
+        if server is None:
+            server = MetricsServer(metrics, port, host).start()
+        return server
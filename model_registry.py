@@ -0,0 +1,149 @@
+import sys
+import time
+import argparse
+import threading
+from lpr_pipeline import ModelSet, SystemConfig
+
+# ==========================================
+# PROCESS-WIDE MODEL REGISTRY
+# ==========================================
+class ModelEntry:
+    """One ModelSet configuration and its loading state."""
+    def __init__(self, gpu, ocr_mode, backend):
+        self.gpu = gpu
+        self.ocr_mode = ocr_mode
+        self.backend = backend
+        self.models = None
+        self.state = 'idle'         # idle -> loading -> ready | failed
+        self.error = None
+        self.ready = threading.Event()
+        self.thread = None
+        self.load_ms = 0.0
+        self.warmup_ms = 0.0
+
+    def get_stats(self):
+        return {
+            'gpu': self.gpu,
+            'ocr_mode': self.ocr_mode,
+            'backend': self.models.backend if self.models is not None else self.backend,
+            'device': self.models.device if self.models is not None else None,
+            'state': self.state,
+            'error': str(self.error) if self.error else None,
+            'load_ms': self.load_ms,
+            'warmup_ms': self.warmup_ms,
+            'models': dict(self.models.timings) if self.models is not None else {},
+        }
+
+class ModelRegistry:
+    """
+    Loads each ModelSet configuration (gpu allowed, OCR mode, inference
+    backend) once per process and hands the same
+    instance to every dashboard / pipeline. preload() starts loading (and a
+    warmup inference) on a background thread; get() waits for it.
+    A failed load is retried on the next preload()/get().
+    """
+    def __init__(self, warmup=True):
+        self.warmup = warmup
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def entry_for(self, gpu=True, ocr_mode=None, backend=None):
+        # Keyed by the requested settings; the device itself is only probed in the loader thread
+        key = (bool(gpu), ocr_mode or SystemConfig.OCR_MODE, backend or SystemConfig.INFERENCE_BACKEND)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = ModelEntry(*key)
+            return self.entries[key]
+
+    def preload(self, gpu=True, ocr_mode=None, backend=None):
+        """Starts loading in the background if it is not loaded or loading already. Returns the entry."""
+        entry = self.entry_for(gpu, ocr_mode, backend)
+        with self.lock:
+            if entry.state in ('idle', 'failed'):
+                entry.state = 'loading'
+                entry.error = None
+                entry.ready.clear()
+                entry.thread = threading.Thread(target=self._load, args=(entry,), daemon=True)
+                entry.thread.start()
+        return entry
+
+    def _load(self, entry):
+        try:
+            t0 = time.perf_counter()
+            models = ModelSet(gpu=entry.gpu, ocr_mode=entry.ocr_mode, backend=entry.backend).load()
+            entry.load_ms = (time.perf_counter() - t0) * 1000.0
+            if self.warmup:
+                t0 = time.perf_counter()
+                models.warmup()
+                entry.warmup_ms = (time.perf_counter() - t0) * 1000.0
+            entry.models = models
+            entry.state = 'ready'
+        except Exception as e:
+            entry.error = e
+            entry.state = 'failed'
+        finally:
+            entry.ready.set()
+
+    def get(self, gpu=True, ocr_mode=None, timeout=None, backend=None):
+        """Returns the shared ModelSet, loading it if needed. Raises the load error on failure."""
+        entry = self.preload(gpu, ocr_mode, backend)
+        if not entry.ready.wait(timeout):
+            raise TimeoutError("Models are still loading")
+        if entry.models is None:
+            raise entry.error or RuntimeError("Model load failed")
+        return entry.models
+
+    def peek(self, gpu=True, ocr_mode=None, backend=None):
+        """The ModelSet if it is ready, otherwise None. Never blocks or starts a load."""
+        entry = self.entry_for(gpu, ocr_mode, backend)
+        return entry.models if entry.state == 'ready' else None
+
+    def get_stats(self):
+        with self.lock:
+            entries = list(self.entries.values())
+        return [entry.get_stats() for entry in entries]
+
+registry = ModelRegistry()
+
+def preload_models(gpu=True, ocr_mode=None, backend=None):
+    return registry.preload(gpu, ocr_mode, backend)
+
+def get_models(gpu=True, ocr_mode=None, timeout=None, backend=None):
+    return registry.get(gpu, ocr_mode, timeout, backend)
+
+def format_stats(stats):
+    """One line per model, for logs and the dashboards."""
+    lines = []
+    for entry in stats:
+        head = f"[{entry['backend']} {entry['device'] or ('auto' if entry['gpu'] else 'cpu')} {entry['ocr_mode']}] {entry['state']}"
+        if entry['state'] == 'ready':
+            head += f"  load {entry['load_ms'] / 1000.0:.1f}s  warmup {entry['warmup_ms'] / 1000.0:.1f}s"
+        elif entry['error']:
+            head += f"  ({entry['error']})"
+        lines.append(head)
+        for name, t in entry['models'].items():
+            lines.append(f"    {name:<9} load {t.get('load_ms', 0):8.1f}ms  warmup {t.get('warmup_ms', 0):8.1f}ms")
+    return "\n".join(lines)
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load and warm up the LPR models, report timings")
+    parser.add_argument("--cpu", action="store_true")
+    parser.add_argument("--ocr-mode", default=None, choices=['readtext', 'recognize'])
+    parser.add_argument("--backend", default=None, choices=['auto', 'torch', 'onnx'])
+    parser.add_argument("--no-warmup", action="store_true")
+    args = parser.parse_args(argv)
+
+    registry.warmup = not args.no_warmup
+    try:
+        get_models(gpu=not args.cpu, ocr_mode=args.ocr_mode, backend=args.backend)
+    except Exception as e:
+        print(f"Model load failed: {e}")
+        return 1
+    print(format_stats(registry.get_stats()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
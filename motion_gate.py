@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+
+# ==========================================
+# MOTION GATE
+# ==========================================
+class MotionGate:
+    """
+    Cheap check that runs before the detector. Only the band around the
+    trigger line is looked at: it is shrunk to a small grayscale strip and
+    compared with a running-average background. While less than `threshold`
+    percent of the strip changes, the detector is skipped.
+
+    After motion the gate stays open for `hold_frames` more checks, and the
+    caller can keep it open (busy=True) while vehicles are still tracked, so a
+    car that stops at the barrier is still read.
+    """
+    WIDTH = 160  # The band is compared at this width
+
+    def __init__(self, threshold=0.5, band=150, learning_rate=0.05, pixel_threshold=25, hold_frames=3):
+        self.threshold = threshold              # % of band pixels that must change (0 = gate off)
+        self.band = band                        # Pixels above and below the trigger line
+        self.learning_rate = learning_rate
+        self.pixel_threshold = pixel_threshold  # Gray level change that counts as a changed pixel
+        self.hold_frames = hold_frames
+        self.background = None
+        self.hold = 0
+
+        self.motion = 0.0  # % of the band that changed at the last check
+        self.gated = 0
+        self.analysed = 0
+
+    def measure(self, frame, line_y):
+        """Updates the background and returns the % of the band that changed."""
+        h, w = frame.shape[:2]
+        y1, y2 = max(0, line_y - self.band), min(h, line_y + self.band)
+        if y2 <= y1:
+            return 100.0
+        height = max(1, int(round((y2 - y1) * self.WIDTH / float(w))))
+        small = cv2.resize(frame[y1:y2], (self.WIDTH, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0).astype(np.float32)
+
+        # First frame, or the trigger line moved: start a new background
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray
+            return 100.0
+
+        diff = cv2.absdiff(gray, self.background)
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+        return 100.0 * np.count_nonzero(diff > self.pixel_threshold) / diff.size
+
+    def allow(self, frame, line_y, busy=False):
+        """True if the detector should run on this frame."""
+        if not self.threshold:
+            self.analysed += 1
+            return True
+
+        self.motion = self.measure(frame, line_y)
+        if self.motion >= self.threshold:
+            self.hold = self.hold_frames
+        elif self.hold > 0:
+            self.hold -= 1
+        elif not busy:
+            self.gated += 1
+            return False
+        self.analysed += 1
+        return True
+
+    def get_stats(self):
+        return {'gated': self.gated, 'analysed': self.analysed, 'motion': self.motion}
@@ -0,0 +1,347 @@
+import os
+import sys
+import time
+import threading
+import argparse
+from camera_stream import FrameGrabber
+from camera_sources import replicate
+from lpr_pipeline import LPRPipeline, SystemConfig, backup_paths
+from model_registry import get_models
+from record_writer import RecordWriter
+from metrics import metrics, start_metrics_server
+
+# ==========================================
+# ONE CAMERA SLOT (SOURCE + PER-CAMERA STATE)
+# ==========================================
+class CameraSlot:
+    def __init__(self, source, pipeline):
+        self.source = source
+        self.pipeline = pipeline
+        self.grabber = FrameGrabber(source, policy=SystemConfig.capture_policy_for(source))
+        self.error = None
+        self.display_frame = None
+        self.display_seq = 0
+        self.last_event = None
+        self.frames_processed = 0
+        self.errors = 0          # Frames lost to a processing error, the camera itself stays open
+        self.last_error = None
+
+# ==========================================
+# MULTI-CAMERA HOST
+# ==========================================
+class MultiCameraHost:
+    """
+    Serves N camera sources from one process with a single shared ModelSet.
+    Every cycle the freshest frame of each camera is taken, frames that are due
+    for analysis are stacked into one detector.predict() call (up to max_batch),
+    and each result is handed back to its own camera's pipeline (buffers,
+    plate cooldowns and save target stay per camera).
+
+    An error in one camera's frame only costs that camera that frame: it is
+    counted on the slot and the loop carries on with the other cameras.
+    """
+    def __init__(self, sources, user_id=None, cloud_ref=None, save_dir=None, save_records=True,
+                 gpu=True, max_batch=8, models=None, on_event=None, ocr_mode=None):
+        self.models = models
+        self.gpu = gpu
+        self.ocr_mode = ocr_mode
+        self.max_batch = max_batch
+        self.on_event = on_event
+        self.is_running = False
+        self.thread = None
+
+        # One background writer serves every camera (same CSV, same image folder)
+        self.writer = None
+        if save_records:
+            download_path, img_folder, _, spool_path, store_path = backup_paths(save_dir)
+            os.makedirs(download_path, exist_ok=True)
+            self.writer = RecordWriter(store_path, img_folder, spool_path=spool_path, cloud_ref=cloud_ref)
+
+        self.slots = []
+        for src in sources:
+            pipeline = LPRPipeline(camera_source=src, user_id=user_id, cloud_ref=cloud_ref,
+                                   save_dir=save_dir, save_records=save_records, models=models,
+                                   writer=self.writer)
+            self.slots.append(CameraSlot(src, pipeline))
+
+        self.cycles = 0
+        self.batches = 0
+        self.batched_frames = 0
+        self.frames_processed = 0
+        self.started_at = None
+
+    def load_models(self):
+        if self.models is None:
+            self.models = get_models(gpu=self.gpu, ocr_mode=self.ocr_mode)
+        for slot in self.slots:
+            slot.pipeline.models = self.models
+        return self
+
+    def open_cameras(self):
+        for slot in self.slots:
+            try:
+                slot.grabber.start()
+            except Exception as e:
+                slot.error = str(e)
+        return [s for s in self.slots if s.error is None]
+
+    def start(self):
+        """Loads the shared models, opens every camera and runs the batch loop on a daemon thread."""
+        self.load_models()
+        self.open_cameras()
+        self.is_running = True
+        self.started_at = time.perf_counter()
+        self.thread = threading.Thread(target=self.run_loop, daemon=True)
+        self.thread.start()
+
+    def run_loop(self):
+        while self.is_running:
+            try:
+                consumed = self.step()
+            except Exception as e:
+                # print(f"Host error: {e}")
+                metrics.error('host')
+                consumed = 0
+            if consumed == 0:
+                time.sleep(0.005)
+
+    def fail(self, slot, stage, error):
+        """Records a processing error on slot; its frame is dropped for this cycle."""
+        # print(f"[{slot.source}] {stage} error: {error}")
+        slot.errors += 1
+        slot.last_error = f"{stage}: {error}"
+        metrics.error(stage, slot.source)
+
+    def detect_chunk(self, chunk):
+        """Detector results for chunk, None for frames whose detection failed."""
+        inputs = []
+        for slot, frame in chunk:
+            try:
+                inputs.append(slot.pipeline.detection_input(frame))
+            except Exception as e:
+                self.fail(slot, 'detect', e)
+                inputs.append(None)
+        ready = [(i, item) for i, item in enumerate(inputs) if item is not None]
+        results = [None] * len(chunk)
+        if not ready:
+            return results
+        # One batch shares one input size; mixed ROIs fall back to the model's default
+        sizes = set(imgsz for _, (_, imgsz) in ready)
+        try:
+            with metrics.timer('detect', 'batch'):
+                batch = self.models.detect([crop for _, (crop, _) in ready], sizes.pop() if len(sizes) == 1 else None)
+            for (i, _), result in zip(ready, batch):
+                results[i] = result
+        except Exception:
+            # One bad frame must not cost the whole batch, find it frame by frame
+            for i, (crop, imgsz) in ready:
+                try:
+                    results[i] = self.models.detect([crop], imgsz)[0]
+                except Exception as e:
+                    self.fail(chunk[i][0], 'detect', e)
+        return results
+
+    def read_chunk(self, chunk, jobs):
+        """OCR readings per camera of chunk, None for cameras whose reading failed."""
+        crops = [crop for cam_jobs in jobs if cam_jobs for _, crop, _ in cam_jobs]
+        per_camera = [None if cam_jobs is None else [] for cam_jobs in jobs]
+        if not crops:
+            return per_camera
+        try:
+            # Plate crops of the whole batch go through OCR in one call
+            with metrics.timer('ocr', 'batch'):
+                readings = self.models.plate_reader.read_batch(crops)
+            start = 0
+            for k, cam_jobs in enumerate(jobs):
+                if cam_jobs:
+                    per_camera[k] = readings[start:start + len(cam_jobs)]
+                    start += len(cam_jobs)
+        except Exception:
+            for k, ((slot, _), cam_jobs) in enumerate(zip(chunk, jobs)):
+                if not cam_jobs:
+                    continue
+                try:
+                    per_camera[k] = self.models.plate_reader.read_batch([crop for _, crop, _ in cam_jobs])
+                except Exception as e:
+                    self.fail(slot, 'ocr', e)
+                    per_camera[k] = None
+        return per_camera
+
+    def step(self):
+        """One host cycle. Returns how many camera frames were consumed."""
+        prepared = []
+        failed = set()
+        for slot in self.slots:
+            if slot.error is not None:
+                continue
+            latest = slot.grabber.read_latest()
+            if latest is None:
+                continue
+            frame, captured_at = latest
+            try:
+                frame, analyse = slot.pipeline.prepare_frame(frame, captured_at)
+            except Exception as e:
+                self.fail(slot, 'prepare', e)
+                continue
+            prepared.append((slot, frame, analyse, captured_at))
+
+        due = [(slot, frame) for slot, frame, analyse, _ in prepared if analyse]
+        for i in range(0, len(due), self.max_batch):
+            chunk = due[i:i + self.max_batch]
+            t0 = time.perf_counter()
+            results = self.detect_chunk(chunk)
+            self.batches += 1
+            self.batched_frames += len(chunk)
+
+            jobs = []
+            for (slot, frame), result in zip(chunk, results):
+                cam_jobs = None
+                if result is not None:
+                    try:
+                        cam_jobs = slot.pipeline.associate_results(frame, [result])
+                    except Exception as e:
+                        self.fail(slot, 'associate', e)
+                jobs.append(cam_jobs)
+            readings = self.read_chunk(chunk, jobs)
+
+            for (slot, frame), cam_jobs, cam_readings in zip(chunk, jobs, readings):
+                if cam_jobs is None or cam_readings is None:
+                    failed.add(slot)
+                    continue
+                events = []
+                try:
+                    slot.pipeline.finish_results(frame, cam_jobs, cam_readings, events)
+                    # Every camera in the batch is charged an equal share of the batch time
+                    slot.pipeline.finish_analysis((time.perf_counter() - t0) * 1000.0 / len(chunk))
+                except Exception as e:
+                    self.fail(slot, 'finish', e)
+                    failed.add(slot)
+                for event in events:
+                    slot.last_event = event
+                    if self.on_event:
+                        try:
+                            self.on_event(slot, event)
+                        except Exception as e:
+                            self.fail(slot, 'event', e)
+
+        for slot, frame, _, captured_at in prepared:
+            if slot in failed:
+                continue
+            try:
+                slot.pipeline.draw_detections(frame)
+            except Exception as e:
+                self.fail(slot, 'draw', e)
+            slot.display_frame = frame
+            slot.display_seq += 1
+            slot.frames_processed += 1
+            slot.grabber.mark_processed()
+            slot.grabber.mark_displayed(captured_at)
+
+        self.cycles += 1
+        self.frames_processed += len(prepared)
+        return len(prepared)
+
+    def get_stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            'cameras': len(self.slots),
+            'active': len([s for s in self.slots if s.error is None]),
+            'errors': sum(s.errors for s in self.slots),
+            'frames_processed': self.frames_processed,
+            'aggregate_fps': self.frames_processed / elapsed if elapsed > 0 else 0.0,
+            'batches': self.batches,
+            'avg_batch_size': self.batched_frames / self.batches if self.batches else 0.0,
+        }
+
+    def stop(self):
+        self.is_running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        for slot in self.slots:
+            slot.grabber.stop()
+        if self.writer is not None:
+            self.writer.stop()
+
+# ==========================================
+# HEADLESS ENTRY POINT
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve several cameras with one shared model set")
+    parser.add_argument("--source", action="append", required=True, help="Repeat for every camera")
+    parser.add_argument("--user", default=None)
+    parser.add_argument("--save-dir", default=None)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--cpu", action="store_true")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--ocr-mode", choices=("readtext", "recognize"), default=None)
+    parser.add_argument("--backend", choices=("auto", "torch", "onnx"), default=None)
+    parser.add_argument("--seconds", type=float, default=0, help="Stop after this many seconds (0 = until Ctrl+C)")
+    parser.add_argument("--capture", default=None,
+                        help="Decode policy for every camera, e.g. all, demand, every:3, fps:10 (default demand)")
+    parser.add_argument("--camera-capture", action="append", default=[], metavar="SOURCE=POLICY",
+                        help="Decode policy for one camera, repeatable")
+    parser.add_argument("--motion-threshold", type=float, default=None,
+                        help="%% of the trigger band that must change to run the detector (0 = no motion gate)")
+    parser.add_argument("--camera-motion", action="append", default=[], metavar="SOURCE=THRESHOLD",
+                        help="Motion gate threshold for one camera, repeatable")
+    parser.add_argument("--roi", choices=("full", "band"), default=None,
+                        help="Detector input for every camera without a saved ROI")
+    parser.add_argument("--target-latency", type=float, default=None, help="Analysis latency target in ms")
+    parser.add_argument("--cpu-budget", type=float, default=None, help="Share of one core each camera may use")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this local port")
+    parser.add_argument("--replicate", type=int, default=1,
+                        help="Open every source this many times, e.g. 32 x synthetic://plates to load test")
+    parser.add_argument("--cooldown", type=float, default=None, help="Seconds before the same plate is saved again")
+    args = parser.parse_args(argv)
+    if args.cooldown is not None:
+        SystemConfig.COOLDOWN_SECONDS = args.cooldown
+    if args.backend:
+        SystemConfig.INFERENCE_BACKEND = args.backend
+    if args.capture:
+        SystemConfig.CAPTURE_POLICY = args.capture
+    for item in args.camera_capture:
+        source, _, policy = item.rpartition("=")
+        SystemConfig.CAMERA_CAPTURE_POLICIES[source] = policy
+    if args.motion_threshold is not None:
+        SystemConfig.MOTION_THRESHOLD = args.motion_threshold
+    for item in args.camera_motion:
+        source, _, threshold = item.rpartition("=")
+        SystemConfig.CAMERA_MOTION_THRESHOLDS[source] = float(threshold)
+    if args.roi:
+        SystemConfig.DETECTION_ROI = args.roi
+    if args.target_latency is not None:
+        SystemConfig.TARGET_LATENCY_MS = args.target_latency
+    if args.cpu_budget is not None:
+        SystemConfig.CPU_BUDGET = args.cpu_budget
+    if args.metrics_port:
+        print(f"Metrics: http://127.0.0.1:{start_metrics_server(args.metrics_port).port}/metrics")
+
+    def print_event(slot, event):
+        print(f"[{slot.source}] {event.plate} conf={event.conf:.2f} color={event.color}")
+
+    host = MultiCameraHost(replicate(args.source, args.replicate), user_id=args.user, save_dir=args.save_dir,
+                           save_records=not args.no_save, gpu=not args.cpu,
+                           max_batch=args.max_batch, on_event=print_event, ocr_mode=args.ocr_mode)
+    host.start()
+    for slot in host.slots:
+        if slot.error:
+            print(f"[{slot.source}] failed to open: {slot.error}")
+
+    try:
+        while True:
+            time.sleep(1.0)
+            st = host.get_stats()
+            skipped = sum(slot.grabber.get_stats()['skipped'] for slot in host.slots)
+            gated = sum(slot.pipeline.motion_gate.gated for slot in host.slots)
+            print(f"FPS: {st['aggregate_fps']:.1f}  cameras={st['active']}/{st['cameras']}  "
+                  f"avg batch={st['avg_batch_size']:.1f}  not decoded={skipped}  motion gated={gated}")
+            if args.seconds and time.perf_counter() - host.started_at >= args.seconds:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        host.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import math
+
+# ==========================================
+# PER-PLATE DEDUP INDEX
+# ==========================================
+class PlateDedup:
+    """
+    Remembers which plates were saved recently, each with its own expiry,
+    so one car is not saved twice while other cars are saved back to back.
+
+    plates maps plate -> expiry time. A time wheel of one-second slots holds
+    the plates by expiry, so expired plates are dropped a slot at a time and
+    memory stays bounded by the traffic of one window (max_entries caps it
+    in any case).
+
+    Near-duplicate reads (one wrong, missing or extra character, e.g.
+    WQA1234 / WQA1284) count as the same plate. They are found through a
+    deletion index: every plate is also stored under each of its one-character
+    deletions, so a lookup costs O(len(plate)) instead of a scan of the window.
+    The keys a plate was stored under are kept with it, so it is removed from
+    exactly those even if max_distance changed in the meantime.
+    """
+    def __init__(self, window=15.0, max_distance=1, min_fuzzy_len=5, max_entries=4096, resolution=1.0):
+        self.window = window                # Seconds a saved plate blocks a new save of itself
+        self.max_distance = max_distance    # 0 = exact matches only, 1 = one character may differ
+        self.min_fuzzy_len = min_fuzzy_len  # Short plates only match exactly
+        self.max_entries = max_entries
+        self.resolution = resolution
+
+        self.plates = {}     # plate -> expiry
+        self.variants = {}   # plate or one-character deletion -> set of plates
+        self.plate_keys = {} # plate -> the variant keys it was stored under
+        self.wheel = []
+        self.tick = None     # First wheel slot that has not been expired yet
+        self.resize_wheel()
+
+        self.suppressed = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def set_window(self, window):
+        """Changes the window (settings can change while running); plates keep their current expiry."""
+        if window != self.window:
+            self.window = window
+            self.resize_wheel()
+
+    def resize_wheel(self):
+        slots = int(math.ceil(self.window / self.resolution)) + 2
+        self.wheel = [[] for _ in range(slots)]
+        for plate, expiry in self.plates.items():
+            self.wheel[self.slot(expiry) % slots].append(plate)
+
+    def slot(self, ts):
+        return int(math.floor(ts / self.resolution))
+
+    def keys(self, plate):
+        """The plate and, for fuzzy matching, its one-character deletions."""
+        if self.max_distance < 1 or len(plate) < self.min_fuzzy_len:
+            return {plate}
+        return {plate} | {plate[:i] + plate[i + 1:] for i in range(len(plate))}
+
+    # --- Expiry ---
+    def expire(self, now):
+        """Drops every plate whose expiry slot lies completely in the past."""
+        current = self.slot(now)
+        if self.tick is None:
+            self.tick = current
+            return
+        # A long pause (or a clock jump) walks the wheel once
+        size = len(self.wheel)
+        for s in range(max(self.tick, current - size), current):
+            bucket = self.wheel[s % size]
+            keep = []
+            for plate in bucket:
+                expiry = self.plates.get(plate)
+                if expiry is None or self.slot(expiry) % size != s % size:
+                    continue  # Forgotten, or refreshed into another slot
+                if self.slot(expiry) < current:
+                    self.remove(plate)
+                    self.expired += 1
+                else:
+                    keep.append(plate)
+            bucket[:] = keep
+        self.tick = max(self.tick, current)
+
+    def remove(self, plate):
+        self.plates.pop(plate, None)
+        for key in self.plate_keys.pop(plate, ()):
+            group = self.variants.get(key)
+            if group is not None:
+                group.discard(plate)
+                if not group:
+                    del self.variants[key]
+
+    # --- Lookup / insert ---
+    def match(self, plate, now):
+        """The recently saved plate that plate duplicates, or None."""
+        self.expire(now)
+        expiry = self.plates.get(plate)
+        if expiry is not None and expiry > now:
+            return plate
+        if len(plate) < self.min_fuzzy_len:
+            return None
+        best = None
+        for key in self.keys(plate):
+            for other in self.variants.get(key, ()):
+                if self.plates[other] > now and len(other) >= self.min_fuzzy_len and within_one_edit(plate, other):
+                    if best is None or self.plates[other] > self.plates[best]:
+                        best = other
+        return best
+
+    def remember(self, plate, now):
+        """Starts (or restarts) the window of plate."""
+        old = self.plates.get(plate)
+        if old is None:
+            while len(self.plates) >= self.max_entries:
+                # The plate closest to expiring makes room
+                self.remove(min(self.plates, key=self.plates.get))
+                self.evicted += 1
+            self.plate_keys[plate] = self.keys(plate)
+            for key in self.plate_keys[plate]:
+                self.variants.setdefault(key, set()).add(plate)
+        expiry = now + self.window
+        self.plates[plate] = expiry
+        if old is None or self.slot(old) != self.slot(expiry):
+            self.wheel[self.slot(expiry) % len(self.wheel)].append(plate)
+
+    def should_save(self, plate, now):
+        """
+        True if plate is not a (near) duplicate of a plate saved within the
+        window; the caller saves it and this plate's window starts. A duplicate
+        keeps its original's window open while the car is still being read.
+        """
+        duplicate = self.match(plate, now)
+        if duplicate is not None:
+            self.suppressed += 1
+            self.remember(duplicate, now)
+            return False
+        self.remember(plate, now)
+        return True
+
+    def forget(self, plate):
+        """Removes plate, e.g. when an operator replaced a wrong read."""
+        if plate in self.plates:
+            self.remove(plate)
+
+    def get_stats(self):
+        return {
+            'tracked': len(self.plates),
+            'suppressed': self.suppressed,
+            'expired': self.expired,
+            'evicted': self.evicted,
+        }
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one substitution, insertion or deletion."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
@@ -0,0 +1,226 @@
+import re
+import functools
+
+# ==========================================
+# PLATE RULES
+# ==========================================
+MALAYSIA_PLATE_REGEX = re.compile(r'^([A-Z]{1,3})(\d{1,4})([A-Z]?)$')
+
+VANITY_PREFIXES = [
+    "PUTRAJAYA", "PROTON", "PERODUA", "WAJA", "SUKOM", "LIMO", "RIMAU",
+    "BAMBEE", "IM4U", "1M4U", "PATRIOT", "VIP", "VIPS", "PERFECT", "NAAM",
+    "G1M", "GP", "US", "UP", "A1M", "GOLD", "MALAYSIA", "NBOS", "GTR",
+    "SAM", "K1M", "T1M", "FFF", "GG", "G", "FD", "FE", "FB", "X", "XX",
+    "YY", "UU", "Q", "KRISS", "LOTUS", "MADANI", "NBOS", "PETRA", "PUTRA",
+    "PERSONA", "PERDANA", "SATRIA", "SAS", "TIARA", "UNIMAS", "UNISZA", "UTEM",
+    "UiTM", "IIUM", "WAJA", "WCEC", "XIIINAM", "XOIC", 'XXVIASEAN', "XXXIDB",
+    "UUU"
+]
+
+STATE_LETTERS = "ABCDFJKLMNPQRSTVWZ"       # First letter of a standard series
+SERIES_LETTERS = "ABCDEFGHJKLMNPQRSTUVWXYZ"  # Standard series never use I and O
+
+# OCR confusions: read character -> {what it may really be: cost}
+CONFUSIONS = {
+    'O': {'0': 0.3, 'Q': 0.3, 'D': 0.6}, 'Q': {'0': 0.5}, 'D': {'0': 0.5}, 'U': {'0': 0.8},
+    'I': {'1': 0.3, 'J': 0.8, 'T': 0.8}, 'L': {'1': 0.5}, 'T': {'1': 0.8, '7': 0.8},
+    'Z': {'2': 0.4, '7': 0.8}, 'J': {'3': 0.8}, 'A': {'4': 0.6}, 'S': {'5': 0.4},
+    'G': {'6': 0.5}, 'B': {'8': 0.4},
+    '0': {'Q': 0.5, 'D': 0.6, 'O': 0.3}, '1': {'I': 0.3, 'T': 0.8, 'J': 0.8}, '2': {'Z': 0.4},
+    '3': {'J': 0.8}, '4': {'A': 0.6}, '5': {'S': 0.4}, '6': {'G': 0.5}, '7': {'T': 0.8}, '8': {'B': 0.4},
+}
+OFF_SERIES_COST = 1.0   # A letter outside the series alphabet (I, O) kept as read
+OFF_STATE_COST = 1.0    # A standard plate whose first letter is no state letter
+DELETE_COST = 1.0       # Dropping a stray character
+MAX_COST = 2.5          # Above this the reading is returned cleaned but uncorrected
+DIGIT_SERIES_COST = MAX_COST  # Series letters that were all read as digits (1234 is no J234)
+MAX_DIGITS = 4          # A plate number never has more digits
+STANDARD_LENGTH = 8     # 3 series letters + 4 digits + suffix letter
+
+# Decoder states: start, 1-3 series letters (with or without a letter read
+# as a letter), 1-4 digits, suffix letter
+START = 0
+SUFFIX = 11
+STATES = 12
+
+def series_state(n, lettered):
+    return 1 + (n - 1) * 2 + (1 if lettered else 0)
+
+def number_state(n):
+    return 6 + n
+
+ENDS = (number_state(1), number_state(2), number_state(3), number_state(4), SUFFIX)
+
+# ==========================================
+# COMPILED NORMALIZER
+# ==========================================
+class PlateNormalizer:
+    """
+    Turns a raw OCR string into a plate, built once from the plate rules.
+
+    Vanity prefixes are compiled into a trie that is walked once per
+    reading, allowing the usual 0/O and 1/I confusions. Standard plates are
+    decoded against the format (1-3 series letters, 1-4 digits, optional
+    suffix letter) by a small dynamic program over per-character transition
+    tables: every character either keeps its role, is swapped for a
+    confusable character of the role the position needs, or is dropped,
+    each at a cost. The cheapest valid reading wins; vanity and standard
+    readings compete on the same cost scale. A series made up only from
+    digits costs DIGIT_SERIES_COST on top, so a bare number stays a number.
+
+    Nothing is invented from a reading that cannot be a plate: one without
+    any digit, with more than MAX_DIGITS digits in a row, or longer than the
+    longest plate is returned raw, and a suffix letter must be read as a
+    letter (WQA12345 is no WQA1234S).
+
+    normalize() is memoized in an LRU, a gate sees the same few strings
+    over and over.
+    """
+    def __init__(self, vanity_prefixes=VANITY_PREFIXES, cache_size=4096):
+        self.trie = {}
+        for prefix in vanity_prefixes:
+            node = self.trie
+            for ch in prefix.upper():
+                node = node.setdefault(ch, {})
+            node[''] = prefix.upper()
+        self.max_length = max([STANDARD_LENGTH] + [len(p) + MAX_DIGITS + 1 for p in vanity_prefixes])
+
+        # Per character and role: (character it becomes, cost), or None
+        self.as_first = {}
+        self.as_letter = {}
+        self.as_digit = {}
+        for ch in "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+            options = [(ch, 0.0)] + sorted(CONFUSIONS.get(ch, {}).items(), key=lambda item: item[1])
+            self.as_letter[ch] = self.best(options, lambda c: c.isalpha(),
+                                           lambda c: 0.0 if c in SERIES_LETTERS else OFF_SERIES_COST)
+            self.as_first[ch] = self.best(options, lambda c: c.isalpha(),
+                                          lambda c: (0.0 if c in SERIES_LETTERS else OFF_SERIES_COST) +
+                                                    (0.0 if c in STATE_LETTERS else OFF_STATE_COST))
+            self.as_digit[ch] = self.best(options, lambda c: c.isdigit(), lambda c: 0.0)
+
+        # Per character: for every state, the (next state, cost, character) it can step to
+        self.steps = {}
+        for ch in self.as_letter:
+            first, letter, digit = self.as_first[ch], self.as_letter[ch], self.as_digit[ch]
+            step = [[] for _ in range(STATES)]
+            if first:
+                step[START].append((series_state(1, ch.isalpha()), first[1], first[0]))
+            for n in (1, 2, 3):
+                for lettered in (False, True):
+                    state = series_state(n, lettered)
+                    if letter and n < 3:
+                        step[state].append((series_state(n + 1, lettered or ch.isalpha()), letter[1], letter[0]))
+                    if digit:
+                        extra = 0.0 if lettered else DIGIT_SERIES_COST
+                        step[state].append((number_state(1), digit[1] + extra, digit[0]))
+            for n in (1, 2, 3, 4):
+                if digit and n < 4:
+                    step[number_state(n)].append((number_state(n + 1), digit[1], digit[0]))
+                if letter and ch.isalpha():
+                    step[number_state(n)].append((SUFFIX, letter[1], letter[0]))
+            self.steps[ch] = step
+
+        self.normalize = functools.lru_cache(maxsize=cache_size)(self.correct)
+
+    @staticmethod
+    def best(options, allowed, penalty):
+        candidates = [(cost + penalty(c), c) for c, cost in options if allowed(c)]
+        if not candidates:
+            return None
+        cost, c = min(candidates)
+        return c, cost
+
+    # --- Vanity plates ---
+    def vanity_prefixes(self, text):
+        """Every vanity prefix text can start with, as (prefix, characters used, cost)."""
+        found = []
+        stack = [(self.trie, 0, 0.0)]
+        while stack:
+            node, i, cost = stack.pop()
+            if '' in node:
+                found.append((node[''], i, cost))
+            if i >= len(text):
+                continue
+            ch = text[i]
+            if ch in node:
+                stack.append((node[ch], i + 1, cost))
+            for alt, alt_cost in CONFUSIONS.get(ch, {}).items():
+                if alt in node and cost + alt_cost <= 1.0:
+                    stack.append((node[alt], i + 1, cost + alt_cost))
+        return found
+
+    def decode_vanity(self, text):
+        """Cheapest (plate, cost) as a vanity prefix followed by a number (and optional letter)."""
+        best = None
+        for prefix, used, cost in self.vanity_prefixes(text):
+            rest = text[used:]
+            splits = [(rest, "", cost)]
+            if len(rest) > 1 and rest[-1].isalpha() and self.as_letter[rest[-1]]:
+                letter, extra = self.as_letter[rest[-1]]
+                splits.append((rest[:-1], letter, cost + extra))
+            for number, suffix, total in splits:
+                if not 1 <= len(number) <= 4 or any(self.as_digit[ch] is None for ch in number):
+                    continue
+                total += sum(self.as_digit[ch][1] for ch in number)
+                plate = prefix + "".join(self.as_digit[ch][0] for ch in number) + suffix
+                # Longer prefixes win ties, PUTRAJAYA1 is not PUTRA + JAYA1
+                key = (total, -len(prefix))
+                if best is None or key < best[0]:
+                    best = (key, plate)
+        return (best[1], best[0][0]) if best else None
+
+    # --- Standard plates ---
+    def decode_standard(self, text):
+        """Cheapest (plate, cost) in the standard format, or None."""
+        costs = [float('inf')] * STATES
+        plates = [""] * STATES
+        costs[START] = 0.0
+        for ch in text:
+            step = self.steps[ch]
+            # Dropping ch keeps every state as it is
+            new_costs = [cost + DELETE_COST for cost in costs]
+            new_plates = plates[:]
+            for state in range(STATES):
+                cost = costs[state]
+                if cost > MAX_COST:
+                    continue  # Unreachable, or already too expensive to be used
+                for target, extra, c in step[state]:
+                    if cost + extra < new_costs[target]:
+                        new_costs[target] = cost + extra
+                        new_plates[target] = plates[state] + c
+            costs, plates = new_costs, new_plates
+
+        end = min(ENDS, key=lambda state: (costs[state], plates[state]))
+        if costs[end] == float('inf'):
+            return None
+        return plates[end], costs[end]
+
+    def decode(self, text):
+        """(plate, kind, cost) for a raw reading; kind is 'standard', 'vanity' or 'raw' (nothing fitted)."""
+        text = "".join(ch for ch in text.upper() if ch.isalnum() and ch.isascii())
+        if len(text) < 2 or len(text) > self.max_length or not any(ch.isdigit() for ch in text):
+            return text, 'raw', 0.0  # Every plate has a number, nothing to anchor on
+        if re.search(r'\d{%d,}' % (MAX_DIGITS + 1), text):
+            return text, 'raw', 0.0
+        if MALAYSIA_PLATE_REGEX.match(text) and text[0] in STATE_LETTERS and 'I' not in text and 'O' not in text:
+            return text, 'standard', 0.0
+
+        standard = self.decode_standard(text)
+        vanity = self.decode_vanity(text)
+        if vanity and (standard is None or vanity[1] < standard[1]):
+            plate, kind, cost = vanity[0], 'vanity', vanity[1]
+        elif standard:
+            plate, kind, cost = standard[0], 'standard', standard[1]
+        else:
+            return text, 'raw', 0.0
+        if cost > MAX_COST:
+            return text, 'raw', cost
+        return plate, kind, cost
+
+    def correct(self, text):
+        return self.decode(text)[0]
+
+    def cache_info(self):
+        return self.normalize.cache_info()
+
+normalizer = PlateNormalizer()
@@ -0,0 +1,119 @@
+import cv2
+import numpy as np
+
+ALLOW_LIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# ==========================================
+# HELPER FUNCTIONS
+# ==========================================
+def split_plate_lines(gray, two_line_ratio=2.0):
+    """
+    Cheap line split for stacked (two row) plates. Wide crops are treated as one
+    line; squarer crops are cut at the emptiest row of the middle third.
+    Returns a list of (y_start, y_end) row ranges, top line first.
+    """
+    h, w = gray.shape[:2]
+    if h < 6 or w / float(h) >= two_line_ratio:
+        return [(0, h)]
+
+    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if bw.mean() > 127:
+        bw = 255 - bw  # Text should be the minority (white) pixels
+    profile = (bw > 0).sum(axis=1)
+
+    lo, hi = h // 3, (2 * h) // 3
+    split = lo + int(np.argmin(profile[lo:hi]))
+    return [(0, split), (split, h)]
+
+# ==========================================
+# PLATE RECOGNIZER
+# ==========================================
+class PlateRecognizer:
+    """
+    OCR front-end for plate crops that YOLO has already localised.
+
+    mode='readtext'  : the original path, EasyOCR detection (CRAFT) + recognition, one crop at a time.
+    mode='recognize' : skips CRAFT. Every crop (or each of its lines) becomes one region of a
+                       single stacked image that goes through reader.recognize() in one call.
+
+    read_batch() takes preprocessed grayscale crops and returns, per crop, (raw_text, conf) or None.
+    """
+    MODES = ('readtext', 'recognize')
+    MIN_PIECE_CONF = 0.6
+    GAP = 8  # Blank rows between stacked crops
+
+    def __init__(self, reader, mode='readtext', allowlist=ALLOW_LIST, batch_size=16, split_lines=True):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown OCR mode: {mode}")
+        self.reader = reader
+        self.mode = mode
+        self.allowlist = allowlist
+        self.batch_size = batch_size
+        self.split_lines = split_lines
+
+    def read_batch(self, crops):
+        if not crops:
+            return []
+        if self.mode == 'readtext':
+            return [self.read_one_readtext(c) for c in crops]
+        return self.read_batch_recognize(crops)
+
+    def read_one_readtext(self, clean):
+        ocr_res = self.reader.readtext(clean, allowlist=self.allowlist)
+        if not ocr_res:
+            return None
+        detections = sorted(
+            [res for res in ocr_res if res[2] > self.MIN_PIECE_CONF and len(res[1].strip()) > 1],
+            key=lambda res: res[0][0][0]
+        )
+        if not detections:
+            return None
+        txt = "".join(res[1].upper() for res in detections)
+        conf = max(res[2] for res in detections)
+        return txt, conf
+
+    def read_batch_recognize(self, crops):
+        # 1. Stack every crop into one canvas and list its text regions
+        width = max(c.shape[1] for c in crops)
+        height = sum(c.shape[0] for c in crops) + self.GAP * (len(crops) + 1)
+        canvas = np.full((height, width), 255, dtype=np.uint8)
+
+        regions = []   # [x_min, x_max, y_min, y_max]
+        owners = {}    # y_min -> (crop index, line index)
+        y = self.GAP
+        for idx, crop in enumerate(crops):
+            h, w = crop.shape[:2]
+            canvas[y:y + h, :w] = crop
+            lines = split_plate_lines(crop) if self.split_lines else [(0, h)]
+            for line_idx, (ly1, ly2) in enumerate(lines):
+                regions.append([0, w, y + ly1, y + ly2])
+                owners[y + ly1] = (idx, line_idx)
+            y += h + self.GAP
+
+        # 2. One recognizer call for the whole batch (no CRAFT)
+        results = self.reader.recognize(canvas, horizontal_list=regions, free_list=[],
+                                        allowlist=self.allowlist, batch_size=self.batch_size,
+                                        detail=1, paragraph=False)
+
+        # 3. Put the lines back together per crop
+        pieces = [[] for _ in crops]
+        for box, text, conf in results:
+            owner = owners.get(int(box[0][1]))
+            if owner is None:
+                continue
+            text = text.strip().upper()
+            if text and conf > self.MIN_PIECE_CONF:
+                pieces[owner[0]].append((owner[1], text, conf))
+
+        readings = []
+        for crop_pieces in pieces:
+            if not crop_pieces:
+                readings.append(None)
+                continue
+            crop_pieces.sort()
+            txt = "".join(p[1] for p in crop_pieces)
+            if len(txt) < 2:
+                readings.append(None)
+                continue
+            readings.append((txt, max(p[2] for p in crop_pieces)))
+        return readings
@@ -0,0 +1,84 @@
+from collections import deque
+
+# ==========================================
+# PLATE READING
+# ==========================================
+class PlateReading:
+    """One OCR reading of a plate track with what was known about the car at that frame."""
+    def __init__(self, text, conf, color="Unknown", dist=0.0, height=0.0, image=None):
+        self.text = text
+        self.conf = conf
+        self.color = color
+        self.dist = dist
+        self.height = height
+        self.image = image
+
+# ==========================================
+# CHARACTER-LEVEL TEMPORAL VOTE
+# ==========================================
+class PlateVote:
+    """
+    Fuses the readings of one plate track character by character, each
+    reading weighted by its OCR confidence.
+
+    Readings are grouped by length, the heaviest length wins, then every
+    position takes its heaviest character. The support of the fused plate is
+    that of its weakest position (or of the length, if readings disagree on
+    it): winning weight / (total weight + doubt). doubt is pseudo-weight for
+    "something else", so a single reading can never commit on its own, two
+    clean agreeing readings do (0.9 + 0.9 -> 0.75), and a position with
+    one conflicting read needs four agreeing ones to outweigh it (three
+    against one is 2.7 / 4.2 = 0.643, just under the 0.65 threshold).
+
+    Only the last max_reads readings count, so an early misread ages out.
+    """
+    def __init__(self, threshold=0.65, doubt=0.6, max_reads=8):
+        self.threshold = threshold
+        self.doubt = doubt
+        self.readings = deque(maxlen=max_reads)
+        self.committed = False
+
+    def add(self, reading):
+        self.readings.append(reading)
+
+    def fuse(self):
+        """Returns (plate, support) for the readings so far, (None, 0.0) without any."""
+        if not self.readings:
+            return None, 0.0
+
+        lengths = {}
+        for r in self.readings:
+            lengths[len(r.text)] = lengths.get(len(r.text), 0.0) + r.conf
+        total = sum(lengths.values())
+        length = max(lengths, key=lengths.get)
+        support = lengths[length] / (total + self.doubt) if len(lengths) > 1 else 1.0
+
+        columns = [{} for _ in range(length)]
+        for r in self.readings:
+            if len(r.text) == length:
+                for column, ch in zip(columns, r.text):
+                    column[ch] = column.get(ch, 0.0) + r.conf
+
+        chars = []
+        for column in columns:
+            ch = max(column, key=column.get)
+            chars.append(ch)
+            support = min(support, column[ch] / (sum(column.values()) + self.doubt))
+        return "".join(chars), support
+
+    def winner(self, plate):
+        """The reading that best backs the fused plate: most matching characters, then confidence."""
+        def score(r):
+            same = sum(a == b for a, b in zip(r.text, plate)) if len(r.text) == len(plate) else -1
+            return same, r.conf
+        return max(self.readings, key=score)
+
+    def decide(self):
+        """(plate, support, winning reading) once the support passes the threshold, else None. Commits once."""
+        if self.committed:
+            return None
+        plate, support = self.fuse()
+        if plate is None or support < self.threshold:
+            return None
+        self.committed = True
+        return plate, support, self.winner(plate)
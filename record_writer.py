@@ -0,0 +1,304 @@
+import os
+import time
+import threading
+from collections import deque
+import cv2
+from cloud_spool import CloudSpool, SpoolReplayer, safe_key
+from detection_store import get_store
+from metrics import metrics
+
+# ==========================================
+# WRITE JOB
+# ==========================================
+class WriteJob:
+    """
+    One detection to persist. record is a DetectionStore row for the local store,
+    image (if any) goes to img_name, and cloud_data to detection_logs/{user_id}/{plate}.
+    For a manual correction, corrects is the plate being replaced: the local row is
+    rewritten and the cloud key is removed in the same update.
+    """
+    def __init__(self, record, image=None, img_name=None, cloud_ref=None, user_id=None,
+                 plate=None, cloud_data=None, corrects=None):
+        self.record = record
+        self.image = image
+        self.img_name = img_name
+        self.cloud_ref = cloud_ref
+        self.user_id = user_id
+        self.plate = plate
+        self.cloud_data = cloud_data
+        self.corrects = corrects
+        self.enqueued_at = time.perf_counter()
+        self.store_attempts = 0    # Failed local store writes so far
+        self.store_only = False    # Re-queued after a store failure: image and cloud are already done
+
+# ==========================================
+# BACKGROUND RECORD WRITER
+# ==========================================
+class RecordWriter:
+    """
+    Takes local store / JPEG / Firebase writes off the frame loop.
+
+    Jobs go into a bounded queue. The writer thread drains up to batch_size jobs
+    at a time: all records in one store transaction, then the images, then one
+    multi-path update() per user for the cloud.
+
+    With spool_path and cloud_ref the cloud records are not sent directly: they
+    are written to a durable CloudSpool and a SpoolReplayer uploads them in
+    batches, retrying with backoff while the uplink is down.
+
+    Backpressure when the queue is full:
+      'block'       : submit() waits up to block_timeout, then drops the new job
+      'drop_newest' : the new job is rejected immediately
+      'drop_oldest' : the oldest queued job is discarded to make room
+    """
+    POLICIES = ('block', 'drop_newest', 'drop_oldest')
+    STORE_RETRIES = 3  # A record whose store write keeps failing is re-queued this often, then dropped
+
+    def __init__(self, store_path, img_folder, max_queue=256, policy='block', block_timeout=1.0, batch_size=32,
+                 spool_path=None, cloud_ref=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.store = get_store(store_path)
+        self.img_folder = img_folder
+        self.max_queue = max_queue
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.is_running = True
+        self.in_flight = 0
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.store_failures = 0
+        self.store_retries = 0
+        self.store_dropped = 0
+        self.image_failures = 0
+        self.cloud_failures = 0
+        self.last_error = None
+        self.last_latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+        # Durable cloud path, also replays whatever a previous run left behind
+        self.spool = None
+        self.replayer = None
+        if spool_path and cloud_ref is not None:
+            self.spool = CloudSpool(spool_path)
+            self.replayer = SpoolReplayer(self.spool, cloud_ref).start()
+
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, job):
+        """Queues a job. Returns False if it was dropped because of backpressure."""
+        with self.cond:
+            if len(self.queue) >= self.max_queue:
+                if self.policy == 'drop_newest':
+                    self.dropped += 1
+                    return False
+                elif self.policy == 'drop_oldest':
+                    self.queue.popleft()
+                    self.dropped += 1
+                else:
+                    deadline = time.perf_counter() + self.block_timeout
+                    while len(self.queue) >= self.max_queue:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0 or not self.is_running:
+                            self.dropped += 1
+                            return False
+                        self.cond.wait(remaining)
+
+            self.queue.append(job)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self.queue))
+            self.cond.notify_all()
+            return True
+
+    def _writer_loop(self):
+        while True:
+            with self.cond:
+                while not self.queue and self.is_running:
+                    self.cond.wait(0.5)
+                if not self.queue and not self.is_running:
+                    return
+                batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+                self.in_flight = len(batch)
+                self.cond.notify_all()
+            self.write_batch(batch)
+
+    def write_store(self, batch):
+        """
+        Writes the records of batch to the local store: runs of plain inserts share
+        one transaction, a correction is its own. Returns the jobs that failed.
+        """
+        failed = []
+        inserts = []
+        for job in batch:
+            if job.corrects is None:
+                inserts.append(job)
+                continue
+            self.insert_jobs(inserts, failed)
+            inserts = []
+            try:
+                self.store.correct_latest(job.record.get('user_id'), job.record.get('camera_source'),
+                                          job.corrects, job.record)
+            except Exception as e:
+                self.store_error(e)
+                failed.append(job)
+        self.insert_jobs(inserts, failed)
+        return failed
+
+    def insert_jobs(self, jobs, failed):
+        if not jobs:
+            return
+        try:
+            self.store.insert_many([job.record for job in jobs])
+        except Exception:
+            # The transaction rolled back as a whole, find the records that fail on their own
+            for job in jobs:
+                try:
+                    self.store.insert_many([job.record])
+                except Exception as e:
+                    self.store_error(e)
+                    failed.append(job)
+
+    def store_error(self, error):
+        self.store_failures += 1
+        self.last_error = f"Store: {error}"
+        metrics.error('store_write')
+
+    def write_batch(self, batch):
+        # 1. Local store
+        t0 = time.perf_counter()
+        failed = self.write_store(batch)
+        metrics.observe('store_write', (time.perf_counter() - t0) * 1000.0)
+        retry = [job for job in failed if job.store_attempts + 1 < self.STORE_RETRIES]
+        self.store_dropped += len(failed) - len(retry)
+
+        # 2. Images
+        for job in batch:
+            if job.image is None or job.store_only:
+                continue
+            t0 = time.perf_counter()
+            try:
+                if not cv2.imwrite(os.path.join(self.img_folder, job.img_name), job.image):
+                    raise IOError(f"could not write {job.img_name}")
+            except Exception as e:
+                self.image_failures += 1
+                self.last_error = f"Image: {e}"
+                metrics.error('image_write')
+            metrics.observe('image_write', (time.perf_counter() - t0) * 1000.0)
+
+        # 3. Cloud, one multi-path update per (database, user)
+        groups = {}
+        for job in batch:
+            if job.cloud_ref is None or not job.user_id or job.cloud_data is None or job.store_only:
+                continue
+            key = (id(job.cloud_ref), job.user_id)
+            if key not in groups:
+                groups[key] = (job.cloud_ref, job.user_id, {})
+            payload = groups[key][2]
+            if job.corrects and job.corrects != job.plate:
+                payload[job.corrects] = None
+            payload[job.plate] = job.cloud_data
+
+        for cloud_ref, user_id, payload in groups.values():
+            t0 = time.perf_counter()
+            self.write_cloud(cloud_ref, user_id, payload)
+            metrics.observe('cloud_write', (time.perf_counter() - t0) * 1000.0)
+        done = [job for job in batch if job not in retry]
+        metrics.inc('records_written', len(done))
+
+        # 4. Store retries go to the back of the queue, only their store write is repeated
+        for job in retry:
+            job.store_attempts += 1
+            job.store_only = True
+
+        # 5. Metrics
+        now = time.perf_counter()
+        with self.cond:
+            self.queue.extend(retry)
+            self.store_retries += len(retry)
+            self.batches += 1
+            self.written += len(done)
+            self.in_flight = 0
+            for job in done:
+                latency_ms = (now - job.enqueued_at) * 1000.0
+                self.last_latency_ms = latency_ms
+                self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+                if self.avg_latency_ms == 0.0:
+                    self.avg_latency_ms = latency_ms
+                else:
+                    self.avg_latency_ms = 0.9 * self.avg_latency_ms + 0.1 * latency_ms
+
+    def write_cloud(self, cloud_ref, user_id, payload):
+        if self.replayer is not None and cloud_ref is self.replayer.cloud_ref:
+            try:
+                self.spool.enqueue(user_id, payload)
+                self.replayer.wake()
+            except Exception as e:
+                self.cloud_failures += len(payload)
+                self.last_error = f"Spool: {e}"
+                metrics.error('cloud_write')
+            return
+        try:
+            # The spool escapes keys itself, the direct path must too
+            cloud_ref.child('detection_logs').child(user_id).update({safe_key(k): v for k, v in payload.items()})
+        except Exception as e:
+            self.cloud_failures += len(payload)
+            self.last_error = f"Cloud: {e}"
+            metrics.error('cloud_write')
+
+    def get_stats(self):
+        cloud = self.replayer.get_stats() if self.replayer is not None else {}
+        with self.cond:
+            return {
+                'cloud_pending': cloud.get('pending', 0),
+                'cloud_replayed': cloud.get('replayed', 0),
+                'cloud_dead': cloud.get('dead', 0),
+                'cloud_offline': cloud.get('consecutive_failures', 0) > 0,
+                'queue_depth': len(self.queue),
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'batches': self.batches,
+                'store_failures': self.store_failures,
+                'store_retries': self.store_retries,
+                'store_dropped': self.store_dropped,
+                'image_failures': self.image_failures,
+                'cloud_failures': self.cloud_failures,
+                'last_error': self.last_error,
+                'latency_ms': self.last_latency_ms,
+                'avg_latency_ms': self.avg_latency_ms,
+                'max_latency_ms': self.max_latency_ms,
+            }
+
+    def flush(self, timeout=5.0):
+        """Waits until every queued job has been written (or the timeout passes)."""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            with self.cond:
+                if not self.queue and self.in_flight == 0:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def stop(self, flush=True, timeout=5.0):
+        if flush:
+            self.flush(timeout)
+        with self.cond:
+            self.is_running = False
+            self.cond.notify_all()
+        if self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+        if self.replayer is not None:
+            self.replayer.stop()
+            self.spool.close()
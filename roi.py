@@ -0,0 +1,100 @@
+import os
+import json
+import numpy as np
+import cv2
+
+# ==========================================
+# DETECTION REGION OF INTEREST
+# ==========================================
+# Spec per camera:
+#   "full"                      the whole frame (default)
+#   "band"                      full width, SystemConfig.ROI_MARGIN rows above and below the trigger line
+#   [[x, y], [x, y], ...]       polygon in normalized (0..1) frame coordinates, outside is blanked
+ROI_FILE = "camera_roi.json"
+STRIDE = 32
+
+def round_up(value, stride=STRIDE):
+    return int(-(-value // stride) * stride)
+
+def is_polygon(spec):
+    return isinstance(spec, (list, tuple)) and len(spec) >= 3
+
+class DetectionROI:
+    """
+    Cuts the part of the frame the detector should see. crop() returns the
+    detector input and the (x, y) offset that maps its boxes back to frame
+    coordinates; imgsz() the matching detector input size.
+    """
+    def __init__(self, spec="full", margin=160):
+        self.spec = spec
+        self.margin = margin
+        self.mask_key = None
+        self.mask = None
+
+    def crop(self, frame, line_y):
+        h, w = frame.shape[:2]
+        if self.spec == "band":
+            # A stride multiple of rows, so the detector needs no padding
+            rows = min(h, round_up(2 * self.margin))
+            y1 = min(max(0, line_y - rows // 2), h - rows)
+            return frame[y1:y1 + rows], (0, y1)
+
+        if is_polygon(self.spec):
+            pts = np.array([[min(max(px, 0.0), 1.0) * (w - 1), min(max(py, 0.0), 1.0) * (h - 1)]
+                            for px, py in self.spec], dtype=np.int32)
+            x, y, bw, bh = cv2.boundingRect(pts)
+            if bw < STRIDE or bh < STRIDE:
+                return frame, (0, 0)
+            key = (h, w, pts.tobytes())
+            if key != self.mask_key:
+                mask = np.zeros((bh, bw), dtype=np.uint8)
+                cv2.fillPoly(mask, [pts - (x, y)], 255)
+                self.mask_key, self.mask = key, mask == 0
+            crop = frame[y:y + bh, x:x + bw].copy()
+            crop[self.mask] = 0
+            return crop, (x, y)
+
+        return frame, (0, 0)
+
+    def cuts(self, box, offset, crop_shape, frame_shape, margin=2):
+        """
+        True if the crop may have cut box (frame coordinates): it ends on a crop
+        edge that lies inside the frame, or it covers blanked polygon pixels.
+        """
+        ox, oy = offset
+        ch, cw = crop_shape[:2]
+        h, w = frame_shape[:2]
+        x1, y1, x2, y2 = box
+        if ((oy > 0 and y1 <= oy + margin) or (oy + ch < h and y2 >= oy + ch - margin) or
+                (ox > 0 and x1 <= ox + margin) or (ox + cw < w and x2 >= ox + cw - margin)):
+            return True
+        if is_polygon(self.spec) and self.mask is not None and self.mask.shape == (ch, cw):
+            return bool(self.mask[max(0, y1 - oy):max(0, y2 - oy), max(0, x1 - ox):max(0, x2 - ox)].any())
+        return False
+
+    def imgsz(self, crop):
+        """Detector input size (h, w) for the crop, None for the model's default size."""
+        if self.spec == "full" or not self.spec:
+            return None
+        h, w = crop.shape[:2]
+        return (round_up(h), round_up(w))
+
+# ==========================================
+# PER-CAMERA PERSISTENCE
+# ==========================================
+def load_rois(folder):
+    """{camera_source: spec} saved by the ROI editor, empty if there is none."""
+    try:
+        with open(os.path.join(folder, ROI_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_rois(folder, rois):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, ROI_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(rois, f, indent=2)
+    os.replace(tmp, path)
+    return path
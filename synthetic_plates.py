@@ -0,0 +1,136 @@
+import random
+import numpy as np
+import cv2
+from plate_normalizer import MALAYSIA_PLATE_REGEX
+
+# ==========================================
+# SYNTHETIC MALAYSIAN PLATES
+# ==========================================
+# Malaysian series never use I and O
+PLATE_LETTERS = "ABCDEFGHJKLMNPQRSTUVWXY"
+STATE_PREFIXES = "WBJPANKDCTRMVFSQ"
+
+def random_plate(rng):
+    while True:
+        prefix = rng.choice(STATE_PREFIXES) + "".join(rng.choice(PLATE_LETTERS) for _ in range(rng.randint(0, 2)))
+        number = str(rng.randint(1, 9999))
+        suffix = rng.choice(PLATE_LETTERS) if rng.random() < 0.25 else ""
+        plate = prefix + number + suffix
+        if MALAYSIA_PLATE_REGEX.match(plate):
+            return plate
+
+def render_plate(plate, rng, two_line=False):
+    """White characters on a black plate, like the standard Malaysian plate, with mild camera degradation."""
+    font = cv2.FONT_HERSHEY_DUPLEX
+    if two_line:
+        m = MALAYSIA_PLATE_REGEX.match(plate)
+        lines = [m.group(1), m.group(2) + m.group(3)]
+    else:
+        lines = [plate]
+    scale, thick = 1.6, 3
+    sizes = [cv2.getTextSize(line, font, scale, thick)[0] for line in lines]
+    w = max(s[0] for s in sizes) + 30
+    line_h = max(s[1] for s in sizes) + 16
+    h = line_h * len(lines) + 14
+    img = np.zeros((h, w, 3), dtype=np.uint8)
+    cv2.rectangle(img, (2, 2), (w - 3, h - 3), (200, 200, 200), 2)
+    for i, (line, (tw, th)) in enumerate(zip(lines, sizes)):
+        cv2.putText(img, line, ((w - tw) // 2, 7 + line_h * i + (line_h + th) // 2), font, scale, (255, 255, 255), thick,
+                    cv2.LINE_AA)
+
+    # Perspective tilt, scale to a typical detector crop, blur and sensor noise
+    dx, dy = rng.uniform(-0.06, 0.06) * w, rng.uniform(-0.08, 0.08) * h
+    src = np.float32([[0, 0], [w, 0], [w, h], [0, h]])
+    dst = np.float32([[max(0, dx), max(0, dy)], [w - max(0, -dx), max(0, -dy)], [w, h], [0, h]])
+    img = cv2.warpPerspective(img, cv2.getPerspectiveTransform(src, dst), (w, h))
+    target_w = rng.randint(70, 140)
+    img = cv2.resize(img, (target_w, max(12, int(h * target_w / w))), interpolation=cv2.INTER_AREA)
+    if rng.random() < 0.5:
+        img = cv2.GaussianBlur(img, (3, 3), 0)
+    noise = np.random.RandomState(rng.randint(0, 2 ** 31 - 1)).normal(0, 6, img.shape)
+    return np.clip(img.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+def make_synthetic(count, seed, two_line_ratio=0.2):
+    rng = random.Random(seed)
+    samples = []
+    for i in range(count):
+        plate = random_plate(rng)
+        samples.append((f"{i:04d}_{plate}.png", render_plate(plate, rng, rng.random() < two_line_ratio), plate))
+    return samples
+
+# ==========================================
+# SYNTHETIC GATE SCENE
+# ==========================================
+CAR_COLORS = [(235, 235, 235), (30, 30, 30), (180, 180, 185), (40, 40, 200), (170, 90, 30), (60, 60, 60)]
+
+class SyntheticVehicle:
+    def __init__(self, plate, plate_img, color, x, born, cross_seconds):
+        self.plate = plate
+        self.plate_img = plate_img
+        self.color = color
+        self.x = x                      # Lane centre, 0..1 of the frame width
+        self.born = born
+        self.cross_seconds = cross_seconds
+
+class SyntheticScene:
+    """
+    A fixed camera over a road: vehicles arrive at `rate` per second (Poisson),
+    drive from the top of the frame to the bottom in `cross_seconds` and grow
+    as they come closer, each carrying a rendered Malaysian plate. Everything
+    is a function of the scene time, so a seed gives the same traffic on any
+    machine. `vehicles` keeps (arrival time, plate) as ground truth.
+    """
+    def __init__(self, width=960, height=540, rate=1.0, cross_seconds=3.0, seed=0):
+        self.width = width
+        self.height = height
+        self.rate = rate
+        self.cross_seconds = cross_seconds
+        self.rng = random.Random(seed)
+        self.active = []
+        self.vehicles = []
+        self.next_arrival = self.rng.expovariate(rate) if rate > 0 else float("inf")
+        self.background = self.make_background()
+
+    def make_background(self):
+        bg = np.full((self.height, self.width, 3), 70, dtype=np.uint8)
+        bg[:, :int(self.width * 0.1)] = (60, 110, 60)
+        bg[:, int(self.width * 0.9):] = (60, 110, 60)
+        for y in range(0, self.height, 60):
+            cv2.line(bg, (self.width // 2, y), (self.width // 2, y + 30), (200, 200, 200), 4)
+        noise = np.random.RandomState(self.rng.randint(0, 2 ** 31 - 1)).normal(0, 3, bg.shape)
+        return np.clip(bg + noise, 0, 255).astype(np.uint8)
+
+    def advance(self, t):
+        """Spawns the vehicles that arrived up to scene time t and retires the ones that left."""
+        while self.next_arrival <= t:
+            plate = random_plate(self.rng)
+            vehicle = SyntheticVehicle(plate, render_plate(plate, self.rng), self.rng.choice(CAR_COLORS),
+                                       self.rng.choice((0.3, 0.7)), self.next_arrival,
+                                       self.cross_seconds * self.rng.uniform(0.8, 1.25))
+            self.active.append(vehicle)
+            self.vehicles.append((vehicle.born, plate))
+            self.next_arrival += self.rng.expovariate(self.rate)
+        self.active = [v for v in self.active if t - v.born < v.cross_seconds]
+
+    def render(self, t):
+        frame = self.background.copy()
+        for v in self.active:
+            progress = (t - v.born) / v.cross_seconds
+            scale = 0.55 + 0.45 * progress
+            car_w, car_h = int(self.width * 0.28 * scale), int(self.width * 0.22 * scale)
+            cx = int(self.width * v.x)
+            y2 = int(-car_h + progress * (self.height + car_h * 1.2))
+            x1, y1, x2 = cx - car_w // 2, y2 - car_h, cx + car_w // 2
+            cv2.rectangle(frame, (x1, y1), (x2, y2), v.color, -1)
+            cv2.rectangle(frame, (x1 + car_w // 8, y1 + car_h // 10), (x2 - car_w // 8, y1 + car_h // 3), (40, 40, 40), -1)
+
+            # Plate at the bottom centre of the car
+            pw = max(20, int(car_w * 0.35))
+            ph = max(8, int(v.plate_img.shape[0] * pw / v.plate_img.shape[1]))
+            px1, py1 = cx - pw // 2, y2 - ph - car_h // 12
+            sx1, sy1 = max(0, px1), max(0, py1)
+            sx2, sy2 = min(self.width, px1 + pw), min(self.height, py1 + ph)
+            if sx2 > sx1 and sy2 > sy1:
+                plate = cv2.resize(v.plate_img, (pw, ph), interpolation=cv2.INTER_AREA)
+                frame[sy1:sy2, sx1:sx2] = plate[sy1 - py1:sy2 - py1, sx1 - px1:sx2 - px1]
+        return frame
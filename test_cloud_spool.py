@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from cloud_spool import CloudSpool, SpoolReplayer, safe_key
+from memory_db import MemoryDatabase
+
+# ==========================================
+# CLOUD SPOOL AGAINST THE IN-MEMORY DATABASE
+# ==========================================
+class CloudSpoolTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.spool = CloudSpool(os.path.join(self.folder, "spool.db"), max_attempts=3)
+        self.db = MemoryDatabase()
+        self.replayer = SpoolReplayer(self.spool, self.db.reference(), base_delay=0.05, max_delay=0.2,
+                                      idle_interval=0.05)
+
+    def tearDown(self):
+        self.replayer.stop(flush=False)
+        self.spool.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def logs(self, user="u1"):
+        return self.db.reference(f"detection_logs/{user}").get() or {}
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_replays_after_outage(self):
+        self.db.online = False
+        self.spool.enqueue("u1", {"WQA1234": {'plate_number': "WQA1234"}, "BKL55": {'plate_number': "BKL55"}})
+        self.assertEqual(self.replayer.flush_once(), -1)
+        self.assertEqual(self.spool.pending_count(), 2)
+        self.assertEqual(self.db.data, {})
+
+        self.db.online = True
+        self.assertEqual(self.replayer.flush_once(), 2)
+        self.assertEqual(self.spool.pending_count(), 0)
+        self.assertEqual(set(self.logs()), {"WQA1234", "BKL55"})
+        self.assertEqual(self.replayer.consecutive_failures, 0)
+
+    def test_outage_never_dead_letters(self):
+        self.db.online = False
+        self.spool.enqueue("u1", {"WQA1234": {}, "BKL55": {}})
+        for _ in range(10):
+            self.replayer.flush_once()
+        self.assertEqual(self.spool.dead_count(), 0)
+        self.assertEqual(self.spool.pending_count(), 2)
+
+    def test_backoff_grows_up_to_max_delay(self):
+        delays = []
+        for failures in (1, 2, 3, 10):
+            self.replayer.consecutive_failures = failures
+            delays.append(self.replayer.backoff_delay())
+        self.assertLess(delays[0], delays[1])
+        self.assertLess(delays[1], delays[2])
+        self.assertLessEqual(delays[3], self.replayer.max_delay * 1.2)
+
+    def test_replay_loop_backs_off_then_recovers(self):
+        self.db.online = False
+        self.spool.enqueue("u1", {"WQA1234": {}})
+        self.replayer.start()
+        self.assertTrue(self.wait_for(lambda: self.replayer.consecutive_failures >= 2))
+        # One round trip per attempt while offline, no row-by-row hammering
+        self.assertLessEqual(self.db.calls.get('update', 0), self.replayer.consecutive_failures + 1)
+
+        self.db.online = True
+        self.assertTrue(self.wait_for(lambda: self.spool.pending_count() == 0))
+        self.assertIn("WQA1234", self.logs())
+
+    def test_poison_row_does_not_block_and_is_dead_lettered(self):
+        # A row spooled unescaped (e.g. by an older version) that the database always rejects
+        with self.spool.transaction() as conn:
+            conn.execute("INSERT INTO pending (user_id, key, value, created) VALUES (?, ?, ?, ?)",
+                         ("u1", "W.Q[1]", json.dumps({'plate_number': "W.Q[1]"}), 0.0))
+        for i in range(3):
+            self.spool.enqueue("u1", {f"GOOD{i}": {'n': i}})
+            self.assertGreater(self.replayer.flush_once(), 0)
+        self.assertEqual(set(self.logs()), {"GOOD0", "GOOD1", "GOOD2"})
+        self.assertEqual(self.spool.pending_count(), 0)
+        self.assertEqual(self.spool.dead_count(), 1)
+        self.assertEqual(self.spool.dead_letters()[0][1], "W.Q[1]")
+
+    def test_keys_are_escaped(self):
+        self.spool.enqueue("u1", {"AB/C.1": {'plate_number': "AB/C.1"}})
+        self.assertEqual(self.replayer.flush_once(), 1)
+        self.assertEqual(set(self.logs()), {safe_key("AB/C.1")})
+        self.assertNotIn("AB", self.logs())
+        self.assertEqual(safe_key("WQA1234"), "WQA1234")
+        self.assertNotEqual(safe_key("A%2E"), safe_key("A."))
+
+    def test_failed_write_rolls_back(self):
+        with self.assertRaises(Exception):
+            with self.spool.transaction() as conn:
+                conn.execute("INSERT INTO pending (user_id, key, created) VALUES (NULL, 'x', 0)")
+        self.spool.enqueue("u1", {"WQA1234": {}})
+        self.assertEqual(self.spool.pending_count(), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import history_pages
+from history_pages import CloudHistoryPager, ensure_source_index, source_index
+from memory_db import MemoryDatabase
+
+def record(camera, timestamp, indexed=True):
+    data = {'camera_source': camera, 'timestamp': timestamp}
+    if indexed:
+        data['source_ts'] = source_index(camera, timestamp)
+    return data
+
+# ==========================================
+# CAMERA FILTERED CLOUD HISTORY
+# ==========================================
+class CloudHistoryPagerTest(unittest.TestCase):
+    def setUp(self):
+        history_pages._indexed_users.clear()
+        self.db = MemoryDatabase({'detection_logs': {'u1': {
+            "WQA1234": record("cam1", "2024-01-01 10:00:00", indexed=False),
+            "BKL55": record("cam2", "2024-01-01 11:00:00", indexed=False),
+            "VBL3321": record("cam1", "2024-01-02 09:00:00"),
+        }}})
+        self.ref = self.db.reference()
+
+    def plates(self, pager):
+        return [plate for plate, _ in pager.next_page()]
+
+    def test_records_without_source_ts_are_backfilled_on_first_filter(self):
+        pager = CloudHistoryPager(self.ref, 'u1', camera_source="cam1")
+        self.assertEqual(self.plates(pager), ["VBL3321", "WQA1234"])
+        self.assertEqual(self.db.data['detection_logs']['u1']["BKL55"]['source_ts'],
+                         source_index("cam2", "2024-01-01 11:00:00"))
+
+    def test_backfill_runs_once_per_user(self):
+        self.assertEqual(ensure_source_index(self.ref, 'u1'), 2)
+        updates = self.db.calls.get('update', 0)
+        CloudHistoryPager(self.ref, 'u1', camera_source="cam2")
+        self.assertEqual(self.db.calls.get('update', 0), updates)
+
+    def test_indexed_user_is_not_rewritten(self):
+        ensure_source_index(self.ref, 'u1')
+        history_pages._indexed_users.clear()
+        self.assertEqual(ensure_source_index(self.ref, 'u1'), 0)
+
+    def test_offline_backfill_is_retried(self):
+        self.db.online = False
+        with self.assertRaises(Exception):
+            CloudHistoryPager(self.ref, 'u1', camera_source="cam1").next_page()
+        self.db.online = True
+        pager = CloudHistoryPager(self.ref, 'u1', camera_source="cam1")
+        self.assertEqual(self.plates(pager), ["VBL3321", "WQA1234"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+from lpr_pipeline import ModelSet
+from multi_camera import MultiCameraHost
+from inference_backend import onnx_path, onnxruntime_available
+
+class EmptyResult:
+    boxes = []
+
+class RecordingDetector:
+    """Detector that finds nothing and remembers how many frames every predict() call got."""
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size
+        self.calls = []
+
+    def predict(self, frames, **kwargs):
+        frames = frames if isinstance(frames, list) else [frames]
+        self.calls.append(len(frames))
+        if self.batch_size and len(frames) > self.batch_size:
+            raise RuntimeError("fixed batch model got a larger batch")
+        return [EmptyResult() for _ in frames]
+
+# ==========================================
+# BATCHED DETECTION ACROSS CAMERAS
+# ==========================================
+class BatchedDetectionTest(unittest.TestCase):
+    CAMERAS = 4
+
+    def host(self, models):
+        return MultiCameraHost(["synthetic://plates"] * self.CAMERAS, save_records=False, gpu=False, models=models)
+
+    def chunk(self, host):
+        frame = np.zeros((540, 960, 3), dtype=np.uint8)
+        return [(slot, frame.copy()) for slot in host.slots]
+
+    def test_cameras_share_one_detector_call(self):
+        models = ModelSet(gpu=False)
+        models.detector = RecordingDetector()
+        host = self.host(models)
+        results = host.detect_chunk(self.chunk(host))
+        self.assertEqual(models.detector.calls, [self.CAMERAS])
+        self.assertEqual(len(results), self.CAMERAS)
+        self.assertTrue(all(r is not None for r in results))
+
+    def test_fixed_batch_model_is_fed_without_failing_first(self):
+        models = ModelSet(gpu=False)
+        models.detector = RecordingDetector(batch_size=1)
+        host = self.host(models)
+        results = host.detect_chunk(self.chunk(host))
+        self.assertEqual(models.detector.calls, [1] * self.CAMERAS)
+        self.assertTrue(all(r is not None for r in results))
+        self.assertEqual(sum(slot.errors for slot in host.slots), 0)
+
+    @unittest.skipUnless(onnxruntime_available() and onnx_path("best"), "needs onnxruntime and an exported best.onnx")
+    def test_onnx_detector_runs_one_batch(self):
+        models = ModelSet(gpu=False, backend='onnx')
+        models.load()
+        self.assertIsNone(models.detector.batch_size, "best.onnx has a fixed batch, export it again")
+        calls = []
+        predict = models.detector.predict
+
+        def counting_predict(frames, **kwargs):
+            calls.append(len(frames) if isinstance(frames, list) else 1)
+            return predict(frames, **kwargs)
+        models.detector.predict = counting_predict
+        host = self.host(models)
+        results = host.detect_chunk(self.chunk(host))
+        self.assertEqual(calls, [self.CAMERAS])
+        self.assertTrue(all(r is not None for r in results))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from plate_dedup import PlateDedup
+
+# ==========================================
+# PER-PLATE DEDUP INDEX
+# ==========================================
+class PlateDedupTest(unittest.TestCase):
+    def test_other_plates_are_saved_back_to_back(self):
+        dedup = PlateDedup(window=15.0)
+        self.assertTrue(dedup.should_save("WQA1234", 0.0))
+        self.assertTrue(dedup.should_save("BKL5521", 1.0))
+        self.assertFalse(dedup.should_save("WQA1284", 2.0))
+        self.assertTrue(dedup.should_save("WQA1234", 40.0))
+
+    def test_expired_plates_leave_no_variants(self):
+        dedup = PlateDedup(window=5.0, max_distance=1)
+        dedup.should_save("WQA1234", 0.0)
+        dedup.max_distance = 0
+        dedup.should_save("BKL5521", 1.0)
+        dedup.max_distance = 1
+        dedup.expire(30.0)
+        self.assertEqual((dedup.plates, dedup.variants, dedup.plate_keys), ({}, {}, {}))
+
+    def test_forget_after_max_distance_change(self):
+        dedup = PlateDedup(max_distance=1)
+        dedup.should_save("WQA1234", 0.0)
+        dedup.max_distance = 0
+        dedup.forget("WQA1234")
+        self.assertEqual(dedup.variants, {})
+        self.assertTrue(dedup.should_save("WQA1284", 1.0))
+
+    def test_eviction_keeps_the_index_bounded(self):
+        dedup = PlateDedup(max_entries=3)
+        for i in range(10):
+            dedup.should_save(f"WQA{1000 + i * 11}", float(i))
+        self.assertEqual(len(dedup.plates), 3)
+        self.assertEqual(set(p for group in dedup.variants.values() for p in group), set(dedup.plates))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from plate_normalizer import PlateNormalizer, MAX_COST
+
+# ==========================================
+# PLATE NORMALIZER ACCURACY CHECKS
+# ==========================================
+# (raw OCR text, plate it must become)
+CASES = [
+    ("WQA1234", "WQA1234"), ("VBL 3321", "VBL3321"), ("WA-1234-C", "WA1234C"), ("SAB1234A", "SAB1234A"),
+    ("QAA1234", "QAA1234"), ("NBH1234", "NBH1234"), ("JSS7S", "JSS7S"),
+    ("WQA12B4", "WQA1284"), ("W0A1234", "WQA1234"), ("BMS8O21", "BMS8021"), ("8KL1234", "BKL1234"),
+    ("WQAI234", "WQA1234"), ("WXY1Z3", "WXY123"), ("PKD 5S1", "PKD551"), ("JLG77O", "JLG770"),
+    ("PATRIOT1", "PATRIOT1"), ("PR0T0N12", "PROTON12"), ("PUTRAJAYA1", "PUTRAJAYA1"), ("G1M88", "G1M88"),
+    ("VIP1", "VIP1"), ("X1", "X1"), ("1M4U88", "1M4U88"), ("UITM7", "UITM7"), ("MALAYSIA 2O", "MALAYSIA20"),
+    ("1234", "1234"), ("", ""),
+    # Not a plate: nothing is invented
+    ("ABC", "ABC"), ("WQA", "WQA"), ("VIP", "VIP"), ("STOP", "STOP"), ("KL", "KL"), ("HELLO", "HELLO"),
+    ("WAIOO", "WAIOO"), ("WQA12345", "WQA12345"), ("WQA1234S", "WQA1234S"), ("WQA123456789", "WQA123456789"),
+]
+
+class PlateNormalizerTest(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = PlateNormalizer()
+
+    def test_cases(self):
+        for raw, want in CASES:
+            with self.subTest(raw=raw):
+                self.assertEqual(self.normalizer.correct(raw), want)
+
+    def test_bare_number_is_not_given_a_series(self):
+        plate, kind, _ = self.normalizer.decode("1234")
+        self.assertEqual((plate, kind), ("1234", 'raw'))
+
+    def test_unfittable_reading_is_returned_raw(self):
+        plate, kind, cost = self.normalizer.decode("QWERTY1UIOP")
+        self.assertEqual((plate, kind), ("QWERTY1UIOP", 'raw'))
+        self.assertGreater(cost, MAX_COST)
+
+    def test_normalize_is_cached(self):
+        self.normalizer.normalize("W0A1234")
+        self.normalizer.normalize("W0A1234")
+        self.assertEqual(self.normalizer.cache_info().hits, 1)
+
+if __name__ == "__main__":
+    unittest.main()
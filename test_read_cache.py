@@ -0,0 +1,71 @@
+import time
+import unittest
+from final_system_segmentation import ReadCache
+
+class Loader:
+    """Stands in for a database read and counts how often it ran."""
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+# ==========================================
+# READ CACHE
+# ==========================================
+class ReadCacheTest(unittest.TestCase):
+    def test_hit_skips_the_loader(self):
+        cache = ReadCache()
+        loader = Loader({'a': 1})
+        self.assertEqual(cache.get('users', loader), {'a': 1})
+        self.assertEqual(cache.get('users', loader), {'a': 1})
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+
+    def test_ttl_expiry(self):
+        cache = ReadCache(ttls={'users': 0.05})
+        loader = Loader({'a': 1})
+        cache.get('users', loader)
+        time.sleep(0.1)
+        cache.get('users', loader)
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.get_stats()['expired'], 1)
+
+    def test_lru_eviction(self):
+        cache = ReadCache(max_entries=2)
+        loaders = {path: Loader(path) for path in ('cameras/a', 'cameras/b', 'cameras/c')}
+        cache.get('cameras/a', loaders['cameras/a'])
+        cache.get('cameras/b', loaders['cameras/b'])
+        cache.get('cameras/a', loaders['cameras/a'])  # a is now the most recently used
+        cache.get('cameras/c', loaders['cameras/c'])  # evicts b
+        cache.get('cameras/a', loaders['cameras/a'])
+        cache.get('cameras/b', loaders['cameras/b'])
+        self.assertEqual(loaders['cameras/a'].calls, 1)
+        self.assertEqual(loaders['cameras/b'].calls, 2)
+        self.assertGreaterEqual(cache.get_stats()['evictions'], 1)
+
+    def test_callers_get_isolated_copies(self):
+        cache = ReadCache()
+        cache.get('users', Loader({'u1': {'username': "ali"}}))['u1']['username'] = "changed"
+        self.assertEqual(cache.get('users', Loader(None))['u1']['username'], "ali")
+
+    def test_invalidate_drops_path_children_and_ancestors(self):
+        cache = ReadCache()
+        for path in ('users', 'users/u1', 'users/u1/email', 'users/u2', 'cameras/u1'):
+            cache.put(path, path)
+        cache.invalidate('users/u1')
+        self.assertEqual(set(cache.entries), {'users/u2', 'cameras/u1'})
+
+    def test_patch_updates_the_cached_node(self):
+        cache = ReadCache()
+        cache.put('cameras/u1', {'c1': {'ip_address': "rtsp://a"}})
+        cache.put('cameras/u1/c1', {'ip_address': "rtsp://a"})
+        cache.patch('cameras/u1', 'c2', {'ip_address': "rtsp://b"})
+        cache.patch('cameras/u1', 'c1', None)
+        self.assertEqual(cache.get('cameras/u1', Loader(None)), {'c2': {'ip_address': "rtsp://b"}})
+        self.assertNotIn('cameras/u1/c1', cache.entries)
+
+if __name__ == "__main__":
+    unittest.main()
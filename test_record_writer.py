@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from record_writer import RecordWriter, WriteJob
+
+def job(plate, **kwargs):
+    record = {'user_id': "u1", 'plate_number': plate, 'camera_source': "cam1",
+              'timestamp': "2024-01-01 10:00:00", 'confidence': 0.9}
+    return WriteJob(record, **kwargs)
+
+class FlakyStore:
+    """Wraps the real store; the first `failures` insert_many calls raise like a locked database."""
+    def __init__(self, store, failures):
+        self.store = store
+        self.failures = failures
+
+    def insert_many(self, records):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        return self.store.insert_many(records)
+
+    def correct_latest(self, *args):
+        return self.store.correct_latest(*args)
+
+# ==========================================
+# LOCAL STORE FAILURES IN THE WRITER
+# ==========================================
+class RecordWriterStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.writer = RecordWriter(os.path.join(self.folder, "store.db"), self.folder)
+        self.store = self.writer.store
+
+    def tearDown(self):
+        self.writer.stop()
+        self.store.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def plates(self):
+        return sorted(r['plate_number'] for r in self.store.query(user_id="u1"))
+
+    def test_only_the_failing_record_is_counted_and_dropped(self):
+        # plate_number is NOT NULL, this record can never be stored
+        self.writer.write_batch([job("WQA1234"), job(None), job("BKL55")])
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(self.plates(), ["BKL55", "WQA1234"])
+        stats = self.writer.get_stats()
+        self.assertEqual(stats['store_failures'], RecordWriter.STORE_RETRIES)
+        self.assertEqual(stats['store_retries'], RecordWriter.STORE_RETRIES - 1)
+        self.assertEqual(stats['store_dropped'], 1)
+
+    def test_transient_failure_is_retried(self):
+        self.writer.store = FlakyStore(self.store, failures=3)  # the batch, then each of its two rows
+        self.writer.write_batch([job("WQA1234"), job("BKL55")])
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(self.plates(), ["BKL55", "WQA1234"])
+        stats = self.writer.get_stats()
+        self.assertEqual(stats['store_dropped'], 0)
+        self.assertEqual(stats['store_retries'], 2)
+        self.assertEqual(stats['written'], 2)
+
+    def test_retry_does_not_repeat_the_image(self):
+        self.writer.store = FlakyStore(self.store, failures=2)
+        image = np.zeros((8, 8, 3), dtype=np.uint8)
+        self.writer.write_batch([job("WQA1234", image=image, img_name="a.jpg")])
+        os.remove(os.path.join(self.folder, "a.jpg"))
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(self.plates(), ["WQA1234"])
+        self.assertFalse(os.path.exists(os.path.join(self.folder, "a.jpg")))
+
+if __name__ == "__main__":
+    unittest.main()
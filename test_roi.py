@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+from lpr_pipeline import LPRPipeline, ModelSet, SystemConfig
+from roi import DetectionROI
+
+class Box:
+    def __init__(self, cls_id, xyxy):
+        self.cls = [cls_id]
+        self.xyxy = [xyxy]
+
+class Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+class SceneDetector:
+    """One car with its plate on the trigger line; a crop only sees the part of them inside it."""
+    CAR = (300, 200, 600, 560)
+    PLATE = (400, 470, 500, 500)
+
+    def __init__(self, frame_shape):
+        self.frame_shape = frame_shape
+        self.offset = (0, 0)
+        self.calls = []
+
+    def predict(self, frames, **kwargs):
+        frames = frames if isinstance(frames, list) else [frames]
+        results = []
+        for frame in frames:
+            full = frame.shape[:2] == self.frame_shape
+            self.calls.append('full' if full else 'crop')
+            ox, oy = (0, 0) if full else self.offset
+            h, w = frame.shape[:2]
+            boxes = []
+            for cls_id, (x1, y1, x2, y2) in ((0, self.CAR), (1, self.PLATE)):
+                x1, y1, x2, y2 = max(x1 - ox, 0), max(y1 - oy, 0), min(x2 - ox, w), min(y2 - oy, h)
+                if x2 > x1 and y2 > y1:
+                    boxes.append(Box(cls_id, (x1, y1, x2, y2)))
+            results.append(Result(boxes))
+        return results
+
+# ==========================================
+# CAR BOXES CUT BY THE DETECTION ROI
+# ==========================================
+class DetectionROITest(unittest.TestCase):
+    def setUp(self):
+        self.saved = SystemConfig.DETECTION_ROI, dict(SystemConfig.CAMERA_ROIS)
+        SystemConfig.CAMERA_ROIS.clear()
+        SystemConfig.CAMERA_ROIS["cam"] = "band"
+        w, h = LPRPipeline.FRAME_SIZE
+        self.frame = np.zeros((h, w, 3), dtype=np.uint8)
+        self.models = ModelSet(gpu=False)
+        self.models.detector = SceneDetector(self.frame.shape[:2])
+        self.pipeline = LPRPipeline("cam", save_records=False, gpu=False, models=self.models)
+
+    def tearDown(self):
+        SystemConfig.DETECTION_ROI = self.saved[0]
+        SystemConfig.CAMERA_ROIS.clear()
+        SystemConfig.CAMERA_ROIS.update(self.saved[1])
+
+    def analyse(self):
+        crop, imgsz = self.pipeline.detection_input(self.frame)
+        self.models.detector.offset = self.pipeline.roi_offset
+        self.pipeline.associate_results(self.frame, self.models.detect(crop, imgsz))
+        return self.pipeline.current_detections
+
+    def test_cut_car_gets_its_full_frame_box(self):
+        detections = self.analyse()
+        self.assertEqual(self.models.detector.calls, ['crop', 'full'])
+        self.assertEqual(tuple(detections[0][:4]), SceneDetector.CAR)
+        self.assertEqual(self.pipeline.band_plates[0][0], SceneDetector.PLATE)
+
+    def test_car_inside_the_band_needs_no_full_pass(self):
+        self.models.detector.CAR = (300, 340, 600, 560)
+        detections = self.analyse()
+        self.assertEqual(self.models.detector.calls, ['crop'])
+        self.assertEqual(tuple(detections[0][:4]), (300, 340, 600, 560))
+
+    def test_polygon_mask_cuts(self):
+        roi = DetectionROI([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])  # upper left triangle
+        frame = np.zeros((100, 200, 3), dtype=np.uint8)
+        crop, offset = roi.crop(frame, 50)
+        self.assertFalse(roi.cuts((5, 5, 40, 30), offset, crop.shape, frame.shape))
+        self.assertTrue(roi.cuts((60, 30, 140, 70), offset, crop.shape, frame.shape))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import itertools
+
+# ==========================================
+# HELPER FUNCTIONS
+# ==========================================
+def box_iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    iw, ih = max(0, ix2 - ix1), max(0, iy2 - iy1)
+    inter = iw * ih
+    if inter == 0: return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+def box_center(box):
+    return (box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0
+
+def box_area(box):
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+def box_intersection(a, b):
+    return box_area((max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])))
+
+# ==========================================
+# TRACK
+# ==========================================
+class Track:
+    """
+    One vehicle (or plate) followed across analysed frames. Besides geometry it
+    carries the cached OCR / color results so they are not recomputed every frame.
+    """
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = box
+        self.velocity = (0.0, 0.0)
+        self.hits = 1
+        self.misses = 0
+        self.line_side = None
+
+        # Cached inference results
+        self.ocr_text = None
+        self.ocr_conf = 0.0
+        self.ocr_calls = 0
+        self.color = None
+        self.color_conf = 0.0
+        self.color_calls = 0
+        self.vote = None  # PlateVote over the OCR readings of a plate track
+        self.vehicle = None  # (color, dist, height) of the car box a plate track was last seen in
+
+    @property
+    def center(self):
+        return box_center(self.box)
+
+    def predicted_box(self):
+        # Constant velocity step, enough for cars moving through a gate
+        dx, dy = self.velocity
+        x1, y1, x2, y2 = self.box
+        return (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+
+    def update(self, box):
+        (ox, oy), (nx, ny) = self.center, box_center(box)
+        self.velocity = (nx - ox, ny - oy)
+        self.box = box
+        self.hits += 1
+        self.misses = 0
+
+    def check_crossing(self, line_y):
+        """True on the update where the track centre moves to the other side of the trigger line."""
+        side = self.center[1] >= line_y
+        crossed = self.line_side is not None and side != self.line_side
+        self.line_side = side
+        return crossed
+
+# ==========================================
+# IOU / CENTROID TRACKER (SORT-STYLE, CPU ONLY)
+# ==========================================
+class IoUTracker:
+    """
+    Greedy IoU association against constant-velocity predictions, with a
+    centroid-distance fallback for small fast boxes (plates) that stop overlapping.
+    """
+    def __init__(self, iou_threshold=0.3, max_center_dist=0.75, max_age=3):
+        self.iou_threshold = iou_threshold
+        self.max_center_dist = max_center_dist  # In units of the track's box diagonal
+        self.max_age = max_age                  # Analysed frames a track may go unseen
+        self.tracks = []
+        self.id_counter = itertools.count(1)
+
+    def update(self, boxes):
+        """Associates detections with tracks. Returns the Track for every box, in the same order."""
+        assigned = [None] * len(boxes)
+        free_tracks = set(range(len(self.tracks)))
+        free_boxes = set(range(len(boxes)))
+
+        # 1. IoU matching
+        pairs = []
+        for ti, track in enumerate(self.tracks):
+            pred = track.predicted_box()
+            for bi, box in enumerate(boxes):
+                iou = box_iou(pred, box)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, ti, bi))
+        for _, ti, bi in sorted(pairs, reverse=True):
+            if ti in free_tracks and bi in free_boxes:
+                assigned[bi] = self.tracks[ti]
+                free_tracks.discard(ti); free_boxes.discard(bi)
+
+        # 2. Centroid fallback for whatever is left
+        pairs = []
+        for ti in free_tracks:
+            track = self.tracks[ti]
+            px, py = box_center(track.predicted_box())
+            x1, y1, x2, y2 = track.box
+            diag = max(1.0, ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5)
+            for bi in free_boxes:
+                bx, by = box_center(boxes[bi])
+                dist = ((bx - px) ** 2 + (by - py) ** 2) ** 0.5 / diag
+                if dist <= self.max_center_dist:
+                    pairs.append((dist, ti, bi))
+        for _, ti, bi in sorted(pairs):
+            if ti in free_tracks and bi in free_boxes:
+                assigned[bi] = self.tracks[ti]
+                free_tracks.discard(ti); free_boxes.discard(bi)
+
+        # 3. Update matched, age unmatched, create new
+        for bi, track in enumerate(assigned):
+            if track is not None:
+                track.update(boxes[bi])
+        for ti in free_tracks:
+            self.tracks[ti].misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_age]
+
+        for bi in sorted(free_boxes):
+            track = Track(next(self.id_counter), boxes[bi])
+            self.tracks.append(track)
+            assigned[bi] = track
+
+        return assigned
+
+    def reset(self):
+        self.tracks = []
@@ -0,0 +1,278 @@
+import customtkinter as ctk
+
+# ==========================================
+# COLUMN DEFINITION
+# ==========================================
+class Column:
+    """
+    One table column. text(row) gives the cell string, sort_key(row) the value
+    used when the header is clicked (defaults to the text).
+    """
+    def __init__(self, title, weight=1, text=None, sort_key=None, text_color="white", anchor="center"):
+        self.title = title
+        self.weight = weight
+        self.text = text or (lambda row: "")
+        self.sort_key = sort_key
+        self.text_color = text_color
+        self.anchor = anchor
+
+class Action:
+    """A per-row button. callback(row) is called with the row's data."""
+    def __init__(self, text, callback, fg_color=None, text_color="white", width=50):
+        self.text = text
+        self.callback = callback
+        self.fg_color = fg_color
+        self.text_color = text_color
+        self.width = width
+
+# ==========================================
+# VIRTUALIZED TABLE
+# ==========================================
+class VirtualTable(ctk.CTkFrame):
+    """
+    Table that only builds widgets for the rows that fit on screen. The pool is
+    resized with the viewport and scrolling rebinds data to the same widgets,
+    so opening it costs the same for 10 rows or 100,000.
+
+    rows are arbitrary objects (dicts, tuples...), columns read them through
+    Column.text. Clicking a header sorts by that column, clicking again reverses.
+    """
+    ROW_HEIGHT = 38
+    STRIPE_COLORS = ("#333333", "#2b2b2b")
+    WHEEL_EVENTS = ("<MouseWheel>", "<Button-4>", "<Button-5>")
+
+    def __init__(self, master, columns, actions=None, action_weight=1, header_color="#444",
+                 empty_text="No records found.", header_font=("Roboto", 14, "bold"), **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.actions = actions or []
+        self.empty_text = empty_text
+        self.show_actions = True
+
+        self.rows = []
+        self.top = 0
+        self.sort_col = None
+        self.sort_desc = False
+        self.pool = []
+        self.visible_rows = 0
+
+        weights = [c.weight for c in columns] + ([action_weight] if self.actions else [])
+        self.weights = weights
+
+        # Header
+        self.header = ctk.CTkFrame(self, fg_color=header_color, height=44, corner_radius=8)
+        self.header.pack(fill="x", padx=(0, 16), pady=(0, 6))
+        self.header_labels = []
+        for i, w in enumerate(weights):
+            self.header.grid_columnconfigure(i, weight=w, uniform="vt")
+        for i, col in enumerate(columns):
+            lbl = ctk.CTkLabel(self.header, text=col.title, font=header_font, anchor=col.anchor, cursor="hand2")
+            lbl.grid(row=0, column=i, sticky="ew", padx=8, pady=8)
+            lbl.bind("<Button-1>", lambda e, idx=i: self.sort_by(idx))
+            self.header_labels.append(lbl)
+        if self.actions:
+            ctk.CTkLabel(self.header, text="Actions", font=header_font).grid(row=0, column=len(columns), sticky="ew", padx=8, pady=8)
+
+        # Body + scrollbar
+        container = ctk.CTkFrame(self, fg_color="transparent")
+        container.pack(fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(container, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = ctk.CTkFrame(container, fg_color="transparent", corner_radius=0)
+        self.body.pack(side="left", fill="both", expand=True)
+
+        self.empty_label = ctk.CTkLabel(self.body, text=empty_text, text_color="gray")
+
+        self.body.bind("<Configure>", self.on_resize)
+        # The wheel is bound to a tag of this table's own widgets only, removed again in destroy()
+        self.wheel_tag = f"VirtualTableWheel{id(self)}"
+        self.wheel_commands = [self.bind_class(self.wheel_tag, sequence, self.on_wheel) for sequence in self.WHEEL_EVENTS]
+        self.tag_wheel(container)
+
+    def destroy(self):
+        for sequence, command in zip(self.WHEEL_EVENTS, self.wheel_commands):
+            self.unbind_class(self.wheel_tag, sequence)
+            # bind_class never frees its Tcl command, which would keep the table alive
+            self.deletecommand(command)
+        super().destroy()
+
+    # --- DATA ---
+    def set_rows(self, rows):
+        """Replaces the table content. Only the list is stored, no widgets are built."""
+        self.rows = list(rows)
+        self.top = 0
+        if self.sort_col is not None:
+            self.apply_sort()
+        self.render()
+
+    def append_rows(self, rows):
+        self.rows.extend(rows)
+        if self.sort_col is not None:
+            self.apply_sort()
+        self.render()
+
+    def set_actions_visible(self, visible):
+        self.show_actions = visible
+        self.render()
+
+    def sort_by(self, col_idx):
+        if self.sort_col == col_idx:
+            self.sort_desc = not self.sort_desc
+        else:
+            self.sort_col = col_idx
+            self.sort_desc = False
+        for i, (col, lbl) in enumerate(zip(self.columns, self.header_labels)):
+            arrow = (" ▼" if self.sort_desc else " ▲") if i == col_idx else ""
+            lbl.configure(text=col.title + arrow)
+        self.apply_sort()
+        self.top = 0
+        self.render()
+
+    def apply_sort(self):
+        col = self.columns[self.sort_col]
+        key = col.sort_key or col.text
+
+        def safe_key(row):
+            value = key(row)
+            # Mixed/missing values sort last instead of raising
+            return (value is None, value if value is not None else 0)
+        try:
+            self.rows.sort(key=safe_key, reverse=self.sort_desc)
+        except TypeError:
+            self.rows.sort(key=lambda r: str(key(r)), reverse=self.sort_desc)
+
+    # --- ROW POOL ---
+    def on_resize(self, event):
+        needed = max(1, event.height // self.ROW_HEIGHT + 1)
+        if needed != len(self.pool):
+            while len(self.pool) < needed:
+                self.pool.append(self.build_slot(len(self.pool)))
+                self.tag_wheel(self.pool[-1]['frame'])
+            while len(self.pool) > needed:
+                self.pool.pop()['frame'].destroy()
+        self.visible_rows = max(1, event.height // self.ROW_HEIGHT)
+        self.scroll_to(self.top)
+        self.render()
+
+    def build_slot(self, slot_idx):
+        frame = ctk.CTkFrame(self.body, height=self.ROW_HEIGHT - 2, corner_radius=5, fg_color=self.STRIPE_COLORS[0])
+        for i, w in enumerate(self.weights):
+            frame.grid_columnconfigure(i, weight=w, uniform="vt")
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_propagate(False)
+
+        labels = []
+        for i, col in enumerate(self.columns):
+            lbl = ctk.CTkLabel(frame, text="", text_color=col.text_color, anchor=col.anchor, height=24)
+            lbl.grid(row=0, column=i, sticky="ew", padx=8)
+            labels.append(lbl)
+
+        buttons = []
+        if self.actions:
+            action_frame = ctk.CTkFrame(frame, fg_color="transparent")
+            action_frame.grid(row=0, column=len(self.columns), padx=8)
+            for action in self.actions:
+                kwargs = {'fg_color': action.fg_color} if action.fg_color else {}
+                btn = ctk.CTkButton(action_frame, text=action.text, width=action.width, height=25,
+                                    text_color=action.text_color,
+                                    command=lambda a=action, s=slot_idx: self.on_action(a, s), **kwargs)
+                btn.pack(side="left", padx=2)
+                buttons.append(btn)
+
+        return {'frame': frame, 'labels': labels, 'buttons': buttons, 'texts': [None] * len(labels),
+                'stripe': None, 'placed': False, 'actions_shown': True}
+
+    def on_action(self, action, slot_idx):
+        idx = self.top + slot_idx
+        if 0 <= idx < len(self.rows):
+            action.callback(self.rows[idx])
+
+    def render(self):
+        if not self.rows:
+            self.empty_label.place(relx=0.5, y=20, anchor="n")
+        else:
+            self.empty_label.place_forget()
+
+        for slot_idx, slot in enumerate(self.pool):
+            idx = self.top + slot_idx
+            if idx >= len(self.rows):
+                if slot['placed']:
+                    slot['frame'].place_forget()
+                    slot['placed'] = False
+                continue
+
+            row = self.rows[idx]
+            # Only touch widgets whose content actually changed
+            for i, (col, lbl) in enumerate(zip(self.columns, slot['labels'])):
+                try:
+                    txt = str(col.text(row))
+                except Exception:
+                    txt = "-"
+                if slot['texts'][i] != txt:
+                    lbl.configure(text=txt)
+                    slot['texts'][i] = txt
+
+            stripe = self.STRIPE_COLORS[idx % 2]
+            if slot['stripe'] != stripe:
+                slot['frame'].configure(fg_color=stripe)
+                slot['stripe'] = stripe
+
+            if slot['actions_shown'] != self.show_actions:
+                for btn in slot['buttons']:
+                    btn.configure(state="normal" if self.show_actions else "disabled")
+                slot['actions_shown'] = self.show_actions
+
+            if not slot['placed']:
+                slot['frame'].place(x=0, y=slot_idx * self.ROW_HEIGHT, relwidth=1.0, height=self.ROW_HEIGHT - 2)
+                slot['placed'] = True
+
+        self.update_scrollbar()
+
+    # --- SCROLLING ---
+    def max_top(self):
+        return max(0, len(self.rows) - self.visible_rows)
+
+    def scroll_to(self, top):
+        top = max(0, min(int(top), self.max_top()))
+        if top != self.top:
+            self.top = top
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                step *= max(1, self.visible_rows - 1)
+            self.scroll_to(self.top + step)
+
+    def update_scrollbar(self):
+        total = len(self.rows)
+        if total == 0 or total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows) / total))
+
+    def tag_wheel(self, widget):
+        """Lets widget and everything inside it scroll the table with the wheel."""
+        tags = widget.bindtags()
+        if self.wheel_tag not in tags:
+            widget.bindtags((self.wheel_tag,) + tags)
+        for child in widget.winfo_children():
+            self.tag_wheel(child)
+
+    def on_wheel(self, event):
+        if getattr(event, 'num', None) == 4:
+            step = -3
+        elif getattr(event, 'num', None) == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self.scroll_to(self.top + step)